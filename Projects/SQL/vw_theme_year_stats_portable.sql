@@ -0,0 +1,81 @@
+/* vw_theme_year_stats for local embedded databases (SQLite, DuckDB).
+Same logic as the view at the end of LEGO_THEME_SET.sql, without the
+SQL Server specifics (dbo schema, OBJECT_ID check, GO batches).
+Expects the raw tables `sets` (year, theme_id, ...) and `themes` (id, name, ...).
+Statements are separated by semicolons and run one at a time. */
+DROP VIEW IF EXISTS vw_theme_year_stats;
+
+CREATE VIEW vw_theme_year_stats AS
+-- Base: sets per theme per year
+WITH theme_year AS (
+    SELECT
+        s.year,
+        t.name AS theme,
+        COUNT(*) AS num_sets
+    FROM sets s
+    JOIN themes t
+        ON s.theme_id = t.id
+    GROUP BY s.year, t.name
+),
+
+-- Year-on-year comparison
+with_lag AS (
+    SELECT
+        year,
+        theme,
+        num_sets,
+        LAG(num_sets) OVER (PARTITION BY theme ORDER BY year) AS prev_num_sets
+    FROM theme_year
+),
+
+-- Total sets per year (all themes combined)
+year_total AS (
+    SELECT
+        year,
+        SUM(num_sets) AS total_sets_year
+    FROM theme_year
+    GROUP BY year
+),
+
+-- First year each theme appears (launch year)
+first_year AS (
+    SELECT
+        theme,
+        MIN(year) AS first_year
+    FROM theme_year
+    GROUP BY theme
+),
+
+-- How many new themes were launched each year
+new_theme_count AS (
+    SELECT
+        first_year AS year,
+        COUNT(*) AS new_themes_launched
+    FROM first_year
+    GROUP BY first_year
+)
+
+SELECT
+    wl.year,
+    wl.theme,
+    wl.num_sets,
+    wl.prev_num_sets,
+    (wl.num_sets - wl.prev_num_sets) AS abs_change,
+    CASE
+        WHEN wl.prev_num_sets IS NULL OR wl.prev_num_sets = 0 THEN NULL
+        ELSE ROUND(100.0 * (wl.num_sets - wl.prev_num_sets) / wl.prev_num_sets, 2)
+    END AS pct_change,
+    yt.total_sets_year,
+    ROUND(100.0 * wl.num_sets / yt.total_sets_year, 2) AS pct_of_portfolio,
+    CASE
+        WHEN wl.year = fy.first_year THEN 1
+        ELSE 0
+    END AS is_new_theme_year,
+    nt.new_themes_launched
+FROM with_lag wl
+JOIN year_total yt
+    ON wl.year = yt.year
+LEFT JOIN first_year fy
+    ON wl.theme = fy.theme
+LEFT JOIN new_theme_count nt
+    ON wl.year = nt.year;
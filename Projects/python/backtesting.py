@@ -0,0 +1,302 @@
+"""
+Rolling-origin backtesting of the theme forecasts.
+
+For every theme and engine, each year t from the min_train-th observed
+year on becomes a forecast origin: the engine is trained on the theme's
+years up to t and predicts the observed years in t+1 .. t+horizon.
+The errors of all origins give MAE / MAPE per theme, and the fit times
+give percentiles per engine.
+
+    python -m Projects.python.backtesting --engines linear holt prophet --workers 4
+
+Work is split into one task per (theme, engine) and run in a process
+pool (Prophet fits take most of the time). The NumPy engines fit all
+origins of a theme in one fit_predict call, one row per origin.
+
+Results are cached on disk per engine and settings. Every theme's rows
+carry the hash of that theme's series, so after a data refresh only the
+themes whose series changed are backtested again.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from .fast_forecasting import HOLT_ALPHAS, HOLT_BETAS, HOLT_PHIS, fit_predict
+from .forecast_cache import ForecastCache, series_hash
+from .instrumentation import stage
+from .theme_cube import get_theme_cube
+from .theme_forecasting import ENGINES
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BACKTEST_DIR = os.environ.get("LEGO_BACKTEST_DIR", ".backtest_cache")
+
+# bump when the fold layout, the error definitions or an engine change
+BACKTEST_VERSION = 3
+
+FOLD_COLUMNS = [
+    "theme", "engine", "origin_year", "test_points", "abs_error_sum",
+    "pct_error_sum", "pct_points", "fit_seconds", "series_hash",
+]
+
+
+def _folds(years, min_train, horizon):
+    """
+    (position of the last training point, test mask) of every fold.
+    An origin followed by a gap longer than the horizon has no test
+    years and is skipped, by every engine alike.
+    """
+    folds = []
+    for origin in range(min_train - 1, len(years) - 1):
+        origin_year = years[origin]
+        test = (years > origin_year) & (years <= origin_year + horizon)
+        if test.any():
+            folds.append((origin, test))
+    return folds
+
+
+def _fold_row(theme, engine, origin_year, actual, predicted, fit_seconds, digest):
+    errors = np.abs(predicted - actual)
+    nonzero = actual != 0
+    return {
+        "theme": theme,
+        "engine": engine,
+        "origin_year": int(origin_year),
+        "test_points": len(actual),
+        "abs_error_sum": float(errors.sum()),
+        # MAPE is undefined where nothing was released; those years only count for MAE
+        "pct_error_sum": float((errors[nonzero] / np.abs(actual[nonzero])).sum() * 100),
+        "pct_points": int(nonzero.sum()),
+        "fit_seconds": fit_seconds,
+        "series_hash": digest,
+    }
+
+
+def _backtest_fast(theme, years, values, engine, horizon, min_train, digest):
+    """All folds of one theme in one fit_predict call (one row per fold)."""
+    folds = _folds(years, min_train, horizon)
+    if not folds:
+        return []
+
+    origins = np.array([origin for origin, _ in folds])
+    train = np.arange(len(years))[None, :] <= origins[:, None]
+    start = time.perf_counter()
+    result = fit_predict(np.broadcast_to(values, train.shape), train, years, horizon, engine)
+    fit_seconds = (time.perf_counter() - start) / len(folds)
+
+    rows = []
+    for fold, (origin, test) in enumerate(folds):
+        origin_year = years[origin]
+        steps = years[test] - origin_year - 1
+        rows.append(_fold_row(theme, engine, origin_year, values[test],
+                              result["yhat"][fold, steps], fit_seconds, digest))
+    return rows
+
+
+def _backtest_prophet(theme, years, values, horizon, min_train, digest):
+    from .theme_forecasting import _predict_prophet_at_years
+
+    rows = []
+    for origin, test in _folds(years, min_train, horizon):
+        origin_year = years[origin]
+        start = time.perf_counter()
+        predicted = _predict_prophet_at_years(years[:origin + 1], values[:origin + 1], years[test])
+        fit_seconds = time.perf_counter() - start
+        rows.append(_fold_row(theme, "prophet", origin_year, values[test],
+                              predicted, fit_seconds, digest))
+    return rows
+
+
+def _backtest_worker(task):
+    """Runs in a pool process: every fold of one (theme, engine)."""
+    theme, years, values, engine, horizon, min_train = task
+
+    # cmdstanpy logs every fit at INFO level, which floods batch output
+    logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+    logging.getLogger("prophet").setLevel(logging.WARNING)
+
+    digest = series_hash(years, values)
+    if engine == "prophet":
+        return _backtest_prophet(theme, years, values, horizon, min_train, digest)
+    return _backtest_fast(theme, years, values, engine, horizon, min_train, digest)
+
+
+def _engine_config(engine):
+    if engine == "prophet":
+        from .theme_forecasting import _model_config
+
+        return _model_config()
+    config = {"engine": engine}
+    if engine == "holt":
+        config["grid"] = [HOLT_ALPHAS.tolist(), HOLT_BETAS.tolist(), HOLT_PHIS.tolist()]
+    return config
+
+
+def _cache_key(engine, horizon, min_train):
+    payload = json.dumps(
+        {
+            "version": BACKTEST_VERSION,
+            "horizon": int(horizon),
+            "min_train": int(min_train),
+            "config": _engine_config(engine),
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@stage
+def run_backtest(df, engines=("linear", "holt"), horizon=3, min_train=5,
+                 themes=None, workers=None, use_cache=True, cache_dir=DEFAULT_BACKTEST_DIR):
+    """
+    Rolling-origin backtest of every theme (or `themes`) and engine.
+    horizon   : years predicted from each origin
+    min_train : observed years a theme needs before its first origin
+    workers   : pool size (default: number of CPUs, 1 = run in-process)
+    use_cache : reuse stored folds of themes whose series did not change
+
+    Returns one row per (theme, engine, origin) with the columns in
+    FOLD_COLUMNS; summarize_by_theme / summarize_by_engine turn them into
+    the MAE / MAPE and fit-time reports.
+    """
+    unknown = [engine for engine in engines if engine not in ENGINES]
+    if unknown:
+        raise ValueError(f"Unknown engines {unknown}, expected some of {ENGINES}")
+    if min_train < 2 or horizon < 1:
+        raise ValueError("min_train must be at least 2 and horizon at least 1")
+
+    cube = get_theme_cube(df)
+    if "num_sets" not in cube.values:
+        logger.warning("Column 'num_sets' is missing.")
+        return pd.DataFrame(columns=FOLD_COLUMNS)
+
+    series = {}
+    for theme in (cube.themes if themes is None else themes):
+        found = cube.series(theme, "num_sets")
+        if found is not None and len(found[0]) > min_train:
+            series[theme] = found
+
+    cache = ForecastCache(cache_dir=cache_dir, max_entries=50)
+    current = {theme: series_hash(*pair) for theme, pair in series.items()}
+    stored_by_engine = {}
+    frames = []
+    tasks = []
+    for engine in engines:
+        stored = cache.get(_cache_key(engine, horizon, min_train)) if use_cache else None
+        done = set()
+        if stored is not None:
+            stored_by_engine[engine] = stored
+            keep = stored["series_hash"].to_numpy() == stored["theme"].map(current).to_numpy()
+            frames.append(stored[keep])
+            done = set(stored.loc[keep, "theme"])
+        todo = [theme for theme in series if theme not in done]
+        tasks.extend((theme, *series[theme], engine, horizon, min_train) for theme in todo)
+        logger.info("%s: %d themes to backtest, %d reused from the cache.",
+                    engine, len(todo), len(done))
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    start = time.perf_counter()
+    rows = []
+    if workers <= 1 or len(tasks) < 2:
+        for task in tasks:
+            rows.extend(_backtest_worker(task))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_backtest_worker, task) for task in tasks]
+            for future in as_completed(futures):
+                rows.extend(future.result())
+    logger.info("Ran %d theme/engine tasks in %.1fs with %d worker(s).",
+                len(tasks), time.perf_counter() - start, workers)
+
+    frames.append(pd.DataFrame(rows, columns=FOLD_COLUMNS))
+    folds = pd.concat([frame for frame in frames if len(frame)] or frames[-1:],
+                      ignore_index=True)
+    folds = folds.sort_values(["engine", "theme", "origin_year"], kind="stable")
+    folds = folds.reset_index(drop=True)
+
+    if use_cache:
+        for engine in engines:
+            entry = folds[folds["engine"] == engine]
+            stored = stored_by_engine.get(engine)
+            if themes is not None and stored is not None:
+                # a run over some themes keeps the stored folds of the others
+                others = stored[~stored["theme"].isin(list(series))]
+                entry = pd.concat([others, entry], ignore_index=True)
+            cache.put(_cache_key(engine, horizon, min_train), entry)
+    return folds
+
+
+def summarize_by_theme(folds):
+    """MAE, MAPE and fit-time median / max per (engine, theme)."""
+    grouped = folds.groupby(["engine", "theme"], sort=True)
+    summary = grouped.agg(
+        folds=("origin_year", "size"),
+        test_points=("test_points", "sum"),
+        abs_error_sum=("abs_error_sum", "sum"),
+        pct_error_sum=("pct_error_sum", "sum"),
+        pct_points=("pct_points", "sum"),
+        fit_p50_ms=("fit_seconds", "median"),
+        fit_max_ms=("fit_seconds", "max"),
+    ).reset_index()
+    summary["mae"] = summary["abs_error_sum"] / summary["test_points"]
+    summary["mape"] = summary["pct_error_sum"] / summary["pct_points"].where(summary["pct_points"] > 0)
+    summary[["fit_p50_ms", "fit_max_ms"]] *= 1000
+    return summary[["engine", "theme", "folds", "test_points", "mae", "mape",
+                    "fit_p50_ms", "fit_max_ms"]]
+
+
+def summarize_by_engine(folds):
+    """Accuracy over all test points and fit-time percentiles per engine."""
+    rows = []
+    for engine, group in folds.groupby("engine", sort=True):
+        fit_ms = group["fit_seconds"].to_numpy() * 1000
+        pct_points = group["pct_points"].sum()
+        rows.append({
+            "engine": engine,
+            "themes": group["theme"].nunique(),
+            "folds": len(group),
+            "mae": group["abs_error_sum"].sum() / group["test_points"].sum(),
+            "mape": group["pct_error_sum"].sum() / pct_points if pct_points else np.nan,
+            "fit_p50_ms": np.percentile(fit_ms, 50),
+            "fit_p90_ms": np.percentile(fit_ms, 90),
+            "fit_p99_ms": np.percentile(fit_ms, 99),
+            "fit_total_s": fit_ms.sum() / 1000,
+        })
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    from .data_snapshot import DEFAULT_CSV_PATH, load_snapshot
+
+    parser = argparse.ArgumentParser(description="Rolling-origin backtest of the theme forecasts.")
+    parser.add_argument("--csv", default=DEFAULT_CSV_PATH, help="cleaned dataset CSV")
+    parser.add_argument("--engines", nargs="+", default=list(ENGINES), choices=ENGINES)
+    parser.add_argument("--horizon", type=int, default=3, help="years predicted from each origin")
+    parser.add_argument("--min-train", type=int, default=5,
+                        help="observed years before the first origin")
+    parser.add_argument("--themes", nargs="+", help="only these themes")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--no-cache", action="store_true", help="recompute every theme")
+    parser.add_argument("--output", help="write the per-theme report to this CSV")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(name)s: %(message)s")
+
+    folds = run_backtest(load_snapshot(args.csv), engines=args.engines, horizon=args.horizon,
+                         min_train=args.min_train, themes=args.themes, workers=args.workers,
+                         use_cache=not args.no_cache)
+    by_theme = summarize_by_theme(folds)
+    if args.output:
+        by_theme.to_csv(args.output, index=False)
+        print(f"Per-theme report written to {args.output}")
+    else:
+        print(by_theme.sort_values(["engine", "mae"]).head(20).to_string(index=False))
+    print(summarize_by_engine(folds).to_string(index=False, float_format=lambda v: f"{v:.3f}"))
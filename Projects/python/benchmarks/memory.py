@@ -0,0 +1,102 @@
+"""
+Peak-memory benchmark for prepare_data (tracemalloc).
+
+    python -m Projects.python.benchmarks.memory --scale 100
+
+Runs the current copy-free pipeline and the previous copy-per-stage
+pipeline (kept below as a reference) on the shipped CSV repeated `scale`
+times, and reports the peak memory each needs on top of its input.
+
+tracemalloc sees NumPy buffers but not memory allocated by Arrow, so
+string columns backed by pyarrow are only partly counted.
+"""
+import argparse
+import contextlib
+import io
+import tracemalloc
+
+import pandas as pd
+
+from ..data_preparation import prepare_data
+from ..data_snapshot import DEFAULT_CSV_PATH
+
+
+def legacy_prepare_data(raw_df):
+    """prepare_data as it was before the copy-free rewrite (reference only)."""
+    df = raw_df.copy()
+    df = df.drop_duplicates().copy()
+
+    df = df.copy()
+    for col in ["year", "num_sets", "prev_num_sets", "total_sets_year",
+                "new_themes_launched"]:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("Int64")
+    for col in ["abs_change", "pct_change", "pct_of_portfolio"]:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+    if "is_new_theme_year" in df.columns:
+        df["is_new_theme_year"] = df["is_new_theme_year"].astype("Int64")
+    if "theme" in df.columns:
+        df["theme"] = df["theme"].astype(str)
+
+    df = df.copy()
+    for col in ["num_sets", "prev_num_sets", "abs_change", "pct_change",
+                "total_sets_year", "pct_of_portfolio", "new_themes_launched"]:
+        if col in df.columns:
+            df[col] = df[col].fillna(0)
+    if "theme" in df.columns:
+        df["theme"] = df["theme"].replace("", pd.NA)
+        df["theme"] = df["theme"].fillna("Unknown")
+    return df
+
+
+def measure_peak(fn, *args):
+    """(result, peak bytes allocated while fn ran, bytes still held by result)."""
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = fn(*args)
+        after, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak - before, after - before
+
+
+def run_memory_benchmark(csv_path=DEFAULT_CSV_PATH, scale=100):
+    # plain inferred dtypes, like a raw read from CSV/SQL
+    base_df = pd.read_csv(csv_path)
+    # give every copy its own theme names so the rows stay distinct
+    copies = []
+    for i in range(scale):
+        copy = base_df.copy()
+        copy["theme"] = copy["theme"] + f" #{i}"
+        copies.append(copy)
+    raw_df = pd.concat(copies, ignore_index=True)
+    del copies
+    # raw data arrives from CSV/SQL in theme order, not year order
+    raw_df = raw_df.sort_values(["theme", "year"], kind="stable", ignore_index=True)
+    input_bytes = int(raw_df.memory_usage(deep=True).sum())
+
+    rows = []
+    for name, fn in [("legacy", legacy_prepare_data), ("copy_free", prepare_data)]:
+        result, peak, held = measure_peak(fn, raw_df)
+        rows.append({
+            "pipeline": name,
+            "rows": len(result),
+            "input_mb": round(input_bytes / 1e6, 1),
+            "peak_mb": round(peak / 1e6, 1),
+            "peak_x_input": round(peak / input_bytes, 2),
+            "retained_mb": round(held / 1e6, 1),
+        })
+        del result
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scale", type=int, default=100,
+                        help="repeat the shipped CSV this many times")
+    args = parser.parse_args()
+    print(run_memory_benchmark(scale=args.scale).to_string(index=False))
@@ -0,0 +1,225 @@
+"""
+Timed benchmarks of the public analysis functions on synthetic data.
+
+    python -m Projects.python.benchmarks.suite --rows 10000 100000 1000000
+    python -m Projects.python.benchmarks.suite --save-baseline
+    python -m Projects.python.benchmarks.suite --baseline Projects/python/benchmarks/baseline.json
+
+Each benchmark gets one warm-up call and is then timed `repeat` times;
+min and median seconds are reported. The analysis functions memoise
+structures on the prepared frame (derived_cache.py), so those are
+dropped before every call: each timing is a first call on a freshly
+prepared frame, not a cache hit. Data comes from synthetic.py with a
+fixed seed, so runs are repeatable. Results can be written to JSON and
+compared against a stored baseline: a benchmark whose best time is more
+than `tolerance` (and more than `noise_ms`) slower than the baseline is
+reported as a regression and the command exits with status 1. The best
+time is compared because it is far less noisy than the median.
+
+Baselines are machine-specific; regenerate one with --save-baseline on
+the machine you compare on.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+import pandas as pd
+
+from ..data_preparation import (
+    get_new_themes_for_year,
+    get_year_tables,
+    prepare_data,
+    rank_themes_by_sets_in_year,
+)
+from ..derived_cache import clear_derived
+from ..theme_cube import get_theme_cube
+from ..theme_duration import find_longest_running_themes, top_themes
+from ..theme_forecasting import forecast_theme
+from .synthetic import generate_rows
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_ROWS = (10_000, 100_000, 1_000_000)
+
+
+def _forecast_theme(df, theme, engine):
+    return forecast_theme(df, theme, periods=5, use_cache=False, engine=engine, plot=False)
+
+
+def _busiest_year(df):
+    return int(df["year"].value_counts().idxmax())
+
+
+def _biggest_theme(df):
+    return df.groupby("theme", observed=True)["num_sets"].sum().idxmax()
+
+
+def build_benchmarks(raw_df, with_prophet=False):
+    """
+    {name: (zero-argument callable, setup callable or None)} for one
+    dataset size. setup runs untimed before every call.
+    """
+    df = prepare_data(raw_df)
+    year = _busiest_year(df)
+    theme = _biggest_theme(df)
+    compared = top_themes(df, n=10)
+
+    def fresh_frame():
+        # back to the state prepare_data returns (it attaches the YearIndex)
+        clear_derived(df, keep=("year_index",))
+
+    benchmarks = {
+        "prepare_data": (lambda: prepare_data(raw_df), None),
+        # the one-off precompute behind the two Year Explorer lookups below
+        "build_year_tables": (lambda: get_year_tables(df), fresh_frame),
+        "rank_themes_by_sets_in_year": (lambda: rank_themes_by_sets_in_year(df, year), fresh_frame),
+        "get_new_themes_for_year": (lambda: get_new_themes_for_year(df, year), fresh_frame),
+        "find_longest_running_themes": (lambda: find_longest_running_themes(df), fresh_frame),
+        "gather_themes[10]": (lambda: get_theme_cube(df).gather(compared, "num_sets"), fresh_frame),
+        "forecast_theme[holt]": (lambda: _forecast_theme(df, theme, "holt"), fresh_frame),
+        "forecast_theme[linear]": (lambda: _forecast_theme(df, theme, "linear"), fresh_frame),
+    }
+    if with_prophet:
+        benchmarks["forecast_theme[prophet]"] = (lambda: _forecast_theme(df, theme, "prophet"),
+                                                 fresh_frame)
+    return benchmarks
+
+
+def time_call(fn, repeat=5, setup=None):
+    """
+    (min seconds, median seconds) over `repeat` calls after one warm-up.
+    setup, when given, runs untimed before every call.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        timings = []
+        for attempt in range(repeat + 1):
+            if setup is not None:
+                setup()
+            start = time.perf_counter()
+            fn()
+            if attempt:
+                timings.append(time.perf_counter() - start)
+    return min(timings), statistics.median(timings)
+
+
+def run_suite(rows=DEFAULT_ROWS, repeat=5, with_prophet=False, seed=0, only=None):
+    """
+    Run every benchmark at every size.
+    Returns the results dict that is written to JSON.
+    """
+    results = []
+    for n_rows in rows:
+        raw_df = generate_rows(n_rows, seed=seed)
+        with contextlib.redirect_stdout(io.StringIO()):
+            benchmarks = build_benchmarks(raw_df, with_prophet=with_prophet)
+        for name, (fn, setup) in benchmarks.items():
+            if only and name not in only:
+                continue
+            best, median = time_call(fn, repeat=repeat, setup=setup)
+            results.append({
+                "benchmark": name,
+                "rows": len(raw_df),
+                "target_rows": n_rows,
+                "min_seconds": round(best, 6),
+                "median_seconds": round(median, 6),
+            })
+            print(f"[run_suite] {name:<30} {len(raw_df):>10} rows  "
+                  f"min {best * 1000:10.2f} ms  median {median * 1000:10.2f} ms")
+        del raw_df, benchmarks
+
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "repeat": repeat,
+        "seed": seed,
+        "results": results,
+    }
+
+
+def compare_to_baseline(current, baseline, tolerance=0.25, noise_ms=1.0):
+    """
+    One row per benchmark/size found in both runs with the ratio of the
+    best times current / baseline; `regression` is True when the ratio is
+    above 1 + tolerance and the slowdown is more than noise_ms.
+    """
+    stored = {
+        (row["benchmark"], row["target_rows"]): row
+        for row in baseline["results"]
+    }
+    rows = []
+    for row in current["results"]:
+        base = stored.get((row["benchmark"], row["target_rows"]))
+        if base is None:
+            continue
+        ratio = row["min_seconds"] / max(base["min_seconds"], 1e-9)
+        slowdown_ms = (row["min_seconds"] - base["min_seconds"]) * 1000
+        rows.append({
+            "benchmark": row["benchmark"],
+            "rows": row["rows"],
+            "baseline_ms": round(base["min_seconds"] * 1000, 2),
+            "current_ms": round(row["min_seconds"] * 1000, 2),
+            "ratio": round(ratio, 2),
+            "regression": ratio > 1 + tolerance and slowdown_ms > noise_ms,
+        })
+    return pd.DataFrame(rows)
+
+
+def _write_json(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=list(DEFAULT_ROWS),
+                        help="approximate dataset sizes to benchmark")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", nargs="+", help="run only these benchmarks")
+    parser.add_argument("--with-prophet", action="store_true",
+                        help="also time forecast_theme with Prophet (slow)")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare against this results JSON")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help=f"write the results as the baseline ({DEFAULT_BASELINE})")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown before a benchmark counts as a regression")
+    parser.add_argument("--noise-ms", type=float, default=1.0,
+                        help="ignore slowdowns smaller than this many milliseconds")
+    args = parser.parse_args(argv)
+
+    current = run_suite(rows=args.rows, repeat=args.repeat,
+                        with_prophet=args.with_prophet, seed=args.seed, only=args.only)
+
+    if args.output:
+        _write_json(args.output, current)
+    if args.save_baseline:
+        _write_json(DEFAULT_BASELINE, current)
+        print(f"[main] Baseline written to {DEFAULT_BASELINE}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        report = compare_to_baseline(current, baseline, tolerance=args.tolerance,
+                                     noise_ms=args.noise_ms)
+        if report.empty:
+            print("[main] No benchmarks in common with the baseline.")
+            return 0
+        print(report.to_string(index=False))
+        if report["regression"].any():
+            print(f"[main] {int(report['regression'].sum())} regression(s) "
+                  f"beyond {args.tolerance:.0%}.")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
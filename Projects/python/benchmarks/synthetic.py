@@ -0,0 +1,88 @@
+"""
+Synthetic vw_theme_year_stats data at any size.
+
+    df = generate_theme_year_stats(n_themes=20_000, first_year=1950, last_year=2025)
+
+Every theme gets a launch year, a lifespan and a popularity weight; the
+weights follow a Zipf-like power law, so `skew` controls how much a few
+big themes dominate the portfolio. The (year, theme, num_sets) rows go
+through view_metrics.compute_view_metrics, so all derived columns are
+consistent with the real view. Rows ~= n_themes * mean lifespan; use
+themes_for_rows() to size a run by row count instead.
+"""
+import numpy as np
+import pandas as pd
+
+from ..view_metrics import compute_view_metrics
+
+
+def themes_for_rows(rows, first_year=1950, last_year=2025, mean_lifespan=None):
+    """Number of themes that gives roughly `rows` rows with these settings."""
+    span = last_year - first_year + 1
+    if mean_lifespan is None:
+        mean_lifespan = _default_lifespan(span)
+    return max(1, int(round(rows / _expected_years(span, mean_lifespan))))
+
+
+def _default_lifespan(span):
+    return max(1.0, span / 5)
+
+
+def _expected_years(span, mean_lifespan):
+    # lifespans are clipped at the end of the year span, simulate the mean
+    rng = np.random.default_rng(0)
+    start = rng.integers(0, span, 100_000)
+    life = rng.geometric(1 / mean_lifespan, 100_000)
+    return np.minimum(life, span - start).mean()
+
+
+def generate_theme_year_stats(n_themes=500, first_year=1950, last_year=2025,
+                              skew=1.1, mean_lifespan=None, sets_scale=40,
+                              seed=0):
+    """
+    Return a raw vw_theme_year_stats-shaped frame (like a SQL/CSV read,
+    not yet through prepare_data()).
+    n_themes      : number of distinct themes
+    first_year    : first calendar year
+    last_year     : last calendar year
+    skew          : power-law exponent of theme popularity (0 = all equal)
+    mean_lifespan : average years a theme runs (default: a fifth of the span)
+    sets_scale    : average sets per year of the most popular theme
+    seed          : random seed, same arguments give the same frame
+    """
+    rng = np.random.default_rng(seed)
+    span = last_year - first_year + 1
+    if mean_lifespan is None:
+        mean_lifespan = _default_lifespan(span)
+
+    start = rng.integers(0, span, n_themes)
+    lifespan = np.minimum(rng.geometric(1 / mean_lifespan, n_themes), span - start)
+    # rank 1 is the most popular theme; shuffle so popularity is not tied to the name
+    weight = 1.0 / rng.permutation(np.arange(1, n_themes + 1)) ** skew
+    weight = weight / weight.max()
+
+    # one row per (theme, active year), built without a Python loop
+    theme_codes = np.repeat(np.arange(n_themes, dtype=np.int32), lifespan)
+    offsets = np.arange(len(theme_codes)) - np.repeat(np.cumsum(lifespan) - lifespan, lifespan)
+    years = (first_year + start[theme_codes] + offsets).astype(np.int64)
+    num_sets = rng.poisson(sets_scale * weight[theme_codes]) + 1
+
+    width = len(str(n_themes))
+    names = np.array([f"Theme {i:0{width}d}" for i in range(n_themes)], dtype=object)
+    theme = pd.Categorical.from_codes(theme_codes, categories=pd.Index(names, dtype=str))
+
+    theme_year = pd.DataFrame({"year": years, "theme": theme, "num_sets": num_sets})
+    return compute_view_metrics(theme_year)
+
+
+def generate_rows(rows, first_year=1950, last_year=2025, skew=1.1, seed=0):
+    """generate_theme_year_stats() sized by (approximate) row count."""
+    n_themes = themes_for_rows(rows, first_year, last_year)
+    return generate_theme_year_stats(n_themes, first_year, last_year, skew=skew, seed=seed)
+
+
+if __name__ == "__main__":
+    df = generate_rows(100_000)
+    print(f"{len(df)} rows, {df['theme'].nunique()} themes, "
+          f"years {df['year'].min()}-{df['year'].max()}")
+    print(df.head().to_string(index=False))
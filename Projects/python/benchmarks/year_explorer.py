@@ -0,0 +1,126 @@
+"""
+Per-interaction latency of the Year Explorer (one slider move =
+get_new_themes_for_year + rank_themes_by_sets_in_year).
+
+    python -m Projects.python.benchmarks.year_explorer --rows 1000000
+
+Compares the per-call filter / copy / dedup / sort pipeline (kept below
+as a reference) with the precomputed YearTables lookups, on the shipped
+CSV and on a synthetic dataset, and checks both return the same tables.
+"""
+import argparse
+import statistics
+import time
+
+import pandas as pd
+
+from ..data_preparation import (
+    get_available_years,
+    get_new_themes_for_year,
+    get_year_slice,
+    get_year_tables,
+    prepare_data,
+    rank_themes_by_sets_in_year,
+)
+from ..data_snapshot import DEFAULT_CSV_PATH
+from .synthetic import generate_rows
+
+
+def legacy_get_new_themes_for_year(df, year):
+    """get_new_themes_for_year before the precomputed tables (reference only)."""
+    df_year = df[df["year"] == year]
+    if "is_new_theme_year" not in df_year.columns:
+        return pd.DataFrame()
+    df_new_themes = df_year[df_year["is_new_theme_year"] == 1].copy()
+    columns_to_keep = [col for col in ("theme", "num_sets", "pct_of_portfolio")
+                       if col in df_new_themes.columns]
+    df_selected = df_new_themes[columns_to_keep].copy()
+    df_unique = df_selected.drop_duplicates(subset="theme").copy()
+    df_sorted = df_unique.sort_values(by="theme", ascending=True).copy()
+    return df_sorted.reset_index(drop=True)
+
+
+def legacy_rank_themes_by_sets_in_year(df, year):
+    """rank_themes_by_sets_in_year before the precomputed tables (reference only)."""
+    df_year = df[df["year"] == year]
+    columns_to_keep = [col for col in ("theme", "num_sets", "pct_of_portfolio")
+                       if col in df_year.columns]
+    df_selected = df_year[columns_to_keep].copy()
+    df_unique = df_selected.drop_duplicates(subset="theme").copy()
+    df_sorted = df_unique.sort_values(by="num_sets", ascending=False).copy()
+    return df_sorted.reset_index(drop=True)
+
+
+def _same_table(a, b):
+    # the legacy ranking used an unstable sort, so ties may come in any order
+    key = [col for col in ("num_sets", "theme") if col in a.columns]
+    if not key:
+        return a.equals(b)
+    a = a.astype({"theme": str}).sort_values(key, ignore_index=True)
+    b = b.astype({"theme": str}).sort_values(key, ignore_index=True)
+    return a.equals(b)
+
+
+def _latency(fn, years):
+    """Median and max microseconds of fn(year) over every year."""
+    timings = []
+    for year in years:
+        start = time.perf_counter()
+        fn(year)
+        timings.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(timings), max(timings)
+
+
+def run_benchmark(df, label):
+    years = get_available_years(df)
+
+    mismatches = 0
+    for year in years:
+        mismatches += not _same_table(legacy_get_new_themes_for_year(df, year),
+                                      get_new_themes_for_year(df, year))
+        mismatches += not _same_table(legacy_rank_themes_by_sets_in_year(df, year),
+                                      rank_themes_by_sets_in_year(df, year))
+
+    def legacy_move(year):
+        legacy_get_new_themes_for_year(df, year)
+        legacy_rank_themes_by_sets_in_year(df, year)
+
+    def sliced_move(year):
+        # the same pipeline on the YearIndex slice instead of a full-frame mask
+        year_rows = get_year_slice(df, year)
+        legacy_get_new_themes_for_year(year_rows, year)
+        legacy_rank_themes_by_sets_in_year(year_rows, year)
+
+    def lookup_move(year):
+        get_new_themes_for_year(df, year)
+        rank_themes_by_sets_in_year(df, year)
+
+    # the tables are built on the first lookup; rebuild them to time it
+    start = time.perf_counter()
+    type(get_year_tables(df))(df)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    rows = []
+    for name, fn in [("legacy (mask + copies)", legacy_move),
+                     ("legacy on year slice", sliced_move),
+                     ("precomputed lookup", lookup_move)]:
+        median_us, max_us = _latency(fn, years)
+        rows.append({"dataset": label, "rows": len(df), "years": len(years),
+                     "path": name, "median_us": round(median_us, 1),
+                     "max_us": round(max_us, 1)})
+    print(f"[run_benchmark] {label}: tables built once in {build_ms:.1f} ms, "
+          f"{mismatches} mismatching tables")
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000,
+                        help="size of the synthetic dataset")
+    args = parser.parse_args()
+
+    results = [
+        run_benchmark(prepare_data(pd.read_csv(DEFAULT_CSV_PATH)), "shipped CSV"),
+        run_benchmark(prepare_data(generate_rows(args.rows)), "synthetic"),
+    ]
+    print(pd.concat(results, ignore_index=True).to_string(index=False))
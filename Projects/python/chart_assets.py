@@ -0,0 +1,338 @@
+"""
+Pre-rendered chart assets.
+
+The dataset changes about once a day, so instead of drawing every trend
+and bar chart with matplotlib on request, a build step renders all of
+them up front:
+
+    python -m Projects.python.chart_assets --formats png svg --workers 4
+
+Every theme gets a "trend" (sets per year) and a "share" (portfolio %)
+chart and every year a "year_bar" chart, drawn by the figure builders in
+theme_trends on the Agg backend in a process pool.
+
+The store is content-addressed: each file is saved as
+objects/<sha[:2]>/<sha256 of its bytes>.<format>, so identical charts are
+stored once and a file never changes after it was written. manifest.json
+maps (kind, subject) to those files, together with a hash of the chart's
+input data. A rebuild only redraws the charts whose input changed and
+then removes files no chart refers to any more.
+
+The app reads charts with get_chart_store().get(..., df=df) and draws
+live only on a miss: no store, an unknown theme/year, or a chart whose
+own input changed. A refresh that touches one theme or year therefore
+only turns that theme's or year's charts into misses; every other
+stored chart is still served until the next build.
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .data_preparation import get_available_years, get_data_fingerprint, get_year_slice
+from .theme_cube import get_theme_cube
+from .theme_trends import (
+    portfolio_share_figure,
+    sets_per_theme_figure,
+    theme_trend_figure,
+)
+
+DEFAULT_ASSET_DIR = os.environ.get("LEGO_ASSET_DIR", ".chart_assets")
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+# bump when the chart code changes, so every asset is redrawn
+RENDER_VERSION = 1
+DPI = 100
+
+FORMATS = ("png", "svg")
+
+CHART_BUILDERS = {
+    "trend": theme_trend_figure,
+    "share": portfolio_share_figure,
+    "year_bar": sets_per_theme_figure,
+}
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _read_manifest(asset_dir):
+    try:
+        with open(os.path.join(asset_dir, MANIFEST_NAME), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("version") != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def chart_input_key(df, kind, subject):
+    """Hash of everything a chart is drawn from (None if there is no data)."""
+    if kind == "year_bar":
+        rows = get_year_slice(df, subject)
+        if rows.empty:
+            return None
+        rows = rows[["theme", "num_sets"]].drop_duplicates(subset="theme")
+        labels = "\n".join(rows["theme"].astype(str)).encode("utf-8")
+        values = rows["num_sets"].to_numpy()
+    else:
+        metric = "num_sets" if kind == "trend" else "pct_of_portfolio"
+        series = get_theme_cube(df).series(subject, metric)
+        if series is None:
+            return None
+        years, values = series
+        labels = np.asarray(years, dtype="int64").tobytes()
+
+    digest = hashlib.sha256()
+    digest.update(f"{kind}|{subject}|{RENDER_VERSION}|{DPI}|".encode("utf-8"))
+    digest.update(labels)
+    digest.update(np.asarray(values, dtype="float64").tobytes())
+    return digest.hexdigest()
+
+
+def render_chart(df, kind, subject, formats=("png",)):
+    """{format: bytes} for one chart, or None if there is no data."""
+    fig = CHART_BUILDERS[kind](df, subject)
+    if fig is None:
+        return None
+    rendered = {}
+    for fmt in formats:
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format=fmt, dpi=DPI)
+        rendered[fmt] = buffer.getvalue()
+    return rendered
+
+
+# set in every pool process by _init_worker, so the frame is sent once per process
+_worker_df = None
+
+
+def _init_worker(df):
+    global _worker_df
+    import matplotlib
+
+    matplotlib.use("Agg")
+    _worker_df = df
+
+
+def _render_worker(task):
+    kind, subject, formats = task
+    return kind, subject, render_chart(_worker_df, kind, subject, formats)
+
+
+def _chart_tasks(df):
+    tasks = []
+    for theme in get_theme_cube(df).themes:
+        tasks.append(("trend", str(theme)))
+        tasks.append(("share", str(theme)))
+    for year in get_available_years(df):
+        tasks.append(("year_bar", int(year)))
+    return tasks
+
+
+def _object_path(asset_dir, relative_path):
+    return os.path.join(asset_dir, "objects", relative_path)
+
+
+def _store_object(asset_dir, data, fmt):
+    digest = hashlib.sha256(data).hexdigest()
+    relative_path = f"{digest[:2]}/{digest}.{fmt}"
+    path = _object_path(asset_dir, relative_path)
+    if not os.path.exists(path):
+        _write_atomic(path, data)
+    return relative_path
+
+
+def _prune_objects(asset_dir, referenced):
+    removed = 0
+    objects_dir = os.path.join(asset_dir, "objects")
+    for root, _, files in os.walk(objects_dir):
+        for name in files:
+            path = os.path.join(root, name)
+            relative_path = os.path.relpath(path, objects_dir).replace(os.sep, "/")
+            if relative_path not in referenced:
+                os.remove(path)
+                removed += 1
+    return removed
+
+
+def build_chart_assets(df, asset_dir=DEFAULT_ASSET_DIR, formats=("png",),
+                       workers=None, force=False):
+    """
+    Render every theme and year chart of the prepared frame into the store.
+    formats : any of FORMATS
+    workers : pool size (default: number of CPUs, 1 = run in-process)
+    force   : redraw every chart, even if its input did not change
+    Returns a dict with counts and the build time.
+    """
+    unknown = [fmt for fmt in formats if fmt not in FORMATS]
+    if unknown:
+        raise ValueError(f"Unknown formats {unknown}, expected some of {FORMATS}")
+
+    start = time.perf_counter()
+    old_manifest = None if force else _read_manifest(asset_dir)
+    old_charts = old_manifest["charts"] if old_manifest else {}
+
+    charts = {kind: {} for kind in CHART_BUILDERS}
+    to_render = []
+    input_keys = {}
+    for kind, subject in _chart_tasks(df):
+        input_key = chart_input_key(df, kind, subject)
+        if input_key is None:
+            continue
+        input_keys[(kind, subject)] = input_key
+        old_entry = old_charts.get(kind, {}).get(str(subject))
+        if (
+            old_entry is not None
+            and old_entry["input"] == input_key
+            and all(fmt in old_entry["files"] for fmt in formats)
+            and all(os.path.exists(_object_path(asset_dir, old_entry["files"][fmt]))
+                    for fmt in formats)
+        ):
+            charts[kind][str(subject)] = {
+                "input": input_key,
+                "files": {fmt: old_entry["files"][fmt] for fmt in formats},
+            }
+        else:
+            to_render.append((kind, subject, tuple(formats)))
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers <= 1 or len(to_render) < 2:
+        # the figure builders do not use pyplot, so no backend switch is needed here
+        results = (
+            (kind, subject, render_chart(df, kind, subject, fmts))
+            for kind, subject, fmts in to_render
+        )
+        rendered = _store_results(asset_dir, charts, input_keys, results)
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(df,)) as pool:
+            chunksize = max(1, len(to_render) // (workers * 4))
+            results = pool.map(_render_worker, to_render, chunksize=chunksize)
+            rendered = _store_results(asset_dir, charts, input_keys, results)
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "render_version": RENDER_VERSION,
+        "data_fingerprint": get_data_fingerprint(df),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "formats": list(formats),
+        "charts": charts,
+    }
+    _write_atomic(os.path.join(asset_dir, MANIFEST_NAME),
+                  json.dumps(manifest, indent=1).encode("utf-8"))
+
+    referenced = {
+        path
+        for entries in charts.values()
+        for entry in entries.values()
+        for path in entry["files"].values()
+    }
+    pruned = _prune_objects(asset_dir, referenced)
+
+    total = sum(len(entries) for entries in charts.values())
+    return {
+        "charts": total,
+        "rendered": rendered,
+        "reused": total - rendered,
+        "files_removed": pruned,
+        "seconds": round(time.perf_counter() - start, 2),
+    }
+
+
+def _store_results(asset_dir, charts, input_keys, results):
+    rendered = 0
+    for kind, subject, files in results:
+        if files is None:
+            continue
+        charts[kind][str(subject)] = {
+            "input": input_keys[(kind, subject)],
+            "files": {fmt: _store_object(asset_dir, data, fmt) for fmt, data in files.items()},
+        }
+        rendered += 1
+    return rendered
+
+
+class ChartAssetStore:
+    """Read side of the store; reloads the manifest when a build replaces it."""
+
+    def __init__(self, asset_dir=DEFAULT_ASSET_DIR):
+        self.asset_dir = asset_dir
+        self._manifest = None
+        self._manifest_mtime = None
+
+    def manifest(self):
+        path = os.path.join(self.asset_dir, MANIFEST_NAME)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            self._manifest = None
+            self._manifest_mtime = None
+            return None
+        if mtime != self._manifest_mtime:
+            self._manifest = _read_manifest(self.asset_dir)
+            self._manifest_mtime = mtime
+        return self._manifest
+
+    def get(self, kind, subject, fmt="png", df=None):
+        """
+        Stored chart bytes, or None on a miss. With df, a chart whose
+        input (chart_input_key: that theme's series or that year's rows)
+        differs in df counts as a miss.
+        """
+        manifest = self.manifest()
+        if manifest is None:
+            return None
+        entry = manifest["charts"].get(kind, {}).get(str(subject))
+        if entry is None or fmt not in entry["files"]:
+            return None
+        if df is not None and entry["input"] != chart_input_key(df, kind, subject):
+            return None
+        try:
+            with open(_object_path(self.asset_dir, entry["files"][fmt]), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+
+_default_store = None
+
+
+def get_chart_store():
+    """Process-wide store used by the app."""
+    global _default_store
+    if _default_store is None:
+        _default_store = ChartAssetStore()
+    return _default_store
+
+
+if __name__ == "__main__":
+    from .data_snapshot import DEFAULT_CSV_PATH, load_snapshot
+
+    parser = argparse.ArgumentParser(description="Pre-render all theme and year charts.")
+    parser.add_argument("--csv", default=DEFAULT_CSV_PATH, help="cleaned dataset CSV")
+    parser.add_argument("--asset-dir", default=DEFAULT_ASSET_DIR)
+    parser.add_argument("--formats", nargs="+", default=["png"], choices=FORMATS)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--force", action="store_true", help="redraw every chart")
+    args = parser.parse_args()
+
+    df = load_snapshot(args.csv)
+    stats = build_chart_assets(df, asset_dir=args.asset_dir, formats=args.formats,
+                               workers=args.workers, force=args.force)
+    for key, value in stats.items():
+        print(f"{key:>14}: {value}")
@@ -1,25 +1,114 @@
-import pandas as pd
-import sqlalchemy as sa
-import urllib
+import os
 
-def load_theme_year_stats():
+from .instrumentation import stage
+from .storage_backends import (
+    BACKENDS,
+    MSSQL_VIEW_NAME,
+    backend_name_for_url,
+    create_backend,
+)
+
+# kept for callers that import it from here
+VIEW_NAME = MSSQL_VIEW_NAME
+
+# one backend (and for SQL backends one connection pool) per process,
+# created on first use
+_backend = None
+
+
+def backend_settings_from_env():
+    """
+    Backend configuration from environment variables:
+    LEGO_BACKEND   : mssql | sqlite | duckdb | csv | parquet
+                     (default: taken from LEGO_DB_URL, else mssql)
+    LEGO_DB_URL    : SQLAlchemy URL for mssql / sqlite, or duckdb:///<path>
+    LEGO_DATA_PATH : database or export file for sqlite / duckdb / csv / parquet
+    LEGO_DB_VIEW   : view name, if it differs from the backend's default
+    """
+    url = os.environ.get("LEGO_DB_URL") or None
+    name = os.environ.get("LEGO_BACKEND")
+    if not name:
+        name = backend_name_for_url(url) if url else "mssql"
+    return {
+        "name": name,
+        "url": url,
+        "path": os.environ.get("LEGO_DATA_PATH") or None,
+        "view": os.environ.get("LEGO_DB_VIEW") or None,
+    }
+
+
+def configure_backend(name=None, url=None, path=None, view=None, **pool_settings):
     """
-    Connects to SQL Server and loads the LEGO theme-year view into a DataFrame.
+    (Re)create the shared backend, see storage_backends.create_backend().
+    Without arguments the configuration comes from the environment.
     """
+    global _backend
+    if _backend is not None:
+        _backend.close()
+        _backend = None
+
+    if name is None:
+        settings = backend_settings_from_env()
+        name = settings["name"]
+        url = url or settings["url"]
+        path = path or settings["path"]
+        view = view or settings["view"]
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend {name!r}, expected one of {BACKENDS}")
 
-    odbc_str = (
-        "DRIVER={ODBC Driver 17 for SQL Server};"
-        "SERVER=GUYIFAT\\GUYI;"
-        "DATABASE=LEGO;"
-        "Trusted_Connection=yes;"
-    )
+    _backend = create_backend(name, url=url, path=path, view=view, **pool_settings)
+    return _backend
 
-    params = urllib.parse.quote_plus(odbc_str)
-    engine = sa.create_engine(f"mssql+pyodbc:///?odbc_connect={params}")
 
-    query = "SELECT * FROM dbo.vw_theme_year_stats;"
-    df = pd.read_sql(query, engine)   # 👈 IMPORTANT: read_sql, not read
+def get_backend():
+    """The shared backend, configured from the environment on first use."""
+    if _backend is None:
+        configure_backend()
+    return _backend
+
+
+def configure_engine(url=None, **pool_settings):
+    """
+    (Re)create the shared backend from a SQLAlchemy URL
+    (default: LEGO_DB_URL or the SQL Server DSN) and return its engine.
+    """
+    if url is None:
+        url = backend_settings_from_env()["url"]
+    name = backend_name_for_url(url) if url else "mssql"
+    return configure_backend(name, url=url, **pool_settings).engine
+
+
+def get_engine():
+    """The SQLAlchemy engine of the shared backend (mssql / sqlite only)."""
+    backend = get_backend()
+    if not hasattr(backend, "engine"):
+        raise ValueError(f"The {backend.name} backend has no SQLAlchemy engine.")
+    return backend.engine
+
+
+def dispose_engine():
+    """Close the shared backend (e.g. before forking worker processes)."""
+    global _backend
+    if _backend is not None:
+        _backend.close()
+        _backend = None
+
+
+@stage
+def load_theme_year_stats(view=None):
+    """
+    Loads the LEGO theme-year view into a DataFrame from the configured
+    backend (SQL Server by default, see backend_settings_from_env()).
+    """
+    df = get_backend().load(view=view)
 
     return df
 
 
+def iter_theme_year_stats(chunksize=50_000, view=None):
+    """
+    Stream the view in typed chunks of at most `chunksize` rows,
+    so a large view never has to fit in memory as one raw frame.
+    Feed the chunks to data_preparation.prepare_data_chunks().
+    """
+    yield from get_backend().iter_chunks(chunksize=chunksize, view=view)
@@ -1,64 +1,176 @@
+import logging
+
+import numpy as np
 import pandas as pd
 
+from .derived_cache import get_derived, set_derived
+from .instrumentation import stage
+
+logger = logging.getLogger(__name__)
+
+
+# Compact schema of the prepared frame.
+# Counts fit comfortably in int32 and years in int16; percentages only
+# carry two decimals, so float32 is enough.
+SCHEMA = {
+    "year": "int16",
+    "theme": "category",
+    "num_sets": "int32",
+    "prev_num_sets": "int32",
+    "abs_change": "float32",
+    "pct_change": "float32",
+    "total_sets_year": "int32",
+    "pct_of_portfolio": "float32",
+    "is_new_theme_year": "bool",
+    "new_themes_launched": "int32",
+}
+
+# the cleaned CSV has no missing values, so it can be read straight
+# into the compact schema
+CSV_DTYPES = dict(SCHEMA)
+
+# vw_theme_year_stats returns NULL for prev_num_sets / abs_change /
+# pct_change in a theme's first year and for new_themes_launched in years
+# without launches, so those are read as nullable / float types
+SQL_DTYPES = {
+    "year": "int16",
+    "theme": "category",
+    "num_sets": "int32",
+    "prev_num_sets": "Int32",
+    "abs_change": "float32",
+    "pct_change": "float32",
+    "total_sets_year": "int32",
+    "pct_of_portfolio": "float32",
+    "is_new_theme_year": "int8",
+    "new_themes_launched": "Int32",
+}
+
+# when a column still has missing values, narrow to the nullable type
+_NULLABLE = {"int16": "Int16", "int32": "Int32", "bool": "boolean"}
+
+
+@stage
 def prepare_data(raw_df: pd.DataFrame) -> pd.DataFrame:
     """
     remove duplicates
     standardize dtypes
     fill missing values where needed
+    narrow columns to the compact SCHEMA
+    sort rows by year (so the YearIndex can slice the frame itself)
 
     growth, portfolio %, new themes already calculated in SQL in dbo.vw_theme_year_stats.
+
+    The pipeline does not deep-copy: it starts from a shallow copy and every
+    stage replaces whole columns (df[col] = ...) or selects rows into a new
+    frame, never writing into existing arrays. raw_df is therefore never
+    modified, and with copy-on-write (always on in pandas 3) column data
+    is only duplicated when a stage actually changes it.
     """
-    df = raw_df.copy()
+    df = raw_df.copy(deep=False)
     df = _drop_duplicates(df)
     df = _coerce_dtypes(df)
     df = _fill_missing(df)
+    df = _apply_schema(df)
+    df = _sort_by_year(df)
+    set_derived(df, "year_index", YearIndex(df))
+    # the ThemeYearCube (theme_cube.get_theme_cube) is built on the first
+    # per-theme lookup instead: it is a dense themes x years grid, several
+    # times larger than the frame, and not every caller needs it
     return df
 
 
+@stage
+def prepare_data_chunks(chunks) -> pd.DataFrame:
+    """
+    prepare_data for a stream of raw chunks, e.g. data_loader.iter_theme_year_stats().
+
+    Each chunk is deduplicated (against itself and every earlier chunk,
+    by row hash), coerced, filled and narrowed on its own, so only one
+    raw chunk is held in memory at a time; the compact prepared chunks
+    are combined at the end.
+    """
+    seen_hashes = np.empty(0, dtype="uint64")
+    removed = 0
+    prepared = []
+    for chunk in chunks:
+        df = chunk.copy(deep=False)
+        hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+        duplicated = pd.Series(hashes).duplicated().to_numpy() | np.isin(hashes, seen_hashes)
+        if duplicated.any():
+            removed += int(duplicated.sum())
+            df = df[~duplicated]
+            hashes = hashes[~duplicated]
+        seen_hashes = np.union1d(seen_hashes, hashes)
+
+        df = _coerce_dtypes(df)
+        df = _fill_missing(df)
+        df = _apply_schema(df)
+        prepared.append(df)
+
+    logger.info("Removed %d duplicate rows.", removed)
+
+    return combine_prepared(prepared)
+
+
+@stage
+def combine_prepared(frames) -> pd.DataFrame:
+    """
+    Concatenate frames that already went through the preparation steps
+    (prepared chunks, or a cached dataset plus freshly loaded years)
+    without repeating them.
+    """
+    frames = [frame for frame in frames if frame is not None]
+    if not frames:
+        return pd.DataFrame(columns=list(SCHEMA))
+
+    # frame categories differ, so theme comes back from concat as strings
+    # and is turned into one shared categorical by _apply_schema
+    df = pd.concat(frames, ignore_index=True)
+    df = _apply_schema(df)
+    df = _sort_by_year(df)
+    set_derived(df, "year_index", YearIndex(df))
+    return df
+
+
+@stage
 def _drop_duplicates(df: pd.DataFrame) -> pd.DataFrame:
-    before = len(df)
-    df = df.drop_duplicates().copy()
-    after = len(df)
-    removed = before - after
-    print(f"[data_preparation] Removed {removed} duplicate rows.")
+    duplicated = df.duplicated()
+    removed = int(duplicated.sum())
+    if removed:
+        df = df[~duplicated]
+    logger.info("Removed %d duplicate rows.", removed)
     return df
 
 
+@stage
 def _coerce_dtypes(df: pd.DataFrame) -> pd.DataFrame:
     """
     Standardize column types
+    (numbers only; narrowing to SCHEMA happens after missing values are filled)
     """
-    df = df.copy()
-
-    # Integers
-    for col in ["year", "num_sets", "prev_num_sets", "total_sets_year",
-                "new_themes_launched"]:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors="coerce").astype("Int64")
-
-    # Floats
-    for col in ["abs_change", "pct_change", "pct_of_portfolio"]:
-        if col in df.columns:
+    for col, dtype in SCHEMA.items():
+        if col not in df.columns or col == "theme":
+            continue
+        if not pd.api.types.is_numeric_dtype(df[col]):
             df[col] = pd.to_numeric(df[col], errors="coerce")
 
-    # Flags
-    if "is_new_theme_year" in df.columns:
-        df["is_new_theme_year"] = df["is_new_theme_year"].astype("Int64")
-
-    # Strings
-    if "theme" in df.columns:
-        df["theme"] = df["theme"].astype(str)
+    # Strings (categorical themes from CSV/SQL are kept as they are)
+    # (older pandas turns missing values into the text 'nan' with astype(str),
+    # so they are masked back to missing and filled with 'Unknown' later)
+    if "theme" in df.columns and not isinstance(df["theme"].dtype, pd.CategoricalDtype):
+        theme = df["theme"]
+        df["theme"] = theme.astype(str).where(theme.notna())
 
     return df
 
 
+@stage
 def _fill_missing(df: pd.DataFrame) -> pd.DataFrame:
     """
     numeric metrics → 0
     text → 'Unknown' if missing/empty
+    Columns without gaps are left untouched (no new array).
     """
-    df = df.copy()
-
     numeric_cols = []
     for col in [
         "num_sets",
@@ -73,79 +185,217 @@ def _fill_missing(df: pd.DataFrame) -> pd.DataFrame:
             numeric_cols.append(col)
 
     for col in numeric_cols:
-        df[col] = df[col].fillna(0)
+        if df[col].isna().any():
+            df[col] = df[col].fillna(0)
 
     if "theme" in df.columns:
-        df["theme"] = df["theme"].replace("", pd.NA)
-        df["theme"] = df["theme"].fillna("Unknown")
+        theme = df["theme"]
+        missing = theme.isna() | (theme == "")
+        if missing.any():
+            if isinstance(theme.dtype, pd.CategoricalDtype) and "Unknown" not in theme.cat.categories:
+                theme = theme.cat.add_categories("Unknown")
+            df["theme"] = theme.mask(missing, "Unknown")
 
     return df
 
+
+@stage
+def _apply_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Narrow every known column to its SCHEMA dtype.
+    Columns that already have the right dtype are left alone.
+    """
+    for col, dtype in SCHEMA.items():
+        if col not in df.columns:
+            continue
+        column = df[col]
+        if dtype == "category":
+            if isinstance(column.dtype, pd.CategoricalDtype):
+                if len(column.cat.categories) > column.nunique():
+                    df[col] = column.cat.remove_unused_categories()
+            else:
+                df[col] = column.astype("category")
+            continue
+        if column.dtype == dtype:
+            continue
+        if column.isna().any():
+            dtype = _NULLABLE.get(dtype, dtype)
+        df[col] = column.astype(dtype)
+    return df
+
+
+@stage
+def _sort_by_year(df: pd.DataFrame) -> pd.DataFrame:
+    """Stable sort on year; a frame that is already sorted is returned as is."""
+    if "year" not in df.columns or df["year"].is_monotonic_increasing:
+        return df
+    return df.sort_values("year", kind="stable", na_position="last")
+
+
+class YearIndex:
+    """
+    Rows sorted by year plus an offset array over the whole year span,
+    so a year (or year range) is one iloc slice instead of a boolean
+    mask over the full frame.
+
+    offsets[k] is the first row of year min_year + k,
+    offsets[k + 1] is one past its last row.
+
+    Frames from prepare_data are already sorted by year, so the index
+    shares their column data instead of holding a sorted copy.
+    """
+
+    def __init__(self, df):
+        years = pd.to_numeric(df["year"], errors="coerce").to_numpy(
+            dtype="float64", na_value=np.nan
+        )
+        valid_rows = np.flatnonzero(~np.isnan(years))
+        order = valid_rows[np.argsort(years[valid_rows], kind="stable")]
+
+        if len(valid_rows) == len(df) and np.all(np.diff(order) > 0):
+            # already sorted: new frame object over the same column data
+            # (holding df itself would keep it alive in the derived cache)
+            self.frame = df.copy(deep=False)
+        else:
+            self.frame = df.iloc[order]
+        sorted_years = years[order].astype("int64")
+
+        if len(sorted_years) == 0:
+            self.min_year = 0
+            self.max_year = -1
+            self.offsets = np.zeros(1, dtype="int64")
+            return
+
+        self.min_year = int(sorted_years[0])
+        self.max_year = int(sorted_years[-1])
+        span = np.arange(self.min_year, self.max_year + 2)
+        self.offsets = np.searchsorted(sorted_years, span, side="left")
+
+    def years(self):
+        """Sorted list of years that have at least one row."""
+        counts = np.diff(self.offsets)
+        return (np.flatnonzero(counts) + self.min_year).tolist()
+
+    def slice(self, year):
+        """All rows for one year (empty frame if the year has no data)."""
+        return self.range(year, year)
+
+    def range(self, first_year, last_year):
+        """All rows with first_year <= year <= last_year."""
+        first = max(int(first_year), self.min_year)
+        last = min(int(last_year), self.max_year)
+        if first > last:
+            return self.frame.iloc[0:0]
+        start = self.offsets[first - self.min_year]
+        stop = self.offsets[last - self.min_year + 1]
+        return self.frame.iloc[start:stop]
+
+
+def get_year_index(df):
+    """YearIndex for df (built by prepare_data, or lazily on first use)."""
+    return get_derived(df, "year_index", YearIndex)
+
+
+def _fingerprint(df):
+    hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    # order-independent sum of the row hashes, wraps around in uint64
+    return f"{len(df)}-{int(hashes.sum(dtype=np.uint64)):016x}"
+
+
+def get_data_fingerprint(df):
+    """
+    Short string that changes whenever the frame's content changes.
+    Computed once per frame; use it as a cache key for results derived from df.
+    """
+    return get_derived(df, "fingerprint", _fingerprint)
+
+
 def get_available_years(df):
     """Return sorted list of years."""
-    df_temp = df.copy()
-    df_temp["year"] = df_temp["year"].astype(int)
-    unique_years = df_temp["year"].unique()
-    unique_years_list = unique_years.tolist()
-    unique_years_list_sorted = sorted(unique_years_list)
-    return unique_years_list_sorted
+    return get_year_index(df).years()
 
 def get_year_slice(df: pd.DataFrame, year: int) -> pd.DataFrame:
     """Filter dataframe for a given year."""
-    matching_rows = []
-    for index, row in df.iterrows():
-            matching_rows.append(row)
-    df_result = pd.DataFrame(matching_rows)
-    return df_result
+    return get_year_index(df).slice(year)
 
 
 
-def get_new_themes_for_year(df, year):
+class YearTables:
     """
-    Return a table of themes that were launched in the given year.
+    The Year Explorer's tables for every year, built in one pass:
+
+    ranked[year]   : theme, num_sets, pct_of_portfolio of that year,
+                     one row per theme, most sets first
+    launches[year] : the same columns for themes launched that year
+                     (is_new_theme_year == 1), in theme order
+
+    Rows are deduplicated and sorted once for the whole frame (year
+    first), then cut into per-year frames at the year boundaries, so a
+    lookup is a dictionary access.
     """
-    df_year = df[df["year"] == year].copy()
 
-    if "is_new_theme_year" not in df_year.columns:
-        return pd.DataFrame()
+    def __init__(self, df):
+        frame = get_year_index(df).frame
+        self.columns = [
+            col for col in ("theme", "num_sets", "pct_of_portfolio") if col in frame.columns
+        ]
+        self.has_launches = "is_new_theme_year" in frame.columns
+        self.empty = frame[self.columns].iloc[0:0].reset_index(drop=True)
+
+        rows = frame[["year"] + self.columns]
+        if "theme" in self.columns:
+            rows = rows[~rows.duplicated(["year", "theme"])]
+        if "num_sets" in self.columns:
+            rows = rows.sort_values(["year", "num_sets"], ascending=[True, False],
+                                    kind="stable")
+        self.ranked = self._split_by_year(rows)
+
+        self.launches = {}
+        if self.has_launches:
+            launched = frame[frame["is_new_theme_year"] == 1][["year"] + self.columns]
+            if "theme" in self.columns:
+                launched = launched[~launched.duplicated(["year", "theme"])]
+                launched = launched.sort_values(["year", "theme"], kind="stable")
+            self.launches = self._split_by_year(launched)
+
+    def _split_by_year(self, rows):
+        years = rows["year"].to_numpy()
+        bounds = np.flatnonzero(np.diff(years)) + 1
+        starts = np.concatenate([[0], bounds])
+        stops = np.concatenate([bounds, [len(rows)]])
+        body = rows[self.columns]
+        tables = {}
+        for start, stop in zip(starts, stops):
+            if stop > start:
+                tables[int(years[start])] = body.iloc[start:stop].reset_index(drop=True)
+        return tables
+
+    def ranking(self, year):
+        table = self.ranked.get(int(year), self.empty)
+        # shallow copy: callers can add or replace columns without touching the cache
+        return table.copy(deep=False)
+
+    def launched(self, year):
+        if not self.has_launches:
+            return pd.DataFrame()
+        return self.launches.get(int(year), self.empty).copy(deep=False)
+
+
+def get_year_tables(df):
+    """YearTables for df, built on the first Year Explorer lookup."""
+    return get_derived(df, "year_tables", YearTables)
 
-    df_new_themes = df_year[df_year["is_new_theme_year"] == 1].copy()
-    columns_to_keep = []
-    if "theme" in df_new_themes.columns:
-        columns_to_keep.append("theme")
-    if "num_sets" in df_new_themes.columns:
-        columns_to_keep.append("num_sets")
-    if "pct_of_portfolio" in df_new_themes.columns:
-        columns_to_keep.append("pct_of_portfolio")
-    df_selected = df_new_themes[columns_to_keep].copy()
-    df_unique = df_selected.drop_duplicates(subset="theme").copy()
-    df_sorted = df_unique.sort_values(by="theme", ascending=True).copy()
-    df_final = df_sorted.reset_index(drop=True)
-    return df_final
+
+def get_new_themes_for_year(df, year):
+    """
+    Return a table of themes that were launched in the given year.
+    """
+    return get_year_tables(df).launched(year)
 
 
 def rank_themes_by_sets_in_year(df: pd.DataFrame, year: int):
     """Rank themes by number of sets in a given year."""
-    df_year = df[df["year"] == year].copy()
-
-    columns_to_keep = []
-    if "theme" in df_year.columns:
-        columns_to_keep.append("theme")
-    if "num_sets" in df_year.columns:
-        columns_to_keep.append("num_sets")
-    if "pct_of_portfolio" in df_year.columns:
-        columns_to_keep.append("pct_of_portfolio")
-
-    df_selected = df_year[columns_to_keep].copy()
-    df_unique = df_selected.drop_duplicates(subset="theme").copy()
-    df_sorted = df_unique.sort_values(
-        by="num_sets",
-        ascending=False
-    ).copy()
-
-    df_final = df_sorted.reset_index(drop=True)
-
-    return df_final
+    return get_year_tables(df).ranking(year)
 
 # ============================================================
 # Run this file directly to export a clean CSV for Power BI
@@ -0,0 +1,192 @@
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+import time
+
+import pandas as pd
+
+from .data_preparation import CSV_DTYPES
+from .instrumentation import stage
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CSV_PATH = "lego_theme_year_stats_clean.csv"
+
+# bump when the snapshot layout changes so old files get rebuilt
+# 2: compact dtypes (categorical theme, int16/int32, float32)
+SNAPSHOT_VERSION = 2
+
+
+def snapshot_paths(csv_path):
+    """
+    Return (parquet_path, meta_path) that sit next to the CSV.
+    lego_theme_year_stats_clean.csv ->
+        lego_theme_year_stats_clean.parquet
+        lego_theme_year_stats_clean.snapshot.json
+    """
+    base, _ = os.path.splitext(csv_path)
+    return base + ".parquet", base + ".snapshot.json"
+
+
+def _parquet_available():
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def _file_sha256(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _read_meta(meta_path):
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(meta_path, meta):
+    tmp_path = meta_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_path, meta_path)
+
+
+def _read_csv(csv_path):
+    """Read the CSV straight into the compact schema when it fits."""
+    try:
+        return pd.read_csv(csv_path, dtype=CSV_DTYPES)
+    except (ValueError, TypeError):
+        # e.g. missing values in an integer column: let pandas infer,
+        # prepare_data narrows the types afterwards
+        return pd.read_csv(csv_path)
+
+
+def build_snapshot(csv_path=DEFAULT_CSV_PATH):
+    """
+    Parse the CSV once and write it as a typed Parquet snapshot.
+    Returns the parsed DataFrame.
+    """
+    parquet_path, meta_path = snapshot_paths(csv_path)
+    stat = os.stat(csv_path)
+
+    df = _read_csv(csv_path)
+
+    # write to a temp file first so a crashed build never leaves
+    # a half-written snapshot behind
+    tmp_path = parquet_path + ".tmp"
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, parquet_path)
+
+    _write_meta(meta_path, {
+        "version": SNAPSHOT_VERSION,
+        "source": os.path.basename(csv_path),
+        "source_mtime_ns": stat.st_mtime_ns,
+        "source_size": stat.st_size,
+        "source_sha256": _file_sha256(csv_path),
+        "rows": len(df),
+    })
+    return df
+
+
+def _snapshot_is_fresh(csv_path, meta):
+    """
+    Same mtime + size  -> fresh, no need to hash the CSV.
+    Different mtime    -> hash the CSV; identical content is still fresh
+                          (e.g. after a git checkout touched the file).
+    """
+    parquet_path, meta_path = snapshot_paths(csv_path)
+    if meta is None or meta.get("version") != SNAPSHOT_VERSION:
+        return False
+    if not os.path.exists(parquet_path):
+        return False
+
+    stat = os.stat(csv_path)
+    if stat.st_size != meta.get("source_size"):
+        return False
+    if stat.st_mtime_ns == meta.get("source_mtime_ns"):
+        return True
+
+    if _file_sha256(csv_path) != meta.get("source_sha256"):
+        return False
+
+    meta["source_mtime_ns"] = stat.st_mtime_ns
+    try:
+        _write_meta(meta_path, meta)
+    except OSError:
+        pass
+    return True
+
+
+@stage
+def load_snapshot(csv_path=DEFAULT_CSV_PATH):
+    """
+    Load the cleaned dataset from its Parquet snapshot.
+    The snapshot is (re)built from the CSV when missing or stale.
+    Falls back to plain read_csv when pyarrow is not installed
+    or the snapshot cannot be read/written.
+    """
+    if not _parquet_available():
+        return _read_csv(csv_path)
+
+    parquet_path, meta_path = snapshot_paths(csv_path)
+    try:
+        if _snapshot_is_fresh(csv_path, _read_meta(meta_path)):
+            return pd.read_parquet(parquet_path)
+        return build_snapshot(csv_path)
+    except Exception as e:
+        logger.warning("Snapshot unavailable (%s), reading CSV instead.", e)
+        return _read_csv(csv_path)
+
+
+def benchmark_snapshot(csv_path=DEFAULT_CSV_PATH, scale=1000, repeat=3):
+    """
+    Compare cold CSV parsing against the Parquet snapshot on a dataset
+    `scale` times larger than the shipped CSV.
+    """
+    import tempfile
+
+    base_df = _read_csv(csv_path)
+    big_df = pd.concat([base_df] * scale, ignore_index=True)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        big_csv = os.path.join(tmp_dir, "bench.csv")
+        big_df.to_csv(big_csv, index=False)
+        del big_df
+        build_snapshot(big_csv)
+
+        def best_of(fn):
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                result = fn()
+                timings.append(time.perf_counter() - start)
+            return min(timings), result
+
+        csv_seconds, csv_df = best_of(lambda: _read_csv(big_csv))
+        snap_seconds, snap_df = best_of(lambda: load_snapshot(big_csv))
+
+        results = {
+            "rows": len(csv_df),
+            "csv_seconds": round(csv_seconds, 4),
+            "snapshot_seconds": round(snap_seconds, 4),
+            "speedup": round(csv_seconds / snap_seconds, 2),
+            "csv_file_mb": round(os.path.getsize(big_csv) / 1e6, 1),
+            "snapshot_file_mb": round(os.path.getsize(snapshot_paths(big_csv)[0]) / 1e6, 1),
+            "csv_frame_mb": round(csv_df.memory_usage(deep=True).sum() / 1e6, 1),
+            "snapshot_frame_mb": round(snap_df.memory_usage(deep=True).sum() / 1e6, 1),
+        }
+    return results
+
+
+if __name__ == "__main__":
+    for key, value in benchmark_snapshot().items():
+        print(f"{key:>20}: {value}")
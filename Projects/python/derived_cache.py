@@ -0,0 +1,52 @@
+import weakref
+
+# id(df) -> {name: derived object}
+# Entries are dropped automatically when the DataFrame is garbage collected,
+# so an id can never be reused for a stale entry.
+_DERIVED = {}
+
+
+def _entry_for(df):
+    key = id(df)
+    entry = _DERIVED.get(key)
+    if entry is None:
+        entry = {}
+        _DERIVED[key] = entry
+        weakref.finalize(df, _DERIVED.pop, key, None)
+    return entry
+
+
+def set_derived(df, name, value):
+    """
+    Attach a precomputed structure (index, lookup table, ...) to a frame.
+    The value must not hold a reference to `df` itself.
+    """
+    _entry_for(df)[name] = value
+    return value
+
+
+def get_derived(df, name, builder):
+    """
+    Return the structure attached to `df` under `name`,
+    building it with builder(df) on first use.
+
+    Derived structures assume the frame is treated as read-only
+    after it was prepared (which every analysis module does).
+    """
+    entry = _entry_for(df)
+    if name not in entry:
+        entry[name] = builder(df)
+    return entry[name]
+
+
+def clear_derived(df, keep=()):
+    """
+    Drop the structures attached to `df` (except the names in `keep`),
+    so the next lookup builds them again. Used by the benchmarks to time
+    first calls instead of cache hits.
+    """
+    entry = _DERIVED.get(id(df))
+    if entry is not None:
+        for name in list(entry):
+            if name not in keep:
+                del entry[name]
@@ -0,0 +1,304 @@
+import time
+from itertools import product
+
+import numpy as np
+import pandas as pd
+
+from .theme_cube import get_theme_cube
+
+FAST_ENGINES = ("linear", "holt")
+
+# Prophet's default interval_width is 0.8, use the same for comparability
+Z_80 = 1.2815515655446004
+
+# damped-trend Holt parameters tried for every theme
+HOLT_ALPHAS = np.array([0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9])
+HOLT_BETAS = np.array([0.05, 0.1, 0.2, 0.3])
+HOLT_PHIS = np.array([0.8, 0.9, 0.98])
+
+
+def _align(values, present, years):
+    """
+    Left-align every theme's observed years into a (themes x L) matrix.
+    Returns y, x (the year of each observation), mask and counts.
+    """
+    counts = present.sum(axis=1)
+    width = max(int(counts.max()) if len(counts) else 0, 1)
+    order = np.argsort(~present, axis=1, kind="stable")[:, :width]
+    mask = np.arange(width)[None, :] < counts[:, None]
+    y = np.where(mask, np.take_along_axis(values, order, axis=1), 0.0)
+    x = np.where(mask, years[order], 0).astype("float64")
+    return y, x, mask, counts
+
+
+def _fit_linear(y, x, mask, counts, periods):
+    """Least-squares trend line per row, with prediction intervals."""
+    n = np.maximum(counts, 1).astype("float64")
+    x_mean = (x * mask).sum(axis=1) / n
+    y_mean = (y * mask).sum(axis=1) / n
+    dx = np.where(mask, x - x_mean[:, None], 0.0)
+    dy = np.where(mask, y - y_mean[:, None], 0.0)
+    sxx = (dx ** 2).sum(axis=1)
+    sxy = (dx * dy).sum(axis=1)
+
+    slope = np.divide(sxy, sxx, out=np.zeros_like(sxy), where=sxx > 0)
+    intercept = y_mean - slope * x_mean
+
+    fitted = intercept[:, None] + slope[:, None] * x
+    residuals = np.where(mask, y - fitted, 0.0)
+    dof = np.maximum(counts - 2, 1)
+    sigma = np.sqrt((residuals ** 2).sum(axis=1) / dof)
+
+    last_year = x[np.arange(len(x)), np.maximum(counts - 1, 0)]
+    future_x = last_year[:, None] + np.arange(1, periods + 1)[None, :]
+    yhat = intercept[:, None] + slope[:, None] * future_x
+
+    def half_width(at_x):
+        leverage = np.divide(
+            (at_x - x_mean[:, None]) ** 2, sxx[:, None],
+            out=np.zeros_like(at_x), where=sxx[:, None] > 0,
+        )
+        return Z_80 * sigma[:, None] * np.sqrt(1 + 1 / n[:, None] + leverage)
+
+    return {
+        "fitted": fitted,
+        "fitted_half": half_width(x),
+        "yhat": yhat,
+        "yhat_half": half_width(future_x),
+        "last_year": last_year,
+    }
+
+
+def _run_holt(y, x, mask, counts, alpha, beta, phi, keep_fitted=False):
+    """
+    Additive damped-trend exponential smoothing over every row at once.
+    alpha/beta/phi broadcast against the (rows,) level/trend state,
+    so a (grid, 1) shape evaluates every parameter combination in one pass.
+    Positions past the end of a row (mask False) leave its state unchanged.
+
+    The state steps by calendar years (x), not by observations: across a
+    gap of g years the prediction is level + (phi + ... + phi^g) * trend,
+    the trend decays by phi^g and is updated with the per-year change.
+    A theme that was dormant for decades therefore starts again from its
+    level with almost no trend, instead of the gap counting as one year.
+    """
+    level = np.broadcast_to(y[:, 0], np.broadcast_shapes(np.shape(alpha), y[:, 0].shape)).copy()
+    second = min(1, y.shape[1] - 1)
+    first_gap = np.maximum(x[:, second] - x[:, 0], 1)
+    first_step = np.where(counts > 1, (y[:, second] - y[:, 0]) / first_gap, 0.0)
+    trend = np.broadcast_to(first_step, level.shape).copy()
+    sse = np.zeros(level.shape)
+    fitted = None
+    if keep_fitted:
+        fitted = np.zeros(level.shape + (y.shape[1],))
+        fitted[..., 0] = y[:, 0]
+
+    for t in range(1, y.shape[1]):
+        observed = mask[:, t]
+        gap = np.where(observed, x[:, t] - x[:, t - 1], 1.0)
+        decay = phi ** gap
+        # phi + phi^2 + ... + phi^gap (every phi in the grid is below 1)
+        damped = phi * (1 - decay) / (1 - phi)
+        prediction = level + damped * trend
+        if keep_fitted:
+            fitted[..., t] = prediction
+        new_level = alpha * y[:, t] + (1 - alpha) * prediction
+        new_trend = beta * (new_level - level) / gap + (1 - beta) * decay * trend
+        level = np.where(observed, new_level, level)
+        trend = np.where(observed, new_trend, trend)
+        if t >= 2:
+            # the first step was used to initialise the trend, don't score it
+            sse += np.where(observed, (y[:, t] - prediction) ** 2, 0.0)
+
+    return level, trend, sse, fitted
+
+
+def _fit_holt(y, x, mask, counts, periods):
+    """
+    Damped-trend Holt per row; parameters picked by one-step SSE.
+    Missing years are gaps in calendar time, see _run_holt.
+    """
+    grid = np.array(list(product(HOLT_ALPHAS, HOLT_BETAS, HOLT_PHIS)))
+    _, _, grid_sse, _ = _run_holt(
+        y, x, mask, counts,
+        grid[:, 0:1], grid[:, 1:2], grid[:, 2:3],
+    )
+    best = grid[np.argmin(grid_sse, axis=0)]
+    alpha, beta, phi = best[:, 0], best[:, 1], best[:, 2]
+
+    level, trend, sse, fitted = _run_holt(
+        y, x, mask, counts, alpha, beta, phi, keep_fitted=True,
+    )
+    dof = np.maximum(counts - 2, 1)
+    sigma = np.sqrt(sse / dof)
+
+    steps = np.arange(1, periods + 1)
+    # phi + phi^2 + ... + phi^h for every row and step
+    damped = np.cumsum(phi[:, None] ** steps[None, :], axis=1)
+    yhat = level[:, None] + damped * trend[:, None]
+
+    # ETS(A,Ad,N) forecast variance: sigma^2 * (1 + sum_{j<h} c_j^2)
+    c = alpha[:, None] * (1 + beta[:, None] * damped)
+    c_sq_before = np.concatenate(
+        [np.zeros((len(c), 1)), np.cumsum(c ** 2, axis=1)[:, :-1]], axis=1
+    )
+    yhat_half = Z_80 * sigma[:, None] * np.sqrt(1 + c_sq_before)
+
+    last_year = x[np.arange(len(x)), np.maximum(counts - 1, 0)]
+    return {
+        "fitted": fitted,
+        "fitted_half": np.broadcast_to(Z_80 * sigma[:, None], fitted.shape),
+        "yhat": yhat,
+        "yhat_half": yhat_half,
+        "last_year": last_year,
+    }
+
+
+def fit_predict(values, present, years, periods, engine="holt"):
+    """
+    Fit every row of a themes x years grid in one vectorised pass.
+    values  : float array (themes x years), e.g. ThemeYearCube.values["num_sets"]
+    present : bool array of the same shape, which cells are observed
+    years   : the calendar year of each column
+
+    Only observed years are used; a year a theme is absent from is a gap,
+    not a zero. Both engines work in calendar years: linear fits against
+    the year itself, holt steps its state by the years between
+    observations (see _run_holt), the same way Prophet sees the series.
+
+    Returns a dict of arrays: the aligned x / mask / counts of the input,
+    fitted (+ fitted_half), yhat (+ yhat_half) for the `periods` years
+    after each row's last observed year, and last_year.
+    """
+    if engine not in FAST_ENGINES:
+        raise ValueError(f"Unknown engine {engine!r}, expected one of {FAST_ENGINES}")
+
+    y, x, mask, counts = _align(values, present, years)
+    if engine == "linear":
+        result = _fit_linear(y, x, mask, counts, periods)
+    else:
+        result = _fit_holt(y, x, mask, counts, periods)
+    result.update({"x": x, "mask": mask, "counts": counts})
+    return result
+
+
+def _year_to_ds(years):
+    return pd.to_datetime(np.asarray(years, dtype="int64").astype(str), format="%Y")
+
+
+def forecast_many(df, themes=None, periods=5, engine="holt",
+                  include_history=False, min_points=1):
+    """
+    Forecast several themes (default: all) with a NumPy engine.
+    Returns a long-format DataFrame with columns
+    theme, ds, yhat, yhat_lower, yhat_upper.
+    """
+    cube = get_theme_cube(df)
+    if themes is None:
+        themes = cube.themes
+    codes = [cube.theme_code(theme) for theme in themes]
+    codes = np.array([code for code in codes if code is not None], dtype="int64")
+
+    present = cube.present[codes]
+    keep = present.sum(axis=1) >= max(min_points, 1)
+    codes, present = codes[keep], present[keep]
+    names = np.array(cube.themes, dtype=object)[codes]
+
+    if len(codes) == 0:
+        return pd.DataFrame(columns=["theme", "ds", "yhat", "yhat_lower", "yhat_upper"])
+
+    result = fit_predict(cube.values["num_sets"][codes], present, cube.years,
+                         periods, engine)
+
+    future_years = result["last_year"][:, None] + np.arange(1, periods + 1)[None, :]
+    future = pd.DataFrame({
+        "theme": np.repeat(names, periods),
+        "ds": _year_to_ds(future_years.ravel()),
+        "yhat": result["yhat"].ravel(),
+        "yhat_lower": (result["yhat"] - result["yhat_half"]).ravel(),
+        "yhat_upper": (result["yhat"] + result["yhat_half"]).ravel(),
+    })
+    if not include_history:
+        return future
+
+    mask = result["mask"]
+    fitted = result["fitted"][mask]
+    fitted_half = result["fitted_half"][mask]
+    history = pd.DataFrame({
+        "theme": np.repeat(names, result["counts"]),
+        "ds": _year_to_ds(result["x"][mask]),
+        "yhat": fitted,
+        "yhat_lower": fitted - fitted_half,
+        "yhat_upper": fitted + fitted_half,
+    })
+    combined = pd.concat([history, future], ignore_index=True)
+    combined = combined.sort_values(["theme", "ds"], kind="stable")
+    return combined.reset_index(drop=True)
+
+
+def compare_engines(df, holdout=3, min_train=5, engines=("linear", "holt", "prophet")):
+    """
+    Hold out each theme's last `holdout` years, forecast them from the
+    rest, and report accuracy + fit time per engine.
+    Only themes with at least min_train observations before the holdout
+    window are scored.
+    """
+    cube = get_theme_cube(df)
+    values = cube.values["num_sets"]
+
+    last_col = len(cube.years) - 1 - np.argmax(cube.present[:, ::-1], axis=1)
+    cutoff_year = cube.years[last_col] - holdout
+    train = cube.present & (cube.years[None, :] <= cutoff_year[:, None])
+    test = cube.present & (cube.years[None, :] > cutoff_year[:, None])
+    scored = (train.sum(axis=1) >= min_train) & test.any(axis=1)
+
+    rows = np.flatnonzero(scored)
+    train, test = train[rows], test[rows]
+    values = values[rows]
+
+    rows_out = []
+    for engine in engines:
+        start = time.perf_counter()
+        predictions = np.full(values.shape, np.nan)
+        if engine in FAST_ENGINES:
+            # forecast far enough ahead to reach every held-out year
+            y, x, mask, counts = _align(values, train, cube.years)
+            last_train = x[np.arange(len(x)), counts - 1].astype("int64")
+            periods = int((cube.years[-1] - last_train).max())
+            result = fit_predict(values, train, cube.years, periods, engine)
+            for i in range(len(rows)):
+                test_years = cube.years[test[i]]
+                steps = test_years - last_train[i] - 1
+                predictions[i, test[i]] = result["yhat"][i, steps]
+        elif engine == "prophet":
+            from .theme_forecasting import _predict_prophet_at_years
+            for i in range(len(rows)):
+                predictions[i, test[i]] = _predict_prophet_at_years(
+                    cube.years[train[i]], values[i, train[i]], cube.years[test[i]]
+                )
+        else:
+            raise ValueError(f"Unknown engine {engine!r}")
+        elapsed = time.perf_counter() - start
+
+        actual = values[test]
+        predicted = predictions[test]
+        errors = np.abs(predicted - actual)
+        rows_out.append({
+            "engine": engine,
+            "themes": len(rows),
+            "mae": errors.mean(),
+            "mape": 100 * (errors / np.abs(actual)).mean(),
+            "seconds": elapsed,
+            "ms_per_theme": 1000 * elapsed / max(len(rows), 1),
+        })
+    return pd.DataFrame(rows_out)
+
+
+if __name__ == "__main__":
+    import logging
+
+    from .data_snapshot import load_snapshot
+
+    logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+    comparison = compare_engines(load_snapshot())
+    print(comparison.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
@@ -0,0 +1,129 @@
+import hashlib
+import json
+import os
+import pickle
+import threading
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CACHE_DIR = os.environ.get("LEGO_FORECAST_CACHE_DIR", ".forecast_cache")
+DEFAULT_MAX_ENTRIES = 500
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def series_hash(years, values):
+    """Content hash of one theme's input series (years + values)."""
+    digest = hashlib.sha256()
+    digest.update(np.asarray(years, dtype="int64").tobytes())
+    digest.update(np.asarray(values, dtype="float64").tobytes())
+    return digest.hexdigest()
+
+
+def make_key(theme, periods, years, values, config):
+    """
+    Cache key for one forecast:
+    (theme, horizon, hash of the input series, model config).
+    config must be JSON-serialisable.
+    """
+    payload = json.dumps(
+        {
+            "theme": str(theme),
+            "periods": int(periods),
+            "series": series_hash(years, values),
+            "config": config,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ForecastCache:
+    """
+    On-disk DataFrame cache with LRU eviction.
+
+    One pickle file per key. A hit touches the file, so the file mtime
+    is the last-used time; when the cache grows past max_entries or
+    max_bytes the least recently used files are removed first.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR,
+                 max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+
+    def get(self, key):
+        """Cached DataFrame for key, or None on a miss."""
+        path = self._path(key)
+        try:
+            frame = pd.read_pickle(path)
+        except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return frame
+
+    def put(self, key, frame):
+        """Store frame under key, then evict down to the size caps."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(key)
+        # unique per writer: backtest processes and forecast threads share the directory
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        frame.to_pickle(tmp_path)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def clear(self):
+        for entry in self._entries():
+            _remove_quietly(entry[0])
+
+    def _entries(self):
+        """[(path, mtime, size)] for every cached file."""
+        entries = []
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return entries
+        for name in names:
+            if not name.endswith(".pkl"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((path, stat.st_mtime_ns, stat.st_size))
+        return entries
+
+    def _evict(self):
+        entries = sorted(self._entries(), key=lambda entry: entry[1])
+        total_bytes = sum(entry[2] for entry in entries)
+        while entries and (len(entries) > self.max_entries
+                           or total_bytes > self.max_bytes):
+            path, _, size = entries.pop(0)
+            _remove_quietly(path)
+            total_bytes -= size
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+_default_cache = None
+
+
+def get_forecast_cache():
+    """Process-wide cache used by forecast_theme."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ForecastCache()
+    return _default_cache
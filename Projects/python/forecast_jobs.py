@@ -0,0 +1,213 @@
+"""
+In-process job queue for forecasts, so a web request never waits on a
+Prophet fit.
+
+    queue = get_forecast_queue()
+    job_id = queue.submit(("City", 5, "prophet"), forecast_fn, df, "City")
+    job = queue.get(job_id)        # poll: job.status, job.result, job.error
+
+- a fixed pool of worker threads takes jobs from a bounded queue;
+  submit raises QueueFullError when max_queued jobs are already waiting
+- the job id is derived from the key, and an identical key that is still
+  queued or running (or finished successfully) returns the existing job
+  instead of starting another fit
+- a job running longer than `timeout` seconds is reported as "timeout";
+  cancel() drops a queued job before it starts
+- a running fit cannot be interrupted from another thread: after a
+  timeout or cancel its result is discarded when it arrives, and the
+  worker thread stays busy until then
+
+Threads are enough here: Prophet fits run in a CmdStan subprocess and the
+NumPy engines release the GIL for their array work.
+"""
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_WORKERS = int(os.environ.get("LEGO_FORECAST_WORKERS", "2"))
+DEFAULT_MAX_QUEUED = 32
+DEFAULT_TIMEOUT = 120.0
+DEFAULT_KEEP_FINISHED = 256
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+TIMEOUT = "timeout"
+
+FINISHED = (DONE, FAILED, CANCELLED, TIMEOUT)
+
+
+class QueueFullError(RuntimeError):
+    """Raised by submit when max_queued jobs are already waiting."""
+
+
+class ForecastJob:
+    """State of one submitted job; read it through ForecastJobQueue.get."""
+
+    def __init__(self, job_id, key, fn, args, kwargs):
+        self.job_id = job_id
+        self.key = key
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.submitted = time.monotonic()
+        self.started = None
+        self.finished = None
+        self._done = threading.Event()
+
+    @property
+    def seconds(self):
+        """Run time so far (or in total once finished), 0 while queued."""
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.monotonic()) - self.started
+
+    def _finish(self, status):
+        self.status = status
+        self.finished = time.monotonic()
+        # drop the inputs (the frame), the job object may be kept for a while
+        self.fn = self.args = self.kwargs = None
+        self._done.set()
+
+
+def job_id_for(key):
+    """Stable id of a job key (any JSON-serialisable value)."""
+    payload = json.dumps(key, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class ForecastJobQueue:
+    """Worker threads + bounded queue + job table (see the module docstring)."""
+
+    def __init__(self, workers=DEFAULT_WORKERS, max_queued=DEFAULT_MAX_QUEUED,
+                 timeout=DEFAULT_TIMEOUT, keep_finished=DEFAULT_KEEP_FINISHED):
+        self.timeout = timeout
+        self.keep_finished = keep_finished
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads = []
+        for number in range(max(workers, 1)):
+            thread = threading.Thread(target=self._work, name=f"forecast-worker-{number}",
+                                      daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, key, fn, *args, **kwargs):
+        """
+        Queue fn(*args, **kwargs) under `key` and return the job id.
+        An identical key that is queued, running or done is not run again.
+        """
+        job_id = job_id_for(key)
+        with self._lock:
+            self._check_timeout(job_id)
+            existing = self._jobs.get(job_id)
+            if existing is not None and existing.status in (QUEUED, RUNNING, DONE):
+                self._jobs.move_to_end(job_id)
+                return job_id
+
+            job = ForecastJob(job_id, key, fn, args, kwargs)
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                raise QueueFullError(
+                    f"{self._queue.maxsize} forecasts are already waiting, try again shortly"
+                ) from None
+            self._jobs[job_id] = job
+            self._prune()
+        return job_id
+
+    def get(self, job_id):
+        """The job (with an up-to-date status), or None for an unknown id."""
+        with self._lock:
+            self._check_timeout(job_id)
+            return self._jobs.get(job_id)
+
+    def wait(self, job_id, timeout=None):
+        """Block until the job finished or `timeout` seconds passed; returns the job."""
+        job = self.get(job_id)
+        if job is not None:
+            job._done.wait(timeout)
+        return self.get(job_id)
+
+    def cancel(self, job_id):
+        """
+        Cancel a queued or running job. Returns True if its status changed.
+        A running fit keeps its worker busy until it ends, but its result
+        is discarded.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status in FINISHED:
+                return False
+            job._finish(CANCELLED)
+            return True
+
+    def stats(self):
+        """Number of jobs per status, plus the current queue length."""
+        with self._lock:
+            for job_id in list(self._jobs):
+                self._check_timeout(job_id)
+            counts = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+        counts["waiting"] = self._queue.qsize()
+        return counts
+
+    def _check_timeout(self, job_id):
+        # called with the lock held
+        job = self._jobs.get(job_id)
+        if job is not None and job.status == RUNNING and job.seconds > self.timeout:
+            job.error = f"timed out after {self.timeout:g}s"
+            job._finish(TIMEOUT)
+
+    def _prune(self):
+        # called with the lock held; oldest finished jobs go first
+        finished = [job_id for job_id, job in self._jobs.items() if job.status in FINISHED]
+        for job_id in finished[:max(len(finished) - self.keep_finished, 0)]:
+            del self._jobs[job_id]
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            with self._lock:
+                if job.status != QUEUED:
+                    # cancelled while it was waiting
+                    continue
+                job.status = RUNNING
+                job.started = time.monotonic()
+                fn, args, kwargs = job.fn, job.args, job.kwargs
+
+            try:
+                result, error, status = fn(*args, **kwargs), None, DONE
+            except Exception as exc:
+                result, error, status = None, f"{type(exc).__name__}: {exc}", FAILED
+
+            with self._lock:
+                self._check_timeout(job.job_id)
+                if job.status == RUNNING:
+                    job.result = result
+                    job.error = error
+                    job._finish(status)
+
+
+_default_queue = None
+_default_queue_lock = threading.Lock()
+
+
+def get_forecast_queue():
+    """Process-wide queue shared by every app session."""
+    global _default_queue
+    with _default_queue_lock:
+        if _default_queue is None:
+            _default_queue = ForecastJobQueue()
+    return _default_queue
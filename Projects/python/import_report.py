@@ -0,0 +1,126 @@
+"""
+Import-time report for the Projects.python modules (every module in the
+package directory, see package_modules).
+
+Every module is imported in a fresh interpreter with `python -X importtime`,
+so the numbers are real cold-start costs. Run from the repo root:
+
+    python -m Projects.python.import_report
+    python -m Projects.python.import_report --budget-ms 800 --check-lazy
+
+--budget-ms  : fail if any module takes longer than this to import
+--check-lazy : fail if importing any module pulls in one of HEAVY_MODULES
+The exit code is 1 when a check fails, so the command can gate CI.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+import pandas as pd
+
+PACKAGE = "Projects.python"
+
+# scripts that do their work at import time (test_file connects to the database)
+SCRIPTS = ("test_file",)
+
+
+def package_modules():
+    """Every module of the package directory, except SCRIPTS."""
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    names = sorted(
+        name[:-3] for name in os.listdir(package_dir)
+        if name.endswith(".py") and name != "__init__.py" and name[:-3] not in SCRIPTS
+    )
+    return [f"{PACKAGE}.{name}" for name in names]
+
+
+MODULES = package_modules()
+
+# only loaded on first use, never at import time
+HEAVY_MODULES = ("prophet", "matplotlib", "sqlalchemy")
+
+
+def _parse_importtime(stderr):
+    """[(name, self_us, cumulative_us, depth)] from -X importtime output."""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # header line
+        raw_name = parts[2]
+        name = raw_name.strip()
+        depth = (len(raw_name) - len(raw_name.lstrip()) - 1) // 2
+        entries.append((name, int(parts[0]), int(parts[1]), depth))
+    return entries
+
+
+def measure_import(module):
+    """
+    Import `module` in a fresh interpreter.
+    Returns (cumulative milliseconds, sorted list of heavy modules it loaded).
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{completed.stderr[-2000:]}")
+
+    entries = _parse_importtime(completed.stderr)
+    # top-level entries for the module and its parent packages
+    total_us = sum(
+        cumulative for name, _, cumulative, depth in entries
+        if depth == 0 and (module == name or module.startswith(name + "."))
+    )
+    heavy = sorted({
+        name.split(".")[0] for name, _, _, _ in entries
+        if name.split(".")[0] in HEAVY_MODULES
+    })
+    return total_us / 1000, heavy
+
+
+def import_report(modules=MODULES):
+    """DataFrame with one row per module: import_ms, heavy_imports."""
+    rows = []
+    for module in modules:
+        import_ms, heavy = measure_import(module)
+        rows.append({
+            "module": module,
+            "import_ms": round(import_ms, 1),
+            "heavy_imports": ", ".join(heavy),
+        })
+    report = pd.DataFrame(rows)
+    return report.sort_values("import_ms", ascending=False).reset_index(drop=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-module import-time report.")
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="fail if a module takes longer than this to import")
+    parser.add_argument("--check-lazy", action="store_true",
+                        help="fail if a module imports prophet/matplotlib/sqlalchemy")
+    args = parser.parse_args(argv)
+
+    report = import_report()
+    print(report.to_string(index=False))
+
+    failed = False
+    if args.budget_ms is not None:
+        over = report[report["import_ms"] > args.budget_ms]
+        for module in over["module"]:
+            print(f"[import_report] {module} is over the {args.budget_ms:.0f} ms budget.")
+        failed = failed or not over.empty
+    if args.check_lazy:
+        eager = report[report["heavy_imports"] != ""]
+        for _, row in eager.iterrows():
+            print(f"[import_report] {row['module']} imports {row['heavy_imports']} at import time.")
+        failed = failed or not eager.empty
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+"""
+Incremental refresh of vw_theme_year_stats.
+
+The prepared dataset is kept in a local Parquet snapshot together with a
+watermark: the max year loaded, when the last full load ran, and for
+every year a fingerprint computed by the database.
+
+A refresh asks the database for one small aggregate row per year,
+compares it with the watermark, and only pulls the years that are new
+or changed. Because the view's LAG / totals columns are part of the
+fingerprint, a change that ripples into the next year (prev_num_sets)
+or into every theme of a year (pct_of_portfolio) marks those years too.
+
+The fingerprint includes a digest of every row where the database can
+compute one (SQL Server, DuckDB; see ROW_DIGESTS). Elsewhere (SQLite) it
+only has per-column sums and counts, so an edit that keeps every sum,
+e.g. two themes swapping their num_sets, goes unnoticed; for those
+dialects the full view is reloaded once the last full load is older
+than full_reload_days.
+
+    df = refresh_theme_year_stats()
+"""
+import json
+import logging
+import os
+import time
+
+import pandas as pd
+
+from .data_loader import get_backend, iter_theme_year_stats
+from .data_preparation import SQL_DTYPES, combine_prepared, prepare_data, prepare_data_chunks
+
+DEFAULT_CACHE_DIR = os.environ.get("LEGO_CACHE_DIR", ".lego_cache")
+
+DEFAULT_FULL_RELOAD_DAYS = float(os.environ.get("LEGO_FULL_RELOAD_DAYS", "7"))
+
+WATERMARK_VERSION = 2
+
+# dialect -> aggregate over the hash of every row of a year
+ROW_DIGESTS = {
+    "mssql": "CHECKSUM_AGG(BINARY_CHECKSUM(*))",
+    "duckdb": (
+        "SUM(hash(theme, num_sets, prev_num_sets, abs_change, pct_change, total_sets_year, "
+        "pct_of_portfolio, is_new_theme_year, new_themes_launched))"
+    ),
+}
+
+logger = logging.getLogger(__name__)
+
+
+def _paths(cache_dir):
+    return (
+        os.path.join(cache_dir, "theme_year_stats.parquet"),
+        os.path.join(cache_dir, "theme_year_stats.watermark.json"),
+    )
+
+
+def _fingerprint_query(view, dialect_name):
+    """One aggregate row per year; any change to a year's rows changes it."""
+    columns = [
+        "COUNT(*) AS n_rows",
+        "COUNT(DISTINCT theme) AS n_themes",
+        "MIN(theme) AS first_theme",
+        "MAX(theme) AS last_theme",
+        "SUM(num_sets) AS sum_sets",
+        "SUM(COALESCE(prev_num_sets, 0)) AS sum_prev",
+        "SUM(COALESCE(pct_change, 0)) AS sum_pct_change",
+        "SUM(total_sets_year) AS sum_total",
+        "SUM(pct_of_portfolio) AS sum_share",
+        "SUM(is_new_theme_year) AS sum_new",
+        "MAX(COALESCE(new_themes_launched, 0)) AS new_launched",
+    ]
+    if dialect_name in ROW_DIGESTS:
+        columns.append(f"{ROW_DIGESTS[dialect_name]} AS row_digest")
+    return f"SELECT year, {', '.join(columns)} FROM {view} GROUP BY year;"
+
+
+def fetch_year_fingerprints(view):
+    """{year: fingerprint string} straight from the database."""
+    backend = get_backend()
+    summary = backend.read_sql(_fingerprint_query(view, backend.dialect))
+
+    fingerprints = {}
+    for row in summary.itertuples(index=False):
+        values = []
+        for value in row[1:]:
+            if isinstance(value, float):
+                value = round(value, 4)
+            values.append(str(value))
+        fingerprints[int(row[0])] = "|".join(values)
+    return fingerprints
+
+
+def _load_local(cache_dir):
+    parquet_path, watermark_path = _paths(cache_dir)
+    try:
+        with open(watermark_path, "r", encoding="utf-8") as f:
+            watermark = json.load(f)
+        if watermark.get("version") != WATERMARK_VERSION:
+            return None, None
+        df = pd.read_parquet(parquet_path)
+    except (OSError, ValueError):
+        return None, None
+    return df, watermark
+
+
+def _save_local(cache_dir, df, watermark):
+    os.makedirs(cache_dir, exist_ok=True)
+    parquet_path, watermark_path = _paths(cache_dir)
+
+    tmp_path = parquet_path + ".tmp"
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, parquet_path)
+
+    tmp_path = watermark_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(watermark, f, indent=2)
+    os.replace(tmp_path, watermark_path)
+
+
+def _make_watermark(view, fingerprints, full_load_at):
+    return {
+        "version": WATERMARK_VERSION,
+        "view": view,
+        "max_year": max(fingerprints) if fingerprints else None,
+        "full_load_at": full_load_at,
+        "years": {str(year): {"fingerprint": fingerprint}
+                  for year, fingerprint in fingerprints.items()},
+    }
+
+
+def _fetch_years(view, years):
+    year_list = ", ".join(str(int(year)) for year in sorted(years))
+    query = f"SELECT * FROM {view} WHERE year IN ({year_list});"
+    return get_backend().read_sql(query, dtype=SQL_DTYPES)
+
+
+def _full_reload_reason(local_df, watermark, view, dialect, full_reload_days):
+    """Why the whole view has to be loaded again, or None."""
+    if local_df is None:
+        return "no local snapshot"
+    if watermark.get("view") != view:
+        return f"the view changed to {view}"
+    if dialect not in ROW_DIGESTS and full_reload_days is not None:
+        age_days = (time.time() - watermark["full_load_at"]) / 86400
+        if age_days > full_reload_days:
+            return (f"the {dialect} fingerprint has no row digest and the last full "
+                    f"load is {age_days:.1f} days old")
+    return None
+
+
+def refresh_theme_year_stats(view=None, cache_dir=DEFAULT_CACHE_DIR,
+                             chunksize=50_000, full_reload_days=DEFAULT_FULL_RELOAD_DAYS):
+    """
+    Return the prepared theme-year dataset, pulling from the database
+    only the years that changed since the last refresh.
+    Works with the SQL backends (mssql, sqlite, duckdb) of data_loader;
+    view defaults to the backend's view.
+    The first call (or a call after the view name changed) does a full,
+    chunked load and writes the snapshot + watermark.
+    full_reload_days : on dialects without a row digest (see the module
+                       docstring), load the full view again once the last
+                       full load is older than this; None never does
+    """
+    backend = get_backend()
+    if view is None:
+        view = backend.view
+    fingerprints = fetch_year_fingerprints(view)
+    local_df, watermark = _load_local(cache_dir)
+
+    reason = _full_reload_reason(local_df, watermark, view, backend.dialect, full_reload_days)
+    if reason is not None:
+        logger.info("Loading the full view (%s).", reason)
+        df = prepare_data_chunks(iter_theme_year_stats(chunksize=chunksize, view=view))
+        _save_local(cache_dir, df, _make_watermark(view, fingerprints, time.time()))
+        return df
+
+    known = watermark["years"]
+    changed_years = []
+    for year, fingerprint in fingerprints.items():
+        entry = known.get(str(year))
+        if entry is None or entry["fingerprint"] != fingerprint:
+            changed_years.append(year)
+    removed_years = [int(year) for year in known if int(year) not in fingerprints]
+
+    if not changed_years and not removed_years:
+        logger.info("Snapshot is up to date.")
+        return combine_prepared([local_df])
+
+    delta = None
+    if changed_years:
+        delta = prepare_data(_fetch_years(view, changed_years))
+
+    stale_years = set(changed_years) | set(removed_years)
+    kept = local_df[~local_df["year"].isin(stale_years)]
+    df = combine_prepared([kept, delta])
+
+    new_years = [year for year in changed_years if str(year) not in known]
+    logger.info(
+        "Reloaded %d year(s) (%d new), dropped %d; fetched %d rows.",
+        len(changed_years), len(new_years), len(removed_years),
+        0 if delta is None else len(delta),
+    )
+
+    _save_local(cache_dir, df, _make_watermark(view, fingerprints, watermark["full_load_at"]))
+    return df
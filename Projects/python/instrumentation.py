@@ -0,0 +1,195 @@
+"""
+Stage timing for the load -> clean -> chart -> forecast pipeline.
+
+    from .instrumentation import stage
+
+    @stage
+    def prepare_data(raw_df): ...
+
+Every call of a decorated function adds one record to the in-process
+REGISTRY: stage name, wall time, rows in / rows out (for DataFrame
+arguments and results), the enclosing stage and, when memory tracking
+is on, the peak memory allocated during the call. Stages nest, so
+prepare_data's sub-steps show up under it.
+
+Memory tracking uses tracemalloc, which slows Python down noticeably, so
+it is off unless LEGO_TRACE_MEMORY=1 is set or enable_memory_tracking()
+is called. The tracemalloc peak is never reset by a stage: a stage
+records the peak above its starting memory when it sets a new high-water
+mark, otherwise (it stayed below a peak reached earlier, e.g. by a larger
+sibling stage) only its net memory growth.
+
+    REGISTRY.summary()          # one row per stage
+    REGISTRY.to_json("metrics.json")
+
+Each finished stage is also logged at DEBUG level on the
+"Projects.python.pipeline" logger.
+"""
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+import pandas as pd
+
+logger = logging.getLogger("Projects.python.pipeline")
+
+_local = threading.local()
+
+
+class MetricsRegistry:
+    """Thread-safe store of the most recent stage records."""
+
+    def __init__(self, max_records=10_000):
+        self._records = deque(maxlen=max_records)
+        self._lock = threading.Lock()
+
+    def record(self, entry):
+        with self._lock:
+            self._records.append(entry)
+
+    def records(self):
+        with self._lock:
+            return list(self._records)
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+
+    def summary(self):
+        """
+        One row per stage: calls, errors, total / mean / max seconds,
+        rows of the last call and the largest peak memory seen.
+        """
+        records = self.records()
+        columns = ["stage", "calls", "errors", "total_seconds", "mean_seconds",
+                   "max_seconds", "last_rows_in", "last_rows_out", "max_peak_mb"]
+        if not records:
+            return pd.DataFrame(columns=columns)
+
+        df = pd.DataFrame(records)
+        grouped = df.groupby("stage", sort=False)
+        summary = pd.DataFrame({
+            "calls": grouped.size(),
+            "errors": grouped["error"].count(),
+            "total_seconds": grouped["seconds"].sum(),
+            "mean_seconds": grouped["seconds"].mean(),
+            "max_seconds": grouped["seconds"].max(),
+            "last_rows_in": grouped["rows_in"].last().astype("Int64"),
+            "last_rows_out": grouped["rows_out"].last().astype("Int64"),
+            "max_peak_mb": grouped["peak_bytes"].max() / 1e6,
+        })
+        summary = summary.sort_values("total_seconds", ascending=False)
+        return summary.reset_index()[columns]
+
+    def to_json(self, path=None):
+        """All records as JSON; written to `path` when given, else returned."""
+        text = json.dumps({"records": self.records()}, indent=2, default=str)
+        if path is None:
+            return text
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        return path
+
+
+REGISTRY = MetricsRegistry()
+
+
+def enable_memory_tracking():
+    """Start tracemalloc so stages also record their peak memory."""
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def _rows(value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return len(value)
+    return None
+
+
+def _rows_in(args, kwargs):
+    for value in list(args) + list(kwargs.values()):
+        rows = _rows(value)
+        if rows is not None:
+            return rows
+    return None
+
+
+def _stack():
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+def stage(fn=None, *, name=None):
+    """
+    Decorator that records every call of `fn` in REGISTRY.
+    The stage name defaults to "<module>.<function>".
+    Use as @stage or @stage(name="...").
+    """
+    if fn is None:
+        return functools.partial(stage, name=name)
+
+    stage_name = name or f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__name__}"
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        stack = _stack()
+        parent = stack[-1] if stack else None
+        tracing = tracemalloc.is_tracing()
+
+        frame = {"name": stage_name}
+        if tracing:
+            # the global peak is never reset, so an outer measurement (another
+            # stage, or a caller of tracemalloc) keeps its own peak
+            frame["start_bytes"], frame["outer_peak"] = tracemalloc.get_traced_memory()
+        stack.append(frame)
+
+        error = None
+        result = None
+        start = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+            return result
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+            stack.pop()
+
+            peak_bytes = None
+            if tracing and tracemalloc.is_tracing():
+                current, peak = tracemalloc.get_traced_memory()
+                if peak > frame["outer_peak"]:
+                    # a new high-water mark was reached during this stage
+                    peak_bytes = peak - frame["start_bytes"]
+                else:
+                    # the stage stayed below an earlier peak; only its net growth is known
+                    peak_bytes = max(current - frame["start_bytes"], 0)
+
+            entry = {
+                "stage": stage_name,
+                "parent": parent["name"] if parent is not None else None,
+                "started": time.time() - seconds,
+                "seconds": seconds,
+                "rows_in": _rows_in(args, kwargs),
+                "rows_out": _rows(result),
+                "peak_bytes": peak_bytes,
+                "error": error,
+            }
+            REGISTRY.record(entry)
+            logger.debug(
+                "[%s] %.1f ms, rows %s -> %s",
+                stage_name, seconds * 1000, entry["rows_in"], entry["rows_out"],
+            )
+
+    return wrapper
+
+
+if os.environ.get("LEGO_TRACE_MEMORY") == "1":
+    enable_memory_tracking()
@@ -1,11 +1,20 @@
+import logging
+import os
+
 import pandas as pd
 from .data_loader import load_theme_year_stats
 from .data_preparation import prepare_data
 from .year_explorer_cool_function import run_year_explorer
-from .theme_visual_interaction import show_theme_trend_charts, show_year_bar_chart
+from .theme_visual_interaction import (
+    show_theme_comparison_chart,
+    show_theme_trend_charts,
+    show_year_bar_chart,
+)
 from .theme_forecasting_interaction import run_forecast_interaction
 from .theme_duration_interaction import run_theme_duration_interaction
+from .instrumentation import REGISTRY
 
+logger = logging.getLogger(__name__)
 
 
 def main():
@@ -17,20 +26,32 @@ def main():
     """
 
     df = load_theme_year_stats()
-    print("Loaded data successfully! Preview:")
-    print(df.head())
+    logger.info("Loaded %d rows.", len(df))
+    logger.debug("Preview:\n%s", df.head())
 
     df_clean = prepare_data(df)
-    print(f"Rows after cleaning: {len(df_clean)}")
-    print("Columns:", df_clean.columns.tolist())
+    logger.info("Rows after cleaning: %d", len(df_clean))
+    logger.debug("Columns: %s", df_clean.columns.tolist())
 
     show_theme_trend_charts(df_clean)
+    show_theme_comparison_chart(df_clean)
     show_year_bar_chart(df_clean)
     run_forecast_interaction(df_clean)
     run_year_explorer(df_clean)
     run_theme_duration_interaction(df_clean)
 
+    logger.info("Stage timings:\n%s", REGISTRY.summary().to_string(index=False))
+    metrics_path = os.environ.get("LEGO_METRICS_PATH")
+    if metrics_path:
+        REGISTRY.to_json(metrics_path)
+        logger.info("Stage metrics written to %s", metrics_path)
+
 
 if __name__ == "__main__":
+    # LEGO_LOG_LEVEL=DEBUG also shows the data preview and every stage call
+    logging.basicConfig(
+        level=os.environ.get("LEGO_LOG_LEVEL", "INFO"),
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
     main()
 
@@ -0,0 +1,144 @@
+"""
+Fitted Prophet models on disk, so a forecast does not have to refit.
+
+Models are serialised with prophet.serialize.model_to_json and stored as
+
+    <store_dir>/<hash of theme + model config>/<hash of the training series>.json
+
+- the same theme with the same training data -> load the stored model
+  and only run predict (any horizon)
+- the same theme with changed data (e.g. one new year) -> fit again, but
+  start Stan from the newest stored model's parameters (warm start)
+  instead of Prophet's default initial values
+
+The newest `keep_per_theme` models of every theme are kept. Recently
+used models also stay deserialised in memory.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from .forecast_cache import series_hash
+
+DEFAULT_MODEL_DIR = os.environ.get("LEGO_MODEL_DIR", ".model_store")
+DEFAULT_KEEP_PER_THEME = 3
+DEFAULT_MEMORY_ENTRIES = 64
+
+
+def warm_start_params(model):
+    """
+    Fitted parameters of a Prophet model in the form fit(init=...) takes.
+    Prophet falls back to its own initial value for any vector whose
+    length changed (e.g. more changepoints after a new year of data).
+    """
+    params = {}
+    for name in ("k", "m", "sigma_obs"):
+        params[name] = float(model.params[name][0][0])
+    for name in ("delta", "beta"):
+        params[name] = model.params[name][0]
+    return params
+
+
+class ModelStore:
+    """Prophet models keyed by (theme, model config, training series)."""
+
+    def __init__(self, store_dir=DEFAULT_MODEL_DIR, keep_per_theme=DEFAULT_KEEP_PER_THEME,
+                 memory_entries=DEFAULT_MEMORY_ENTRIES):
+        self.store_dir = store_dir
+        self.keep_per_theme = keep_per_theme
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()
+        # forecasts may run on several worker threads (forecast_jobs.py)
+        self._lock = threading.Lock()
+
+    def _theme_dir(self, theme, config):
+        payload = json.dumps({"theme": str(theme), "config": config}, sort_keys=True)
+        return os.path.join(self.store_dir, hashlib.sha256(payload.encode("utf-8")).hexdigest())
+
+    def _remember(self, path, model):
+        with self._lock:
+            self._memory[path] = model
+            self._memory.move_to_end(path)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _read(self, path):
+        with self._lock:
+            model = self._memory.get(path)
+            if model is not None:
+                self._memory.move_to_end(path)
+                return model
+        from prophet.serialize import model_from_json
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                model = model_from_json(f.read())
+        except (OSError, ValueError):
+            return None
+        self._remember(path, model)
+        return model
+
+    def _stored_paths(self, theme_dir):
+        """Model files of one theme, newest first."""
+        try:
+            names = [name for name in os.listdir(theme_dir) if name.endswith(".json")]
+        except OSError:
+            return []
+        stamped = []
+        for name in names:
+            path = os.path.join(theme_dir, name)
+            try:
+                stamped.append((os.stat(path).st_mtime_ns, path))
+            except OSError:
+                # removed by another thread in the meantime
+                continue
+        return [path for _, path in sorted(stamped, reverse=True)]
+
+    def get(self, theme, years, values, config):
+        """The model fitted on exactly this series, or None."""
+        path = os.path.join(self._theme_dir(theme, config), f"{series_hash(years, values)}.json")
+        if not os.path.exists(path):
+            return None
+        return self._read(path)
+
+    def latest(self, theme, config):
+        """The most recently stored model of the theme (for a warm start), or None."""
+        for path in self._stored_paths(self._theme_dir(theme, config)):
+            model = self._read(path)
+            if model is not None:
+                return model
+        return None
+
+    def put(self, theme, years, values, config, model):
+        """Store a fitted model, then drop the theme's oldest models."""
+        from prophet.serialize import model_to_json
+
+        theme_dir = self._theme_dir(theme, config)
+        os.makedirs(theme_dir, exist_ok=True)
+        path = os.path.join(theme_dir, f"{series_hash(years, values)}.json")
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(model_to_json(model))
+        os.replace(tmp_path, path)
+        self._remember(path, model)
+
+        for old_path in self._stored_paths(theme_dir)[self.keep_per_theme:]:
+            with self._lock:
+                self._memory.pop(old_path, None)
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
+
+
+_default_store = None
+
+
+def get_model_store():
+    """Process-wide store used by forecast_theme."""
+    global _default_store
+    if _default_store is None:
+        _default_store = ModelStore()
+    return _default_store
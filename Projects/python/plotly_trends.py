@@ -0,0 +1,177 @@
+"""
+Plotly versions of the theme_trends charts, for the browser.
+
+matplotlib draws a raster on the server, and a year with 100+ themes
+becomes a wide, unreadable bar chart. These figures send only the plotted
+numbers to the browser (NumPy arrays are serialised as compact typed
+arrays) and render there:
+
+- line charts switch to WebGL (Scattergl) once a series has more than
+  WEBGL_THRESHOLD points
+- the per-year bar chart shows the top_n themes and folds the rest into
+  one "Others" bar, so its size stays bounded however many themes a
+  year has
+
+Every function returns a plotly Figure, or None when there is no data.
+"""
+# plotly is imported inside the functions, like matplotlib in theme_trends
+import logging
+
+import numpy as np
+import pandas as pd
+
+from .data_preparation import get_year_slice
+from .instrumentation import stage
+from .theme_cube import get_theme_cube
+
+logger = logging.getLogger(__name__)
+
+WEBGL_THRESHOLD = 1000
+DEFAULT_TOP_N = 25
+OTHERS_LABEL = "Others"
+
+
+def _line_figure(x, y, title, y_title):
+    import plotly.graph_objects as go
+
+    trace_type = go.Scattergl if len(x) > WEBGL_THRESHOLD else go.Scatter
+    fig = go.Figure(trace_type(x=np.asarray(x), y=np.asarray(y), mode="lines+markers"))
+    fig.update_layout(
+        title=title,
+        xaxis_title="Year",
+        yaxis_title=y_title,
+        margin={"l": 40, "r": 20, "t": 50, "b": 40},
+    )
+    return fig
+
+
+@stage
+def theme_trend_plotly(df, theme):
+    """Number of sets released per year for a given theme."""
+    series = get_theme_cube(df).series(theme, "num_sets")
+
+    if series is None:
+        logger.warning("No data found for theme: %s", theme)
+        return None
+
+    years, num_sets = series
+    return _line_figure(years, num_sets, f"Number of Sets Released per Year – {theme}",
+                        "Number of Sets Released")
+
+
+@stage
+def portfolio_share_plotly(df, theme):
+    """Portfolio share (%) per year for a given theme."""
+    cube = get_theme_cube(df)
+
+    if cube.theme_code(theme) is None:
+        logger.warning("No data found for theme: %s", theme)
+        return None
+
+    if "pct_of_portfolio" not in cube.values:
+        logger.warning("Column 'pct_of_portfolio' is missing.")
+        return None
+
+    years, shares = cube.series(theme, "pct_of_portfolio")
+    return _line_figure(years, shares, f"Portfolio Share per Year – {theme}",
+                        "Portfolio Share (%)")
+
+
+@stage
+def theme_comparison_plotly(df, themes):
+    """
+    Sets per year (top) and portfolio share (bottom) of several themes on
+    shared year axes, one line per theme. Clicking a theme in the legend
+    hides it in both panels. All series come from one cube gather.
+    """
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
+    cube = get_theme_cube(df)
+    gathered = cube.gather(themes, "num_sets")
+
+    if gathered is None:
+        logger.warning("No data found for themes: %s", list(themes))
+        return None
+
+    found, years, num_sets = gathered
+    panels = [(num_sets, "Number of Sets Released")]
+    if "pct_of_portfolio" in cube.values:
+        panels.append((cube.gather(found, "pct_of_portfolio")[2], "Portfolio Share (%)"))
+
+    trace_type = go.Scattergl if num_sets.size > WEBGL_THRESHOLD else go.Scatter
+    fig = make_subplots(rows=len(panels), cols=1, shared_xaxes=True, vertical_spacing=0.06)
+    for panel, (grid, y_title) in enumerate(panels, start=1):
+        for theme, values in zip(found, grid):
+            fig.add_trace(
+                trace_type(x=years, y=values, mode="lines+markers", name=theme,
+                           legendgroup=theme, showlegend=panel == 1),
+                row=panel, col=1,
+            )
+        fig.update_yaxes(title_text=y_title, row=panel, col=1)
+
+    fig.update_xaxes(title_text="Year", row=len(panels), col=1)
+    fig.update_layout(
+        title=f"Theme Comparison – {len(found)} themes",
+        height=350 * len(panels),
+        margin={"l": 40, "r": 20, "t": 50, "b": 40},
+    )
+    return fig
+
+
+def top_n_with_others(year_rows, top_n=DEFAULT_TOP_N):
+    """
+    (theme, num_sets) of one year, largest first, cut to the top_n
+    themes plus one "Others" row with the sum of the rest.
+    top_n=None keeps every theme.
+    """
+    rows = year_rows[["theme", "num_sets"]].drop_duplicates(subset="theme")
+    if top_n is None or len(rows) <= top_n:
+        rows = rows.sort_values("num_sets", ascending=False)
+        return pd.DataFrame({"theme": rows["theme"].astype(str).to_numpy(),
+                             "num_sets": rows["num_sets"].to_numpy()})
+
+    top = rows.nlargest(top_n, "num_sets")
+    rest = rows["num_sets"].sum() - top["num_sets"].sum()
+    others_count = len(rows) - top_n
+    return pd.DataFrame({
+        "theme": np.append(top["theme"].astype(str).to_numpy(),
+                           f"{OTHERS_LABEL} ({others_count} themes)"),
+        "num_sets": np.append(top["num_sets"].to_numpy(), rest),
+    })
+
+
+@stage
+def sets_per_theme_plotly(df, year, top_n=DEFAULT_TOP_N):
+    """
+    Horizontal bar chart of sets per theme in a given year, top_n themes
+    plus an "Others" bar (top_n=None draws every theme).
+    """
+    import plotly.graph_objects as go
+
+    year_rows = get_year_slice(df, year)
+
+    if year_rows.empty:
+        logger.warning("No data found for year: %s", year)
+        return None
+
+    if "theme" not in year_rows.columns or "num_sets" not in year_rows.columns:
+        logger.warning("Required columns are missing.")
+        return None
+
+    bars = top_n_with_others(year_rows, top_n)
+
+    fig = go.Figure(go.Bar(
+        x=bars["num_sets"].to_numpy(),
+        y=bars["theme"].to_numpy(),
+        orientation="h",
+    ))
+    fig.update_layout(
+        title=f"Number of Sets per Theme in {year}",
+        xaxis_title="Number of Sets",
+        # largest bar on top; about 22px per bar keeps labels readable
+        yaxis={"autorange": "reversed", "automargin": True},
+        height=max(300, 22 * len(bars) + 100),
+        margin={"l": 40, "r": 20, "t": 50, "b": 40},
+    )
+    return fig
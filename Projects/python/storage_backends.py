@@ -0,0 +1,290 @@
+"""
+Storage backends for the theme-year dataset.
+
+    mssql    SQL Server through SQLAlchemy + pyodbc (the original setup)
+    sqlite   SQLite file through SQLAlchemy
+    duckdb   DuckDB file (optional dependency: pip install duckdb)
+    csv      a CSV export of the view
+    parquet  a Parquet export of the view
+
+Every backend offers load(), iter_chunks() and create_view_from_raw();
+`view` is ignored by the file backends, the file is the view.
+The SQL backends also offer read_sql(), used by the incremental refresh;
+the file backends raise ValueError there.
+data_loader picks the backend from configuration; to build a local
+stand-in from the raw Rebrickable exports:
+
+    python -m Projects.python.storage_backends duckdb lego.duckdb sets.csv themes.csv
+"""
+import argparse
+import os
+import urllib.parse
+
+import pandas as pd
+
+from .data_preparation import SQL_DTYPES
+
+BACKENDS = ("mssql", "sqlite", "duckdb", "csv", "parquet")
+SQL_BACKENDS = ("mssql", "sqlite", "duckdb")
+
+LOCAL_VIEW_NAME = "vw_theme_year_stats"
+MSSQL_VIEW_NAME = "dbo.vw_theme_year_stats"
+
+ODBC_STR = (
+    "DRIVER={ODBC Driver 17 for SQL Server};"
+    "SERVER=GUYIFAT\\GUYI;"
+    "DATABASE=LEGO;"
+    "Trusted_Connection=yes;"
+)
+
+# connection pool defaults for the SQLAlchemy backends
+POOL_SETTINGS = {
+    "pool_size": 5,
+    "max_overflow": 5,
+    "pool_recycle": 1800,   # seconds; SQL Server drops idle connections
+    "pool_pre_ping": True,  # test a pooled connection before handing it out
+}
+
+PORTABLE_VIEW_SQL = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "SQL", "vw_theme_year_stats_portable.sql"
+)
+
+
+def mssql_url():
+    params = urllib.parse.quote_plus(ODBC_STR)
+    return f"mssql+pyodbc:///?odbc_connect={params}"
+
+
+def _portable_view_statements():
+    with open(PORTABLE_VIEW_SQL, "r", encoding="utf-8") as f:
+        script = f.read()
+    return [statement.strip() for statement in script.split(";") if statement.strip()]
+
+
+def _apply_dtypes(df, dtypes):
+    """Cast the columns that are present; keep inferred types if a cast fails."""
+    for col, dtype in dtypes.items():
+        if col in df.columns:
+            try:
+                df[col] = df[col].astype(dtype)
+            except (ValueError, TypeError):
+                pass
+    return df
+
+
+class SqlAlchemyBackend:
+    """SQL Server or SQLite through one pooled SQLAlchemy engine."""
+
+    def __init__(self, name, url, view, **pool_settings):
+        # imported here: sqlalchemy is only needed when we actually hit the database
+        import sqlalchemy as sa
+
+        self.name = name
+        self.view = view
+        url = sa.engine.make_url(url)
+        settings = dict(POOL_SETTINGS)
+        settings.update(pool_settings)
+        if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+            # an in-memory SQLite database lives in a single connection,
+            # a QueuePool would hand out empty databases
+            settings = {}
+        self.engine = sa.create_engine(url, **settings)
+        self.dialect = self.engine.dialect.name
+
+    def read_sql(self, query, dtype=None):
+        # cast after reading, like the other backends: a NULL in an int
+        # column keeps its inferred type instead of failing the whole load
+        return _apply_dtypes(pd.read_sql(query, self.engine), dtype or {})
+
+    def load(self, view=None):
+        return self.read_sql(f"SELECT * FROM {view or self.view};", dtype=SQL_DTYPES)
+
+    def iter_chunks(self, chunksize=50_000, view=None):
+        query = f"SELECT * FROM {view or self.view};"
+        with self.engine.connect() as connection:
+            connection = connection.execution_options(stream_results=True)
+            for chunk in pd.read_sql(query, connection, chunksize=chunksize):
+                yield _apply_dtypes(chunk, SQL_DTYPES)
+
+    def create_view_from_raw(self, sets, themes):
+        """Write the raw tables and create the portable view on top of them."""
+        if self.dialect == "mssql":
+            raise ValueError("Use Projects/SQL/LEGO_THEME_SET.sql to create the SQL Server view.")
+        sets.to_sql("sets", self.engine, index=False, if_exists="replace")
+        themes.to_sql("themes", self.engine, index=False, if_exists="replace")
+        with self.engine.begin() as connection:
+            for statement in _portable_view_statements():
+                connection.exec_driver_sql(statement)
+
+    def close(self):
+        self.engine.dispose()
+
+
+class DuckDbBackend:
+    """Embedded DuckDB database file (fast local columnar scans)."""
+
+    def __init__(self, path, view=LOCAL_VIEW_NAME):
+        try:
+            import duckdb
+        except ImportError as e:
+            raise ImportError("The duckdb backend needs the duckdb package: pip install duckdb") from e
+
+        self.name = "duckdb"
+        self.dialect = "duckdb"
+        self.path = path
+        self.view = view
+        self.connection = duckdb.connect(path)
+
+    def read_sql(self, query, dtype=None):
+        df = self.connection.execute(query).df()
+        return _apply_dtypes(df, dtype or {})
+
+    def load(self, view=None):
+        return self.read_sql(f"SELECT * FROM {view or self.view};", dtype=SQL_DTYPES)
+
+    def iter_chunks(self, chunksize=50_000, view=None):
+        # DuckDB hands out results in vectors of 2048 rows
+        vectors = max(1, chunksize // 2048)
+        result = self.connection.execute(f"SELECT * FROM {view or self.view};")
+        while True:
+            chunk = result.fetch_df_chunk(vectors)
+            if chunk.empty:
+                break
+            yield _apply_dtypes(chunk, SQL_DTYPES)
+
+    def create_view_from_raw(self, sets, themes):
+        self.connection.register("sets_df", sets)
+        self.connection.register("themes_df", themes)
+        self.connection.execute("CREATE OR REPLACE TABLE sets AS SELECT * FROM sets_df")
+        self.connection.execute("CREATE OR REPLACE TABLE themes AS SELECT * FROM themes_df")
+        self.connection.unregister("sets_df")
+        self.connection.unregister("themes_df")
+        for statement in _portable_view_statements():
+            self.connection.execute(statement)
+
+    def close(self):
+        self.connection.close()
+
+
+class FileBackend:
+    """A CSV or Parquet export of the view."""
+
+    def __init__(self, name, path):
+        self.name = name
+        self.dialect = name
+        self.path = path
+        self.view = os.path.basename(path)
+
+    def read_sql(self, query, dtype=None):
+        raise ValueError(
+            f"The {self.name} backend has no read_sql(): a file export cannot run SQL "
+            f"queries (and so cannot do an incremental refresh). Use load(), or one of "
+            f"the SQL backends {SQL_BACKENDS}."
+        )
+
+    def load(self, view=None):
+        if self.name == "parquet":
+            return pd.read_parquet(self.path)
+        try:
+            return pd.read_csv(self.path, dtype=SQL_DTYPES)
+        except (ValueError, TypeError):
+            return pd.read_csv(self.path)
+
+    def iter_chunks(self, chunksize=50_000, view=None):
+        if self.name == "parquet":
+            import pyarrow.parquet as pq
+
+            for batch in pq.ParquetFile(self.path).iter_batches(batch_size=chunksize):
+                yield batch.to_pandas()
+            return
+        for chunk in pd.read_csv(self.path, chunksize=chunksize):
+            yield _apply_dtypes(chunk, SQL_DTYPES)
+
+    def create_view_from_raw(self, sets, themes):
+        """Compute the view in pandas (view_metrics) and write the file."""
+        from .view_metrics import compute_theme_year_stats
+
+        stats = compute_theme_year_stats(sets, themes)
+        if self.name == "parquet":
+            stats.to_parquet(self.path, index=False)
+        else:
+            stats.to_csv(self.path, index=False)
+
+    def close(self):
+        pass
+
+
+def create_backend(name, url=None, path=None, view=None, **pool_settings):
+    """
+    Build a backend by name.
+    mssql   : url (default: the SQL Server DSN above)
+    sqlite  : url, or path to the database file
+    duckdb  : path, or a duckdb:///<path> url (default: in-memory)
+    csv / parquet : path to the exported view (a url is rejected)
+    """
+    if name == "mssql":
+        return SqlAlchemyBackend(name, url or mssql_url(), view or MSSQL_VIEW_NAME,
+                                 **pool_settings)
+    if name == "sqlite":
+        if url is None:
+            url = f"sqlite:///{path}" if path else "sqlite://"
+        return SqlAlchemyBackend(name, url, view or LOCAL_VIEW_NAME, **pool_settings)
+    if name == "duckdb":
+        if url is not None:
+            url_path = duckdb_path_from_url(url)
+            if path and path != url_path:
+                raise ValueError(f"The duckdb url {url!r} and path {path!r} disagree, give one.")
+            path = url_path
+        return DuckDbBackend(path or ":memory:", view or LOCAL_VIEW_NAME)
+    if name in ("csv", "parquet"):
+        if url is not None:
+            raise ValueError(f"The {name} backend reads a file and takes no url "
+                             f"(got {url!r}); set its path instead.")
+        if not path:
+            raise ValueError(f"The {name} backend needs a file path.")
+        return FileBackend(name, path)
+    raise ValueError(f"Unknown backend {name!r}, expected one of {BACKENDS}")
+
+
+def backend_name_for_url(url):
+    """mssql / sqlite / ... from a SQLAlchemy URL."""
+    return url.split(":", 1)[0].split("+", 1)[0]
+
+
+def duckdb_path_from_url(url):
+    """
+    Database file of a duckdb:///<path> url (duckdb:////abs/path for an
+    absolute path); duckdb:// and duckdb:///:memory: are in-memory.
+    """
+    scheme, sep, rest = url.partition("://")
+    if not sep or scheme.split("+", 1)[0] != "duckdb":
+        raise ValueError(f"Not a duckdb url: {url!r}")
+    path = rest[1:] if rest.startswith("/") else rest
+    path = path.split("?", 1)[0]
+    return path or ":memory:"
+
+
+def build_local_database(name, path, sets_csv, themes_csv):
+    """Create a local stand-in database from the raw sets/themes CSV exports."""
+    from .view_metrics import read_raw_csv
+
+    sets, themes = read_raw_csv(sets_csv, themes_csv)
+    backend = create_backend(name, path=path)
+    try:
+        backend.create_view_from_raw(sets, themes)
+        rows = len(backend.load())
+    finally:
+        backend.close()
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a local theme-year database.")
+    parser.add_argument("backend", choices=["sqlite", "duckdb", "csv", "parquet"])
+    parser.add_argument("path", help="database / output file")
+    parser.add_argument("sets_csv")
+    parser.add_argument("themes_csv")
+    args = parser.parse_args()
+
+    rows = build_local_database(args.backend, args.path, args.sets_csv, args.themes_csv)
+    print(f"Created {args.path} ({args.backend}): vw_theme_year_stats has {rows} rows.")
@@ -0,0 +1,338 @@
+"""
+Streamlit versions of the console interactions
+(theme_visual_interaction, theme_forecasting_interaction,
+theme_duration_interaction): widgets instead of input(), and charts
+rendered from the figure builders in theme_trends / theme_forecasting
+instead of plt.show().
+
+Rendered charts are cached with st.cache_data per
+(data fingerprint, theme / year, options). The frame is passed as `_df`
+so Streamlit does not hash it on every rerun; the fingerprint in the key
+makes sure a changed dataset never hits an old entry. Going back to a
+previously selected theme or year is a cache hit and draws nothing.
+
+Trend, share and year bar charts are first looked up in the pre-rendered
+asset store (chart_assets.py) and only drawn live when it has no chart
+for this dataset. With interactive=True they are drawn in the browser
+with Plotly instead (plotly_trends.py); those figures only carry the
+plotted numbers and are cheap to build, so they are not cached.
+
+Forecasts run on the shared background queue (forecast_jobs.py): the
+view submits a job and a fragment polls it, so a slow Prophet fit never
+blocks the session, and identical requests from several sessions share
+one fit. Finished jobs are kept, so going back to a forecast is instant.
+"""
+import streamlit as st
+
+from .chart_assets import get_chart_store
+from .data_preparation import get_available_years, get_data_fingerprint
+from .forecast_jobs import (
+    CANCELLED,
+    DONE,
+    QUEUED,
+    RUNNING,
+    QueueFullError,
+    get_forecast_queue,
+    job_id_for,
+)
+from .theme_cube import get_theme_cube
+from .theme_duration import LIFESPAN_METRICS, find_longest_running_themes, top_themes
+from .plotly_trends import (
+    DEFAULT_TOP_N,
+    portfolio_share_plotly,
+    sets_per_theme_plotly,
+    theme_comparison_plotly,
+    theme_trend_plotly,
+)
+from .theme_forecasting import ENGINES, forecast_figure, forecast_theme
+from .theme_search import get_theme_index
+from .theme_trends import (
+    figure_to_png,
+    portfolio_share_figure,
+    sets_per_theme_figure,
+    theme_comparison_figure,
+    theme_trend_figure,
+)
+
+MAX_COMPARE_THEMES = 20
+
+# a fast forecast is shown in the same run instead of after the first poll
+FORECAST_WAIT_SECONDS = 0.3
+FORECAST_POLL_SECONDS = 0.5
+
+
+def _png_or_none(fig):
+    if fig is None:
+        return None
+    return figure_to_png(fig)
+
+
+def _stored_or_live_png(df, fingerprint, kind, subject, figure_fn):
+    png = get_chart_store().get(kind, subject, "png", df=df)
+    if png is None:
+        png = _png_or_none(figure_fn(df, subject))
+    return png
+
+
+@st.cache_data(show_spinner=False, max_entries=512)
+def _theme_trend_png(_df, fingerprint, theme):
+    return _stored_or_live_png(_df, fingerprint, "trend", theme, theme_trend_figure)
+
+
+@st.cache_data(show_spinner=False, max_entries=512)
+def _portfolio_share_png(_df, fingerprint, theme):
+    return _stored_or_live_png(_df, fingerprint, "share", theme, portfolio_share_figure)
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def _sets_per_theme_png(_df, fingerprint, year):
+    return _stored_or_live_png(_df, fingerprint, "year_bar", year, sets_per_theme_figure)
+
+
+@st.cache_data(show_spinner=False, max_entries=128)
+def _theme_comparison_png(_df, fingerprint, themes):
+    return _png_or_none(theme_comparison_figure(_df, list(themes)))
+
+
+def _forecast_job(df, theme, periods, engine):
+    """Runs on a forecast worker thread: (forecast, chart PNG), or None."""
+    forecast = forecast_theme(df, theme, periods=periods, engine=engine, plot=False)
+    if forecast is None:
+        return None
+    years, num_sets = get_theme_cube(df).series(theme, "num_sets")
+    return forecast, figure_to_png(forecast_figure(years, num_sets, forecast, theme))
+
+
+@st.fragment(run_every=FORECAST_POLL_SECONDS)
+def _poll_forecast_job(job_id):
+    """
+    Status of a pending forecast job. Only this fragment reruns while the
+    job is pending; once it finished the whole view reruns to show it.
+    """
+    queue = get_forecast_queue()
+    job = queue.get(job_id)
+    if job is None or job.status not in (QUEUED, RUNNING):
+        st.rerun()
+
+    if job.status == QUEUED:
+        st.info("Waiting for a free forecast worker…")
+    else:
+        st.info(f"Fitting forecast… ({job.seconds:.0f}s)")
+    if st.button("Cancel forecast", key="forecast_cancel"):
+        queue.cancel(job_id)
+        st.rerun()
+
+
+def _select_theme(df, label, key):
+    """
+    Search box + selectbox. Typing narrows the options to prefix matches,
+    then close (typo-tolerant) matches, from the shared theme index.
+    """
+    index = get_theme_index(df)
+    if not len(index):
+        st.info("No themes available in the data.")
+        return None
+
+    query = st.text_input("Search themes:", key=f"{key}_search",
+                          placeholder="Type a theme name, typos are fine")
+    options = index.complete(query, limit=50) if query.strip() else index.names
+    if not options:
+        st.info(f"No theme matches '{query}'.")
+        return None
+    return st.selectbox(label, options, key=key)
+
+
+def show_theme_trends_view(df, interactive=False):
+    """
+    Select a theme and show:
+    -Number of sets per year for that theme
+    -Portfolio share per year for that theme
+    interactive : draw with Plotly in the browser instead of matplotlib
+    """
+    fingerprint = get_data_fingerprint(df)
+    theme = _select_theme(df, "Select a theme:", key="trends_theme")
+    if theme is None:
+        return
+
+    col1, col2 = st.columns(2)
+    if interactive:
+        trend_fig = theme_trend_plotly(df, theme)
+        share_fig = portfolio_share_plotly(df, theme)
+        with col1:
+            if trend_fig is None:
+                st.info(f"No data found for theme: {theme}")
+            else:
+                st.plotly_chart(trend_fig)
+        with col2:
+            if share_fig is not None:
+                st.plotly_chart(share_fig)
+        return
+
+    with col1:
+        png = _theme_trend_png(df, fingerprint, theme)
+        if png is None:
+            st.info(f"No data found for theme: {theme}")
+        else:
+            st.image(png)
+    with col2:
+        png = _portfolio_share_png(df, fingerprint, theme)
+        if png is not None:
+            st.image(png)
+
+
+def show_year_bar_view(df, interactive=False):
+    """
+    Select a year and show a bar chart of sets per theme in that year.
+    interactive : Plotly bar chart of the top N themes plus an "Others" bar
+    """
+    years = get_available_years(df)
+    if not years:
+        st.info("No years available in the data.")
+        return
+
+    fingerprint = get_data_fingerprint(df)
+    year = st.slider(
+        "Select a year for the bar chart:",
+        min_value=int(years[0]),
+        max_value=int(years[-1]),
+        value=int(years[-1]),
+        step=1,
+        key="bar_chart_year",
+    )
+
+    if interactive:
+        top_n = st.slider("Themes to show (the rest are grouped as Others):",
+                          min_value=5, max_value=100, value=DEFAULT_TOP_N, step=5,
+                          key="bar_chart_top_n")
+        fig = sets_per_theme_plotly(df, year, top_n=top_n)
+        if fig is None:
+            st.info(f"No data found for year: {year}")
+        else:
+            st.plotly_chart(fig)
+        return
+
+    png = _sets_per_theme_png(df, fingerprint, year)
+    if png is None:
+        st.info(f"No data found for year: {year}")
+    else:
+        st.image(png)
+
+
+def show_theme_comparison_view(df, interactive=False):
+    """
+    Compare several themes on one chart (sets and portfolio share per
+    year). The selection starts with the top N themes by a lifespan
+    metric and can be edited freely.
+    interactive : draw with Plotly in the browser instead of matplotlib
+    """
+    index = get_theme_index(df)
+    if not len(index):
+        st.info("No themes available in the data.")
+        return
+
+    col1, col2 = st.columns(2)
+    with col1:
+        by = st.selectbox("Start with the top themes by:", LIFESPAN_METRICS,
+                          index=LIFESPAN_METRICS.index("total_sets"), key="compare_metric")
+    with col2:
+        top_n = st.number_input("Number of top themes:", min_value=1,
+                                max_value=MAX_COMPARE_THEMES, value=5, step=1,
+                                key="compare_top_n")
+
+    # the key includes the top-N choice, so changing it starts a fresh selection
+    themes = st.multiselect(
+        "Themes to compare:",
+        index.names,
+        default=top_themes(df, n=int(top_n), by=by),
+        max_selections=MAX_COMPARE_THEMES,
+        key=f"compare_themes_{by}_{int(top_n)}",
+    )
+    if not themes:
+        st.info("Select at least one theme to compare.")
+        return
+
+    if interactive:
+        st.plotly_chart(theme_comparison_plotly(df, themes))
+        return
+
+    png = _theme_comparison_png(df, get_data_fingerprint(df), tuple(themes))
+    if png is not None:
+        st.image(png)
+
+
+def show_forecast_view(df):
+    """Select a theme, horizon and engine; show the forecast chart and table."""
+    fingerprint = get_data_fingerprint(df)
+    theme = _select_theme(df, "Theme to forecast:", key="forecast_theme")
+    if theme is None:
+        return
+
+    col1, col2 = st.columns(2)
+    with col1:
+        periods = st.number_input("Years to forecast:", min_value=1, max_value=30,
+                                  value=5, step=1, key="forecast_periods")
+    with col2:
+        engine = st.selectbox("Model:", ENGINES, key="forecast_engine",
+                              help="prophet is the original model; linear and holt fit in milliseconds")
+
+    queue = get_forecast_queue()
+    key = (fingerprint, theme, int(periods), engine)
+    job = queue.get(job_id_for(key))
+    if job is not None and job.status not in (QUEUED, RUNNING, DONE):
+        # a cancelled, failed or timed-out forecast only runs again on request
+        notice = st.empty()
+        with notice.container():
+            if job.status == CANCELLED:
+                st.info("Forecast cancelled.")
+            else:
+                st.warning(f"The forecast did not finish: {job.error}")
+            retry = st.button("Run again", key="forecast_retry")
+        if not retry:
+            return
+        notice.empty()
+
+    try:
+        job_id = queue.submit(key, _forecast_job, df, theme, int(periods), engine)
+    except QueueFullError as exc:
+        st.warning(f"The forecast queue is busy: {exc}.")
+        return
+
+    job = queue.wait(job_id, timeout=FORECAST_WAIT_SECONDS)
+    if job is None:
+        st.info("The forecast was dropped, change a setting to run it again.")
+        return
+    if job.status in (QUEUED, RUNNING):
+        _poll_forecast_job(job_id)
+        return
+    if job.status != DONE:
+        # cancelled, failed or timed out while we waited; the next run offers a retry
+        st.rerun()
+
+    if job.result is None:
+        st.info(f"No data found for theme: {theme}")
+        return
+
+    forecast, png = job.result
+    st.image(png)
+    st.write("**Last 10 forecast rows (date and prediction):**")
+    st.dataframe(forecast[["ds", "yhat"]].tail(10), hide_index=True)
+
+
+def show_theme_duration_view(df):
+    """
+    Rank themes by a lifespan metric; the metric and the number shown are
+    widgets. The lifespan table is computed once per dataset, so each
+    change is only a top-N selection.
+    """
+    col1, col2 = st.columns(2)
+    with col1:
+        by = st.selectbox("Rank themes by:", LIFESPAN_METRICS, key="duration_metric")
+    with col2:
+        top_n = st.number_input("How many themes do you want to display?",
+                                min_value=1, max_value=500, value=10, step=1,
+                                key="duration_top_n")
+    ranked = find_longest_running_themes(df, top_n=int(top_n), by=by, verbose=False)
+    if ranked is None or ranked.empty:
+        st.info("No themes available in the data.")
+        return
+    st.dataframe(ranked, hide_index=True)
@@ -1,21 +1,16 @@
-import pandas as pd
-import sqlalchemy as sa
+from Projects.python.data_loader import get_backend, iter_theme_year_stats
 
-# 🔹 Replace this with your actual Server Name and Database Name
-server = "YOUR_SERVER_NAME"
-database = "LEGO"
-driver = "ODBC Driver 17 for SQL Server"
-
-# Build connection string
-conn_str = f"mssql+pyodbc://{server}/{database}?driver={driver}"
+# 🔹 The backend comes from the environment, e.g.
+#    LEGO_BACKEND=duckdb LEGO_DATA_PATH=lego.duckdb python -m Projects.python.test_file
+#    (see data_loader.backend_settings_from_env; default is the SQL Server view)
 
 try:
-    engine = sa.create_engine(conn_str)
-    df = pd.read_sql("SELECT TOP 5 * FROM dbo.vw_theme_year_stats", engine)
-    print("SUCCESS! Connection works. Here's a preview:")
+    backend = get_backend()
+    df = next(iter_theme_year_stats(chunksize=5)).head(5)
+    print(f"SUCCESS! Connection works ({backend.name}: {backend.view}). Here's a preview:")
     print(df)
 except Exception as e:
     print("Connection failed. Error:")
     print(e)
 
-print("All imports successful!")
\ No newline at end of file
+print("All imports successful!")
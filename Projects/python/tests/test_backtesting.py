@@ -0,0 +1,27 @@
+import logging
+
+import numpy as np
+
+from ..backtesting import _backtest_worker, _folds
+
+# six years in a row, then a 20-year gap (like "Airport": 1978 -> 2004)
+YEARS = np.array([1978, 1979, 1980, 1981, 1982, 1983, 2004, 2005])
+VALUES = np.array([3.0, 5.0, 4.0, 6.0, 7.0, 5.0, 2.0, 3.0])
+
+
+def test_fold_after_a_long_gap_is_skipped():
+    folds = _folds(YEARS, min_train=5, horizon=3)
+    origin_years = [YEARS[origin] for origin, _ in folds]
+    # 1983 -> next year 2004 is outside the 3-year horizon
+    assert origin_years == [1982, 2004]
+    assert all(test.any() for _, test in folds)
+
+
+def test_every_engine_backtests_a_gapped_series():
+    logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+    fold_counts = {}
+    for engine in ("linear", "holt", "prophet"):
+        rows = _backtest_worker(("Airport", YEARS, VALUES, engine, 3, 5))
+        assert all(row["test_points"] > 0 for row in rows)
+        fold_counts[engine] = [row["origin_year"] for row in rows]
+    assert fold_counts["linear"] == fold_counts["holt"] == fold_counts["prophet"] == [1982, 2004]
@@ -0,0 +1,28 @@
+import pandas as pd
+
+from ..chart_assets import ChartAssetStore, build_chart_assets
+from ..data_preparation import prepare_data
+
+STATS = pd.DataFrame({
+    "year": [2000, 2000, 2001, 2001],
+    "theme": ["City", "Space", "City", "Space"],
+    "num_sets": [2, 1, 3, 1],
+    "total_sets_year": [3, 3, 4, 4],
+    "pct_of_portfolio": [66.67, 33.33, 75.0, 25.0],
+    "is_new_theme_year": [1, 1, 0, 0],
+})
+
+
+def test_a_changed_row_only_misses_its_own_charts(tmp_path):
+    build_chart_assets(prepare_data(STATS), asset_dir=str(tmp_path), workers=1)
+    store = ChartAssetStore(str(tmp_path))
+
+    edited = STATS.copy()
+    edited.loc[(edited["year"] == 2001) & (edited["theme"] == "City"), "num_sets"] = 5
+    df = prepare_data(edited)
+
+    assert store.get("trend", "City", df=df) is None
+    assert store.get("year_bar", 2001, df=df) is None
+    assert store.get("trend", "Space", df=df) is not None
+    assert store.get("share", "City", df=df) is not None
+    assert store.get("year_bar", 2000, df=df) is not None
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+from ..benchmarks.synthetic import generate_rows
+from ..benchmarks.year_explorer import (
+    _same_table,
+    legacy_get_new_themes_for_year,
+    legacy_rank_themes_by_sets_in_year,
+)
+from ..data_preparation import (
+    YearIndex,
+    get_available_years,
+    get_new_themes_for_year,
+    get_year_slice,
+    prepare_data,
+    rank_themes_by_sets_in_year,
+)
+
+STATS = pd.DataFrame({
+    "year": [2003, 2000, 2001, 2003, 2000, 1998],
+    "theme": ["City", "City", "Space", "Space", "Space", "Town"],
+    "num_sets": [4, 2, 1, 6, 3, 5],
+})
+
+
+def test_year_index_matches_a_boolean_mask():
+    index = YearIndex(STATS)
+    assert index.years() == [1998, 2000, 2001, 2003]
+    for year in range(1996, 2006):
+        expected = STATS[STATS["year"] == year]
+        assert index.slice(year).sort_index().equals(expected)
+    ranged = index.range(2000, 2002)
+    assert sorted(ranged.index) == sorted(STATS.index[STATS["year"].between(2000, 2002)])
+    assert index.range(2010, 2020).empty
+
+
+def test_prepared_frame_is_sliced_without_copying_columns():
+    df = prepare_data(STATS)
+    assert get_available_years(df) == [1998, 2000, 2001, 2003]
+    year_rows = get_year_slice(df, 2003)
+    assert sorted(year_rows["theme"].astype(str)) == ["City", "Space"]
+    # prepare_data sorts by year, so the slice is a view on the frame's data
+    assert np.shares_memory(year_rows["num_sets"].to_numpy(), df["num_sets"].to_numpy())
+
+
+def test_year_tables_match_the_per_call_pipeline():
+    df = prepare_data(generate_rows(5_000, seed=1))
+    for year in get_available_years(df) + [1800]:
+        assert _same_table(rank_themes_by_sets_in_year(df, year),
+                           legacy_rank_themes_by_sets_in_year(df, year))
+        assert _same_table(get_new_themes_for_year(df, year),
+                           legacy_get_new_themes_for_year(df, year))
+
+
+def test_year_tables_hand_out_copies():
+    df = prepare_data(STATS.assign(is_new_theme_year=1))
+    ranked = rank_themes_by_sets_in_year(df, 2003)
+    assert ranked["num_sets"].tolist() == [6, 4]
+    ranked["rank"] = [1, 2]
+    assert "rank" not in rank_themes_by_sets_in_year(df, 2003).columns
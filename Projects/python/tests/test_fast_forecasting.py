@@ -0,0 +1,50 @@
+import numpy as np
+
+from ..fast_forecasting import _align, _run_holt, fit_predict
+
+YEARS = np.arange(1970, 2001)
+
+
+def _reference_holt(years, values, alpha, beta, phi):
+    """Damped Holt stepped by calendar years, one observation at a time."""
+    level = values[0]
+    trend = (values[1] - values[0]) / (years[1] - years[0])
+    for t in range(1, len(values)):
+        gap = years[t] - years[t - 1]
+        damped = sum(phi ** k for k in range(1, gap + 1))
+        new_level = alpha * values[t] + (1 - alpha) * (level + damped * trend)
+        trend = beta * (new_level - level) / gap + (1 - beta) * phi ** gap * trend
+        level = new_level
+    return level, trend
+
+
+def _grid(rows):
+    values = np.zeros((len(rows), len(YEARS)))
+    present = np.zeros(values.shape, dtype=bool)
+    for i, series in enumerate(rows):
+        for year, value in series.items():
+            values[i, year - YEARS[0]] = value
+            present[i, year - YEARS[0]] = True
+    return values, present
+
+
+def test_holt_steps_across_gaps_by_calendar_years():
+    # 1970-1975 rising, dormant until 1998; and a series without gaps
+    gapped = {1970: 1, 1971: 3, 1972: 6, 1973: 8, 1974: 11, 1975: 13, 1998: 4, 1999: 5}
+    steady = {year: 2.0 * (year - 1990) + 1 for year in range(1990, 2001)}
+    values, present = _grid([gapped, steady])
+    y, x, mask, counts = _align(values, present, YEARS)
+
+    level, trend, _, _ = _run_holt(y, x, mask, counts, 0.5, 0.2, 0.9)
+    for i, series in enumerate([gapped, steady]):
+        years = np.array(sorted(series))
+        expected = _reference_holt(years, np.array([series[year] for year in years]), 0.5, 0.2, 0.9)
+        np.testing.assert_allclose([level[i], trend[i]], expected)
+
+
+def test_engines_forecast_the_years_after_the_last_observation():
+    values, present = _grid([{1970: 5, 1971: 6, 1972: 7, 1990: 2, 1991: 3}])
+    for engine in ("linear", "holt"):
+        result = fit_predict(values, present, YEARS, periods=3, engine=engine)
+        assert result["last_year"][0] == 1991
+        assert result["x"][0, :5].tolist() == [1970, 1971, 1972, 1990, 1991]
@@ -0,0 +1,44 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from ..forecast_cache import ForecastCache, make_key
+
+FRAME = pd.DataFrame({"ds": pd.to_datetime(["2001", "2002"]), "yhat": [1.5, 2.5]})
+
+
+def _age(cache, key, seconds):
+    os.utime(cache._path(key), (seconds, seconds))
+
+
+def test_round_trip_and_corrupt_files(tmp_path):
+    cache = ForecastCache(cache_dir=str(tmp_path))
+    assert cache.get("missing") is None
+    cache.put("a", FRAME)
+    assert cache.get("a").equals(FRAME)
+    assert os.listdir(tmp_path) == ["a.pkl"]
+
+    with open(cache._path("b"), "wb") as f:
+        f.write(b"\x80\x05 not a pickle")
+    assert cache.get("b") is None
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path):
+    cache = ForecastCache(cache_dir=str(tmp_path), max_entries=2)
+    cache.put("a", FRAME)
+    _age(cache, "a", 1_000)
+    cache.put("b", FRAME)
+    _age(cache, "b", 2_000)
+    cache.get("a")  # a hit makes "a" the most recently used
+    cache.put("c", FRAME)
+    assert sorted(os.listdir(tmp_path)) == ["a.pkl", "c.pkl"]
+
+
+def test_key_changes_with_the_series_and_horizon():
+    years, values = np.array([2000, 2001]), np.array([1.0, 2.0])
+    key = make_key("City", 5, years, values, {"engine": "prophet"})
+    assert key == make_key("City", 5, years, values.copy(), {"engine": "prophet"})
+    assert key != make_key("City", 6, years, values, {"engine": "prophet"})
+    assert key != make_key("City", 5, years, np.array([1.0, 3.0]), {"engine": "prophet"})
+    assert key != make_key("Space", 5, years, values, {"engine": "prophet"})
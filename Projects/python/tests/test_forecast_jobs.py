@@ -0,0 +1,94 @@
+import threading
+import time
+
+import pytest
+
+from ..forecast_jobs import (
+    CANCELLED,
+    DONE,
+    FAILED,
+    QUEUED,
+    TIMEOUT,
+    ForecastJobQueue,
+    QueueFullError,
+)
+
+
+def _blocking_job(queue, release):
+    """Submit a job that holds the (single) worker until `release` is set."""
+    job_id = queue.submit("blocker", release.wait, 5)
+    deadline = time.monotonic() + 5
+    while queue.get(job_id).started is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return job_id
+
+
+def test_identical_key_runs_once():
+    queue = ForecastJobQueue(workers=1)
+    calls = []
+
+    def fit(theme):
+        calls.append(theme)
+        return theme.upper()
+
+    first = queue.submit(("City", 5), fit, "City")
+    assert queue.wait(first, timeout=5).status == DONE
+    assert queue.submit(("City", 5), fit, "City") == first
+    assert queue.get(first).result == "CITY"
+    assert calls == ["City"]
+
+
+def test_cancel_a_job_waiting_behind_a_running_one():
+    queue = ForecastJobQueue(workers=1)
+    release = threading.Event()
+    calls = []
+    _blocking_job(queue, release)
+
+    job_id = queue.submit("waiting", calls.append, "ran")
+    assert queue.get(job_id).status == QUEUED
+    assert queue.cancel(job_id)
+    assert not queue.cancel(job_id)
+
+    release.set()
+    queue.wait(queue.submit("after", lambda: None), timeout=5)
+    assert queue.get(job_id).status == CANCELLED
+    assert calls == []
+
+
+def test_slow_job_times_out_and_drops_its_late_result():
+    queue = ForecastJobQueue(workers=1, timeout=0.05)
+    release = threading.Event()
+    job_id = _blocking_job(queue, release)
+
+    job = queue.wait(job_id, timeout=0.2)
+    assert job.status == TIMEOUT
+    assert "timed out" in job.error
+
+    release.set()
+    time.sleep(0.05)
+    assert queue.get(job_id).status == TIMEOUT
+    assert queue.get(job_id).result is None
+
+
+def test_failing_job_reports_the_error():
+    queue = ForecastJobQueue(workers=1)
+
+    def fit():
+        raise ValueError("no data")
+
+    job = queue.wait(queue.submit("broken", fit), timeout=5)
+    assert job.status == FAILED
+    assert job.error == "ValueError: no data"
+
+
+def test_full_queue_rejects_new_jobs():
+    queue = ForecastJobQueue(workers=1, max_queued=1)
+    release = threading.Event()
+    _blocking_job(queue, release)
+    try:
+        queue.submit("second", lambda: None)
+        with pytest.raises(QueueFullError):
+            queue.submit("third", lambda: None)
+        assert queue.stats()["waiting"] == 1
+    finally:
+        release.set()
@@ -0,0 +1,57 @@
+import pandas as pd
+import pytest
+
+from .. import data_loader
+from ..incremental_refresh import refresh_theme_year_stats
+
+THEMES = pd.DataFrame({"id": [1, 2], "name": ["City", "Space"], "parent_id": [None, None]})
+
+
+def _sets(city_2001, space_2001):
+    theme_ids = [1, 1, 2, 2] + [1] * city_2001 + [2] * space_2001
+    years = [2000] * 4 + [2001] * (city_2001 + space_2001)
+    return pd.DataFrame({"set_num": [str(i) for i in range(len(years))], "name": "x",
+                         "year": years, "theme_id": theme_ids})
+
+
+def _num_sets(df, year, theme):
+    rows = df[(df["year"] == year) & (df["theme"].astype(str) == theme)]
+    return int(rows["num_sets"].iloc[0])
+
+
+@pytest.fixture
+def backend(tmp_path):
+    def configure(name):
+        backend = data_loader.configure_backend(name, path=str(tmp_path / f"lego.{name}"))
+        backend.create_view_from_raw(_sets(3, 1), THEMES)
+        return backend
+
+    yield configure
+    if data_loader._backend is not None:
+        data_loader._backend.close()
+        data_loader._backend = None
+
+
+def test_duckdb_row_digest_sees_an_edit_that_keeps_every_sum(backend, tmp_path):
+    db = backend("duckdb")
+    cache_dir = str(tmp_path / "cache")
+    assert _num_sets(refresh_theme_year_stats(cache_dir=cache_dir), 2001, "City") == 3
+
+    # City and Space swap their 2001 counts: every per-column sum stays the same
+    db.create_view_from_raw(_sets(1, 3), THEMES)
+    df = refresh_theme_year_stats(cache_dir=cache_dir)
+    assert _num_sets(df, 2001, "City") == 1
+    assert _num_sets(df, 2001, "Space") == 3
+
+
+def test_sqlite_picks_up_such_an_edit_at_the_periodic_full_reload(backend, tmp_path):
+    db = backend("sqlite")
+    cache_dir = str(tmp_path / "cache")
+    refresh_theme_year_stats(cache_dir=cache_dir)
+
+    db.create_view_from_raw(_sets(1, 3), THEMES)
+    # without a row digest the sums cannot tell (the documented limitation)
+    stale = refresh_theme_year_stats(cache_dir=cache_dir, full_reload_days=None)
+    assert _num_sets(stale, 2001, "City") == 3
+    fresh = refresh_theme_year_stats(cache_dir=cache_dir, full_reload_days=0)
+    assert _num_sets(fresh, 2001, "City") == 1
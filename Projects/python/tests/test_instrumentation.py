@@ -0,0 +1,34 @@
+import tracemalloc
+
+from ..instrumentation import REGISTRY, stage
+
+
+@stage(name="test.allocate")
+def _allocate(size):
+    return len(bytearray(size))
+
+
+def test_stage_keeps_the_outer_peak():
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        big = bytearray(20_000_000)
+        del big
+        _allocate(1_000_000)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    # the 20 MB allocation made before the stage is still the peak
+    assert peak - before >= 20_000_000
+
+
+def test_stage_records_its_peak():
+    REGISTRY.clear()
+    tracemalloc.start()
+    try:
+        _allocate(5_000_000)
+    finally:
+        tracemalloc.stop()
+    (entry,) = [r for r in REGISTRY.records() if r["stage"] == "test.allocate"]
+    assert entry["peak_bytes"] >= 5_000_000
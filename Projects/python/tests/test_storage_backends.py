@@ -0,0 +1,81 @@
+import pandas as pd
+import pytest
+
+from .. import data_loader
+from ..storage_backends import create_backend, duckdb_path_from_url
+
+THEMES = pd.DataFrame({"id": [1, 2], "name": ["City", "Space"], "parent_id": [None, None]})
+SETS = pd.DataFrame({
+    "set_num": ["1", "2", "3", "4"],
+    "name": ["a", "b", "c", "d"],
+    "year": [2000, 2000, 2001, 2001],
+    "theme_id": [1, 2, 1, 1],
+})
+
+
+@pytest.fixture
+def env(monkeypatch):
+    for name in ("LEGO_BACKEND", "LEGO_DB_URL", "LEGO_DATA_PATH", "LEGO_DB_VIEW"):
+        monkeypatch.delenv(name, raising=False)
+    yield monkeypatch
+    if data_loader._backend is not None:
+        data_loader._backend.close()
+        data_loader._backend = None
+
+
+@pytest.mark.parametrize("name", ["sqlite", "duckdb"])
+def test_backend_from_db_url(env, tmp_path, name):
+    path = tmp_path / f"lego.{name}"
+    create_backend(name, path=str(path)).create_view_from_raw(SETS, THEMES)
+
+    env.setenv("LEGO_DB_URL", f"{name}:///{path}")
+    backend = data_loader.configure_backend()
+    assert backend.name == name
+    df = backend.load()
+    assert sorted(zip(df["year"], df["theme"], df["num_sets"])) == [
+        (2000, "City", 1), (2000, "Space", 1), (2001, "City", 2),
+    ]
+
+
+def test_duckdb_url_paths():
+    assert duckdb_path_from_url("duckdb:///lego.duckdb") == "lego.duckdb"
+    assert duckdb_path_from_url("duckdb:////data/lego.duckdb") == "/data/lego.duckdb"
+    assert duckdb_path_from_url("duckdb://") == ":memory:"
+    assert duckdb_path_from_url("duckdb:///:memory:") == ":memory:"
+
+
+def test_file_backends_reject_urls_and_sql(tmp_path):
+    with pytest.raises(ValueError, match="takes no url"):
+        create_backend("csv", url="csv:///stats.csv", path=str(tmp_path / "stats.csv"))
+    backend = create_backend("csv", path=str(tmp_path / "stats.csv"))
+    with pytest.raises(ValueError, match="read_sql"):
+        backend.read_sql("SELECT 1")
+
+
+@pytest.mark.parametrize("name", ["sqlite", "duckdb"])
+def test_null_in_an_int_column_still_loads(tmp_path, name):
+    backend = create_backend(name, path=str(tmp_path / f"lego.{name}"))
+    backend.create_view_from_raw(SETS, THEMES)
+    view = "SELECT year, theme, NULL AS num_sets FROM vw_theme_year_stats"
+    df = backend.read_sql(f"SELECT * FROM ({view}) AS v;", dtype={"year": "int16", "num_sets": "int32"})
+    chunks = list(backend.iter_chunks(chunksize=2))
+    backend.close()
+
+    assert df["year"].dtype == "int16"
+    assert df["num_sets"].isna().all()
+    assert sum(len(chunk) for chunk in chunks) == 3
+
+
+@pytest.mark.parametrize("name", ["sqlite", "duckdb", "csv", "parquet"])
+def test_every_backend_serves_the_same_view(tmp_path, name):
+    backend = create_backend(name, path=str(tmp_path / f"lego.{name}"))
+    backend.create_view_from_raw(SETS, THEMES)
+    loaded = backend.load()
+    chunked = pd.concat(list(backend.iter_chunks(chunksize=2)), ignore_index=True)
+    backend.close()
+
+    for df in (loaded, chunked):
+        df = df.astype({"theme": str}).sort_values(["year", "theme"], ignore_index=True)
+        assert df["num_sets"].tolist() == [1, 1, 2]
+        assert df["pct_of_portfolio"].tolist() == pytest.approx([50.0, 50.0, 100.0])
+        assert df["is_new_theme_year"].tolist() == [1, 1, 0]
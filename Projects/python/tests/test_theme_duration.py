@@ -0,0 +1,32 @@
+import pandas as pd
+
+from ..data_preparation import prepare_data
+from ..theme_duration import find_longest_running_themes, get_lifespan_table, top_themes
+
+# City: 1990-1992, dormant, 1995, dormant, 2000-2001; Space: 1990-1991; Town: 2001
+ACTIVE = {"City": [1990, 1991, 1992, 1995, 2000, 2001], "Space": [1990, 1991], "Town": [2001]}
+STATS = pd.DataFrame(
+    [(year, theme, 10 if theme == "Space" else 1)
+     for theme, years in ACTIVE.items() for year in years],
+    columns=["year", "theme", "num_sets"],
+)
+
+
+def test_lifespan_counts_dormant_years_and_comebacks():
+    table = get_lifespan_table(prepare_data(STATS)).astype({"theme": str}).set_index("theme")
+    city = table.loc["City"]
+    assert (city["first_year"], city["last_year"]) == (1990, 2001)
+    assert city["duration_years"] == 12
+    assert city["active_years"] == 6
+    assert city["longest_run"] == 3
+    assert city["comebacks"] == 2
+    assert table.loc["Town", ["duration_years", "longest_run", "comebacks"]].tolist() == [1, 1, 0]
+    assert table.loc["Space", "total_sets"] == 20
+
+
+def test_top_n_by_each_metric():
+    df = prepare_data(STATS)
+    ranked = find_longest_running_themes(df, top_n=2, by="duration_years", verbose=False)
+    assert ranked["theme"].astype(str).tolist() == ["City", "Space"]
+    assert top_themes(df, n=1, by="total_sets") == ["Space"]
+    assert find_longest_running_themes(df, by="no_such_metric", verbose=False) is None
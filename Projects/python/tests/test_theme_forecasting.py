@@ -0,0 +1,17 @@
+import pandas as pd
+
+from ..data_preparation import prepare_data
+from ..theme_forecasting import forecast_theme
+
+STATS = pd.DataFrame({
+    "year": [2000, 2001, 2002, 2002],
+    "theme": ["City", "City", "City", "Space"],
+    "num_sets": [2, 3, 4, 1],
+})
+
+
+def test_prophet_skips_a_theme_with_one_year():
+    df = prepare_data(STATS)
+    assert forecast_theme(df, "Space", use_cache=False, plot=False) is None
+    # the fast engines still extrapolate a single year
+    assert len(forecast_theme(df, "Space", engine="holt", plot=False)) == 6
@@ -0,0 +1,38 @@
+import pandas as pd
+
+from ..data_preparation import prepare_data
+from ..theme_search import ThemeSearchIndex, get_theme_index
+
+THEMES = ["Star Wars", "Star Trek", "Stargate", "City", "Castle", "Space", "Technic"]
+
+
+def test_exact_and_prefix_matches_ignore_case():
+    index = ThemeSearchIndex(THEMES)
+    assert index.resolve("  star   WARS ") == "Star Wars"
+    assert "city" in index and "Town" not in index
+    assert index.prefix("star") == ["Star Trek", "Star Wars", "Stargate"]
+    assert index.prefix("star", limit=1) == ["Star Trek"]
+    assert index.prefix("zzz") == []
+
+
+def test_typos_are_matched_by_trigrams():
+    index = ThemeSearchIndex(THEMES)
+    assert index.suggest("Star Wrs")[0][0] == "Star Wars"
+    assert index.suggest("Tecnic")[0][0] == "Technic"
+    assert index.suggest("qqqq") == []
+    # prefix matches come first, typo matches fill up the list
+    assert index.complete("Cas", limit=3)[0] == "Castle"
+
+
+def test_choose_explains_a_substitution():
+    index = ThemeSearchIndex(THEMES)
+    assert index.choose("city") == ("City", None)
+    theme, message = index.choose("Castel")
+    assert theme == "Castle" and "Did you mean" in message
+
+
+def test_index_only_lists_themes_present_in_the_frame():
+    df = prepare_data(pd.DataFrame({"year": [2000, 2001], "theme": ["City", "Space"],
+                                    "num_sets": [1, 2]}))
+    df = df[df["theme"] == "City"]
+    assert get_theme_index(df).names == ["City"]
@@ -0,0 +1,37 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from ..view_metrics import check_parity, compute_theme_year_stats
+
+THEMES = pd.DataFrame({"id": [1, 2], "name": ["City", "Space"], "parent_id": [None, None]})
+SETS = pd.DataFrame({
+    "year": [2000, 2000, 2000, 2001, 2001, 2001, 2002] + [2002] * 7,
+    "theme_id": [1, 1, 2, 1, 1, 1, 1] + [2] * 7,
+})
+
+# vw_theme_year_stats of SETS / THEMES, worked out by hand
+EXPECTED_CSV = """year,theme,num_sets,prev_num_sets,abs_change,pct_change,total_sets_year,pct_of_portfolio,is_new_theme_year,new_themes_launched
+2000,City,2,,,,3,66.67,1,2
+2000,Space,1,,,,3,33.33,1,2
+2001,City,3,2,1,50.0,3,100.0,0,
+2002,City,1,3,-2,-66.67,8,12.5,0,
+2002,Space,7,1,6,600.0,8,87.5,0,
+"""
+
+
+def test_view_metrics_match_hand_computed_view():
+    expected = pd.read_csv(io.StringIO(EXPECTED_CSV))
+    actual = compute_theme_year_stats(SETS, THEMES).sort_values(["year", "theme"], ignore_index=True)
+    for col in expected.columns[2:]:
+        np.testing.assert_allclose(actual[col].astype("float64"), expected[col].astype("float64"),
+                                   atol=1e-9, err_msg=col)
+
+
+def test_check_parity_on_small_fixture(tmp_path):
+    csv_path = tmp_path / "stats.csv"
+    csv_path.write_text(EXPECTED_CSV)
+    report = check_parity(csv_path)
+    assert len(report) == 16
+    assert not report["mismatches"].any()
@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+
+from .derived_cache import get_derived
+
+CUBE_METRICS = ("num_sets", "pct_of_portfolio", "abs_change", "pct_change")
+
+
+class ThemeYearCube:
+    """
+    Dense themes x years arrays built once from the prepared frame.
+
+    themes      : sorted theme names, row i of every array
+    theme_codes : theme name -> row number
+    years       : every year from the first to the last one in the data,
+                  column j is year min_year + j
+    present     : bool array, True where the theme has a row that year
+    values      : metric name -> float array (NaN where not present)
+
+    A theme's time series is a single row of these arrays,
+    so lookups cost O(years) instead of a scan over all rows.
+    """
+
+    def __init__(self, df):
+        years = pd.to_numeric(df["year"], errors="coerce").to_numpy(
+            dtype="float64", na_value=np.nan
+        )
+        codes, uniques = pd.factorize(df["theme"], sort=True)
+        valid = (codes >= 0) & ~np.isnan(years)
+
+        self.themes = [str(theme) for theme in uniques]
+        self.theme_codes = {theme: code for code, theme in enumerate(self.themes)}
+
+        if valid.any():
+            self.min_year = int(years[valid].min())
+            max_year = int(years[valid].max())
+        else:
+            self.min_year, max_year = 0, -1
+        self.years = np.arange(self.min_year, max_year + 1)
+
+        row_codes = codes[valid]
+        col_codes = years[valid].astype("int64") - self.min_year
+        shape = (len(self.themes), len(self.years))
+
+        self.present = np.zeros(shape, dtype=bool)
+        self.present[row_codes, col_codes] = True
+
+        self.values = {}
+        for metric in CUBE_METRICS:
+            if metric not in df.columns:
+                continue
+            column = pd.to_numeric(df[metric], errors="coerce").to_numpy(
+                dtype="float64", na_value=np.nan
+            )
+            grid = np.full(shape, np.nan)
+            grid[row_codes, col_codes] = column[valid]
+            self.values[metric] = grid
+
+    def theme_code(self, theme):
+        """Row number of a theme, or None if the theme is unknown."""
+        return self.theme_codes.get(theme)
+
+    def year_code(self, year):
+        """Column number of a year, or None if it is outside the span."""
+        code = int(year) - self.min_year
+        if 0 <= code < len(self.years):
+            return code
+        return None
+
+    def row(self, theme, metric):
+        """
+        Full-span row view for one theme (NaN in years without data).
+        Returns None for an unknown theme or metric.
+        """
+        code = self.theme_code(theme)
+        if code is None or metric not in self.values:
+            return None
+        return self.values[metric][code]
+
+    def series(self, theme, metric):
+        """
+        (years, values) for the years where the theme has data,
+        in ascending year order. Returns None for an unknown theme or metric.
+        """
+        row = self.row(theme, metric)
+        if row is None:
+            return None
+        mask = self.present[self.theme_codes[theme]]
+        return self.years[mask], row[mask]
+
+    def gather(self, themes, metric):
+        """
+        (themes, years, grid) for several themes at once: one fancy-indexing
+        gather of their rows, cut to the years where any of them has data.
+        grid[i] is the series of themes[i], NaN in years without data.
+        Unknown themes are left out; returns None for an unknown metric
+        or when none of the themes is known.
+        """
+        if metric not in self.values:
+            return None
+        found = [theme for theme in dict.fromkeys(themes) if theme in self.theme_codes]
+        if not found:
+            return None
+        codes = np.array([self.theme_codes[theme] for theme in found], dtype=np.intp)
+
+        active = np.flatnonzero(self.present[codes].any(axis=0))
+        span = slice(active[0], active[-1] + 1)
+        return found, self.years[span], self.values[metric][codes, span]
+
+
+def get_theme_cube(df):
+    """ThemeYearCube for df, built on the first per-theme lookup and kept in derived_cache."""
+    return get_derived(df, "theme_cube", ThemeYearCube)
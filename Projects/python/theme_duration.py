@@ -1,28 +1,101 @@
+import logging
+
+import numpy as np
 import pandas as pd
 
-def find_longest_running_themes(df, top_n=10):
+from .derived_cache import get_derived
+from .theme_cube import get_theme_cube
+
+logger = logging.getLogger(__name__)
+
+# metrics a top-N query can rank by
+LIFESPAN_METRICS = (
+    "duration_years",   # last_year - first_year + 1, dormant years included
+    "active_years",     # years the theme actually had sets
+    "longest_run",      # longest streak of consecutive active years
+    "comebacks",        # times the theme returned after one or more dormant years
+    "total_sets",
+)
+
+
+def _build_lifespan_table(df):
+    """
+    One row per theme, computed from the cube's themes x years `present`
+    grid without a Python loop over themes.
+    A run of active years starts where a row goes 0 -> 1 and ends where
+    it goes 1 -> 0 (the row is padded with a 0 on both sides).
+    """
+    cube = get_theme_cube(df)
+    present = cube.present
+    n_themes, n_years = present.shape
+
+    padded = np.zeros((n_themes, n_years + 2), dtype=np.int8)
+    padded[:, 1:-1] = present
+    edges = np.diff(padded, axis=1)
+    # np.nonzero walks row by row, so the k-th start and k-th end belong together
+    run_rows, run_starts = np.nonzero(edges == 1)
+    _, run_ends = np.nonzero(edges == -1)
+
+    runs = np.bincount(run_rows, minlength=n_themes)
+    longest_run = np.zeros(n_themes, dtype=np.int64)
+    np.maximum.at(longest_run, run_rows, run_ends - run_starts)
 
-    df_temp = df.copy()
+    first_code = present.argmax(axis=1)
+    last_code = n_years - 1 - present[:, ::-1].argmax(axis=1)
 
-    theme_years = (
-        df_temp.groupby("theme")["year"]
-        .agg(first_year="min", last_year="max")
-        .reset_index()
-    )
+    table = pd.DataFrame({
+        "theme": cube.themes,
+        "first_year": cube.min_year + first_code,
+        "last_year": cube.min_year + last_code,
+        "duration_years": last_code - first_code + 1,
+        "active_years": present.sum(axis=1),
+        "longest_run": longest_run,
+        "comebacks": np.maximum(runs - 1, 0),
+    })
+    if "num_sets" in cube.values:
+        table["total_sets"] = np.nansum(cube.values["num_sets"], axis=1).astype(np.int64)
 
-    theme_years["duration_years"] = (
-        theme_years["last_year"] - theme_years["first_year"] + 1
-    )
+    # themes without any year (only possible for an empty frame) are dropped
+    return table[runs > 0].reset_index(drop=True)
 
-    theme_years_sorted = theme_years.sort_values(
-        by="duration_years", ascending=False
-    )
 
-    # Print summary
-    print("\n==============================")
-    print("LONGEST RUNNING LEGO THEMES")
-    print("==============================")
-    print(f"Top {top_n} themes by duration:\n")
-    print(theme_years_sorted.head(top_n).to_string(index=False))
+def get_lifespan_table(df):
+    """Theme lifespan table for df, computed once per prepared frame."""
+    return get_derived(df, "lifespan_table", _build_lifespan_table)
+
+
+def find_longest_running_themes(df, top_n=10, by="duration_years", verbose=True):
+    """
+    Top themes by a lifespan metric (see LIFESPAN_METRICS).
+    Uses the precomputed lifespan table and nlargest, so only the top_n
+    rows are selected instead of re-sorting every theme.
+    Ties are broken by theme name. top_n=None returns every theme, sorted.
+    """
+    table = get_lifespan_table(df)
+
+    if by not in table.columns or by not in LIFESPAN_METRICS:
+        logger.warning("Unknown metric '%s', expected one of %s.", by, LIFESPAN_METRICS)
+        return None
+
+    if top_n is None:
+        theme_years_sorted = table.sort_values(by=by, ascending=False, kind="stable")
+    else:
+        theme_years_sorted = table.nlargest(top_n, by, keep="first")
+
+    if verbose:
+        # Print summary
+        print("\n==============================")
+        print("LONGEST RUNNING LEGO THEMES")
+        print("==============================")
+        print(f"Top {len(theme_years_sorted)} themes by {by}:\n")
+        print(theme_years_sorted.to_string(index=False))
 
     return theme_years_sorted
+
+
+def top_themes(df, n=10, by="total_sets"):
+    """Names of the n top themes by a lifespan metric, for comparison charts."""
+    ranked = find_longest_running_themes(df, top_n=n, by=by, verbose=False)
+    if ranked is None:
+        return []
+    return ranked["theme"].tolist()
@@ -1,59 +1,328 @@
 ## I only did forecast based on the lego dataset, historical data only
 ## but I am thinking to introduce some external dataset, GDP, kids amounts, lego annual report and such,
 ## then I can try to use regression model for the forecast
-from prophet import Prophet
+## prophet and matplotlib are imported inside the functions that need them:
+## importing either one costs ~0.5-1s, which every app start would pay otherwise
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 import pandas as pd
-import matplotlib.pyplot as plt
 
+from .fast_forecasting import FAST_ENGINES, forecast_many
+from .forecast_cache import get_forecast_cache, make_key
+from .instrumentation import stage
+from .model_store import get_model_store, warm_start_params
+from .theme_cube import get_theme_cube
 
-def forecast_theme(df, theme, periods=5):
-    """
-    Build a simple yearly forecast for the number of sets
-    for a given theme, using Prophet.
-    df       : cleaned dataframe from prepare_data()
-    theme    : the theme name to forecast
-    periods  : how many future years to predict
-    """
-    df_temp = df.copy()
+logger = logging.getLogger(__name__)
 
-    theme_rows = df_temp[df_temp["theme"] == theme].copy()
+PROPHET_CONFIG = {
+    "yearly_seasonality": False,
+    "weekly_seasonality": False,
+    "daily_seasonality": False,
+}
 
-    if theme_rows.empty:
-        print(f"[forecast_theme] No data found for theme: {theme}")
-        return None
-    if "year" not in theme_rows.columns or "num_sets" not in theme_rows.columns:
-        print("[forecast_theme] Required columns 'year' or 'num_sets' are missing.")
-        return None
+FORECAST_COLUMNS = ["ds", "yhat", "yhat_lower", "yhat_upper"]
 
-    df_model = theme_rows[["year", "num_sets"]].copy()
+ENGINES = ("prophet",) + FAST_ENGINES
 
-    df_model["ds"] = pd.to_datetime(df_model["year"], format="%Y")
+# Prophet cannot fit fewer observed years than this
+PROPHET_MIN_POINTS = 2
 
-    df_model["y"] = df_model["num_sets"]
 
-    df_model_final = df_model[["ds", "y"]].copy()
+def _model_config():
+    """Everything besides the data that changes a Prophet forecast."""
+    import prophet
 
-    model = Prophet(
-        yearly_seasonality=False,  
-        weekly_seasonality=False,
-        daily_seasonality=False
-    )
+    return {
+        "engine": "prophet",
+        "prophet_version": prophet.__version__,
+        "params": PROPHET_CONFIG,
+        "freq": "YS",
+    }
+
+
+def _new_prophet_fit(years, values, init=None):
+    """
+    Fit a new Prophet model on one yearly series.
+    init : starting values for Stan (see model_store.warm_start_params),
+           default: Prophet's own initial values
+    """
+    from prophet import Prophet
+
+    df_model_final = pd.DataFrame({
+        "ds": pd.to_datetime(years.astype(str), format="%Y"),
+        "y": values,
+    })
+
+    model = Prophet(**PROPHET_CONFIG)
 
-    model.fit(df_model_final)
+    if init is None:
+        model.fit(df_model_final)
+    else:
+        model.fit(df_model_final, init=init)
+    return model
 
+
+def _predict_future(model, periods):
+    """Forecast covering the model's history + `periods` future years."""
+    # "YS" = 1 January, matching the ds values built from the years
     future = model.make_future_dataframe(
         periods=periods,
-        freq="Y"  
+        freq="YS"
     )
 
-    forecast = model.predict(future)
+    return model.predict(future)
+
 
-    fig = model.plot(forecast)
-    plt.title(f"Forecast: Number of Sets for {theme}")
-    plt.xlabel("Year")
-    plt.ylabel("Number of Sets")
-    plt.tight_layout()
+def _fit_prophet(years, values, periods):
+    """
+    Fit Prophet on one yearly series and predict `periods` years ahead.
+    Returns (model, forecast) where forecast covers history + future.
+    """
+    model = _new_prophet_fit(years, values)
+    return model, _predict_future(model, periods)
+
+
+def get_prophet_model(theme, years, values, use_store=True):
+    """
+    Fitted Prophet model for one theme's series, and how it was obtained:
+    "stored" (same series fitted before, no fit at all), "warm" (refit
+    starting from the theme's newest stored model) or "cold".
+    """
+    if not use_store:
+        return _new_prophet_fit(years, values), "cold"
+
+    store = get_model_store()
+    config = _model_config()
+    model = store.get(theme, years, values, config)
+    if model is not None:
+        return model, "stored"
+
+    previous = store.latest(theme, config)
+    if previous is None:
+        model, how = _new_prophet_fit(years, values), "cold"
+    else:
+        model, how = _new_prophet_fit(years, values, init=warm_start_params(previous)), "warm"
+    store.put(theme, years, values, config, model)
+    return model, how
+
+
+def _predict_prophet_at_years(train_years, train_values, predict_years):
+    """Fit Prophet on the training years and return yhat at predict_years."""
+    from prophet import Prophet
+
+    model = Prophet(**PROPHET_CONFIG)
+    model.fit(pd.DataFrame({
+        "ds": pd.to_datetime(train_years.astype(str), format="%Y"),
+        "y": train_values,
+    }))
+    future = pd.DataFrame({
+        "ds": pd.to_datetime(predict_years.astype(str), format="%Y"),
+    })
+    return model.predict(future)["yhat"].to_numpy()
+
+
+def forecast_figure(years, values, forecast, theme, fig=None):
+    """
+    History as dots, forecast line with its uncertainty band.
+    Returns a matplotlib Figure (not tracked by pyplot unless `fig` is a pyplot figure).
+    """
+    if fig is None:
+        from matplotlib.figure import Figure
+
+        fig = Figure(figsize=(10, 6))
+
+    history_ds = pd.to_datetime(years.astype(str), format="%Y")
+
+    ax = fig.subplots()
+    ax.plot(history_ds, values, "k.", label="Observed")
+    ax.plot(forecast["ds"], forecast["yhat"], color="#0072B2", label="Forecast")
+    ax.fill_between(
+        forecast["ds"],
+        forecast["yhat_lower"],
+        forecast["yhat_upper"],
+        color="#0072B2",
+        alpha=0.2,
+    )
+    ax.set_title(f"Forecast: Number of Sets for {theme}")
+    ax.set_xlabel("Year")
+    ax.set_ylabel("Number of Sets")
+    ax.legend()
+    ax.grid(True)
+    fig.tight_layout()
+    return fig
+
+
+def _plot_forecast(years, values, forecast, theme):
+    """forecast_figure() in a pyplot window."""
+    import matplotlib.pyplot as plt
+
+    forecast_figure(years, values, forecast, theme, fig=plt.figure(figsize=(10, 6)))
     plt.show()
 
+
+@stage
+def forecast_theme(df, theme, periods=5, use_cache=True, engine="prophet", plot=True):
+    """
+    Build a simple yearly forecast for the number of sets
+    for a given theme.
+    df        : cleaned dataframe from prepare_data()
+    theme     : the theme name to forecast
+    periods   : how many future years to predict
+    use_cache : reuse a stored Prophet forecast when the theme's series,
+                horizon and model config are unchanged, and the stored
+                fitted model for any other horizon (see model_store.py)
+    engine    : "prophet", or one of the NumPy engines "linear" / "holt"
+                (see fast_forecasting.py), which fit in milliseconds
+    plot      : show the forecast chart in a pyplot window; pass False
+                and use forecast_figure() to draw it elsewhere (Streamlit)
+    """
+    if engine not in ENGINES:
+        logger.warning("Unknown engine %r, expected one of %s.", engine, ENGINES)
+        return None
+
+    if "year" not in df.columns or "num_sets" not in df.columns:
+        logger.warning("Required columns 'year' or 'num_sets' are missing.")
+        return None
+
+    series = get_theme_cube(df).series(theme, "num_sets")
+
+    if series is None:
+        logger.warning("No data found for theme: %s", theme)
+        return None
+
+    years, num_sets = series
+
+    if engine in FAST_ENGINES:
+        forecast = forecast_many(df, [theme], periods=periods, engine=engine,
+                                 include_history=True)
+        forecast = forecast.drop(columns="theme")
+        if plot:
+            _plot_forecast(years, num_sets, forecast, theme)
+        return forecast
+
+    if len(years) < PROPHET_MIN_POINTS:
+        logger.warning("Theme %s has %d year(s) of data, Prophet needs at least %d.",
+                       theme, len(years), PROPHET_MIN_POINTS)
+        return None
+
+    forecast = None
+    if use_cache:
+        cache = get_forecast_cache()
+        key = make_key(theme, periods, years, num_sets, _model_config())
+        forecast = cache.get(key)
+
+    if forecast is None:
+        model, how = get_prophet_model(theme, years, num_sets, use_store=use_cache)
+        logger.debug("Prophet model for %s: %s", theme, how)
+        forecast = _predict_future(model, periods)
+        if use_cache:
+            cache.put(key, forecast)
+
+    if plot:
+        _plot_forecast(years, num_sets, forecast, theme)
+
     return forecast
 
+
+def _forecast_worker(task):
+    """
+    Runs in a pool process: fit one theme, no plotting.
+    Returns (theme, forecast rows, fit seconds).
+    """
+    theme, years, values, periods, include_history = task
+
+    # cmdstanpy logs every fit at INFO level, which floods batch output
+    logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+    logging.getLogger("prophet").setLevel(logging.WARNING)
+
+    start = time.perf_counter()
+    model, forecast = _fit_prophet(years, values, periods)
+    elapsed = time.perf_counter() - start
+
+    if not include_history:
+        forecast = forecast.tail(periods)
+    return theme, forecast[FORECAST_COLUMNS], elapsed
+
+
+@stage
+def forecast_all_themes(df, periods=5, workers=None, min_points=PROPHET_MIN_POINTS,
+                        include_history=False, engine="prophet"):
+    """
+    Forecast every theme in a process pool (no charts).
+    df              : cleaned dataframe from prepare_data()
+    periods         : how many future years to predict
+    workers         : pool size (default: number of CPUs, 1 = run in-process)
+    min_points      : themes with fewer years of data are skipped
+    include_history : also return the fitted values for past years
+    engine          : "prophet", or "linear" / "holt" which fit all themes
+                      in one matrix operation (workers is then ignored)
+
+    Returns one long-format DataFrame with columns
+    theme, ds, yhat, yhat_lower, yhat_upper, fit_seconds
+    (fit_seconds is the fit + predict time of that theme; for the NumPy
+    engines it is the batch time divided by the number of themes).
+    """
+    if engine not in ENGINES:
+        logger.warning("Unknown engine %r, expected one of %s.", engine, ENGINES)
+        return None
+
+    if "year" not in df.columns or "num_sets" not in df.columns:
+        logger.warning("Required columns 'year' or 'num_sets' are missing.")
+        return None
+
+    if engine in FAST_ENGINES:
+        start = time.perf_counter()
+        forecasts = forecast_many(df, periods=periods, engine=engine,
+                                  include_history=include_history,
+                                  min_points=min_points)
+        elapsed = time.perf_counter() - start
+        fitted_themes = forecasts["theme"].nunique()
+        logger.info("Fitted %d themes with the %r engine in %.3fs.",
+                    fitted_themes, engine, elapsed)
+        forecasts["fit_seconds"] = elapsed / max(fitted_themes, 1)
+        return forecasts
+
+    cube = get_theme_cube(df)
+    tasks = []
+    skipped = []
+    for theme in cube.themes:
+        years, num_sets = cube.series(theme, "num_sets")
+        if len(years) < min_points:
+            skipped.append(theme)
+            continue
+        tasks.append((theme, years, num_sets, periods, include_history))
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    start = time.perf_counter()
+    results = []
+    if workers <= 1:
+        for task in tasks:
+            results.append(_forecast_worker(task))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_forecast_worker, task) for task in tasks]
+            for future in as_completed(futures):
+                results.append(future.result())
+    elapsed = time.perf_counter() - start
+
+    logger.info(
+        "Fitted %d themes in %.1fs with %d worker(s); skipped %d with fewer than "
+        "%d years of data.", len(results), elapsed, workers, len(skipped), min_points,
+    )
+
+    frames = []
+    for theme, forecast, fit_seconds in sorted(results, key=lambda r: r[0]):
+        forecast = forecast.copy()
+        forecast.insert(0, "theme", theme)
+        forecast["fit_seconds"] = fit_seconds
+        frames.append(forecast)
+
+    if not frames:
+        return pd.DataFrame(columns=["theme"] + FORECAST_COLUMNS + ["fit_seconds"])
+    return pd.concat(frames, ignore_index=True)
@@ -1,5 +1,6 @@
 import pandas as pd
 from .theme_forecasting import forecast_theme
+from .theme_search import get_theme_index
 
 def run_forecast_interaction(df):
     """
@@ -7,11 +8,9 @@ def run_forecast_interaction(df):
     Then call forecast_theme() and show the forecast chart.
     """
 
-    df_temp = df.copy()
 
-    unique_themes = df_temp["theme"].unique()
-    themes_list = unique_themes.tolist()
-    themes_list_sorted = sorted(themes_list)
+    index = get_theme_index(df)
+    themes_list_sorted = index.names
 
     if len(themes_list_sorted) == 0:
         print("[run_forecast_interaction] No themes available in the data.")
@@ -27,19 +26,12 @@ def run_forecast_interaction(df):
     print(", ".join(themes_list_sorted[:example_themes_to_show]))
 
     theme_input = input(
-        "\nPlease type the exact theme name you want to forecast "
+        "\nPlease type the theme name you want to forecast, or the start of it "
         "(or press Enter to use the first theme): "
     )
-    selected_theme = theme_input.strip()
-
-    if selected_theme == "":
-        selected_theme = themes_list_sorted[0]
-        print(f"\nNo theme entered. Using default theme: {selected_theme}")
-    else:
-        if selected_theme not in themes_list_sorted:
-            print(f"\nTheme '{selected_theme}' not found in the data.")
-            print(f"Using default theme instead: {themes_list_sorted[0]}")
-            selected_theme = themes_list_sorted[0]
+    selected_theme, message = index.choose(theme_input)
+    if message:
+        print(f"\n{message}")
 
     periods_input = input(
         "\nHow many future years do you want to forecast? "
@@ -64,7 +56,7 @@ def run_forecast_interaction(df):
     print(f"Forecast horizon: {periods} years")
 
 
-    forecast_df = forecast_theme(df_temp, selected_theme, periods=periods)
+    forecast_df = forecast_theme(df, selected_theme, periods=periods)
 
     if forecast_df is not None:
         print("\nLast 10 forecast rows (date and prediction):")
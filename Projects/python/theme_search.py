@@ -0,0 +1,199 @@
+"""
+Theme search: exact, prefix (autocomplete) and typo-tolerant lookup.
+
+    index = get_theme_index(df)
+    index.resolve("star wars")     # "Star Wars"  (case-insensitive exact match)
+    index.prefix("star")           # ["Star Wars", ...]
+    index.suggest("Star Wrs")      # [("Star Wars", 0.74), ...]
+
+The index is built once per prepared frame (cached with derived_cache):
+- a sorted list of lower-cased names, so a prefix query is a binary
+  search plus a short scan
+- a trigram index (trigram -> ids of the themes containing it); a fuzzy
+  query counts shared trigrams per theme with one np.bincount and ranks
+  by Dice similarity
+
+Both the console interactions and the Streamlit selectors use it.
+Run this file for a latency check:
+
+    python -m Projects.python.theme_search
+"""
+import bisect
+
+import numpy as np
+
+from .derived_cache import get_derived
+
+DEFAULT_MIN_SCORE = 0.3
+
+
+def _normalize(text):
+    return " ".join(str(text).lower().split())
+
+
+def _trigrams(text):
+    """Trigrams of the padded, lower-cased text (like PostgreSQL pg_trgm)."""
+    padded = f"  {_normalize(text)} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class ThemeSearchIndex:
+    """Search structures over a fixed list of theme names."""
+
+    def __init__(self, themes):
+        # sorted case-insensitively, ties by the original spelling
+        names = sorted({str(theme) for theme in themes}, key=lambda name: (_normalize(name), name))
+        self.names = names
+        self._keys = [_normalize(name) for name in names]
+        self._exact = {}
+        for name, key in zip(names, self._keys):
+            self._exact.setdefault(key, name)
+
+        postings = {}
+        self._trigram_counts = np.empty(len(names), dtype=np.int32)
+        for theme_id, name in enumerate(names):
+            grams = _trigrams(name)
+            self._trigram_counts[theme_id] = len(grams)
+            for gram in grams:
+                postings.setdefault(gram, []).append(theme_id)
+        self._postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, theme):
+        return _normalize(theme) in self._exact
+
+    def resolve(self, query):
+        """The theme whose name matches query ignoring case/extra spaces, else None."""
+        return self._exact.get(_normalize(query))
+
+    def prefix(self, query, limit=10):
+        """Themes whose name starts with query (case-insensitive), in name order."""
+        key = _normalize(query)
+        if not key:
+            return self.names[:limit]
+        start = bisect.bisect_left(self._keys, key)
+        matches = []
+        for position in range(start, len(self._keys)):
+            if len(matches) >= limit or not self._keys[position].startswith(key):
+                break
+            matches.append(self.names[position])
+        return matches
+
+    def suggest(self, query, limit=5, min_score=DEFAULT_MIN_SCORE):
+        """
+        "Did you mean": up to `limit` (theme, score) pairs, best first,
+        scored by trigram Dice similarity (1.0 = same trigrams).
+        """
+        grams = [gram for gram in _trigrams(query) if gram in self._postings]
+        if not grams or not self.names:
+            return []
+        ids = np.concatenate([self._postings[gram] for gram in grams])
+        shared = np.bincount(ids, minlength=len(self.names))
+        scores = 2.0 * shared / (len(_trigrams(query)) + self._trigram_counts)
+
+        limit = min(limit, len(scores))
+        best = np.argpartition(-scores, limit - 1)[:limit]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return [
+            (self.names[theme_id], round(float(scores[theme_id]), 3))
+            for theme_id in best
+            if scores[theme_id] >= min_score
+        ]
+
+    def complete(self, query, limit=10):
+        """Autocomplete: prefix matches first, then fuzzy matches to fill up."""
+        matches = self.prefix(query, limit=limit)
+        if len(matches) < limit and _normalize(query):
+            for name, _ in self.suggest(query, limit=limit):
+                if name not in matches:
+                    matches.append(name)
+                if len(matches) >= limit:
+                    break
+        return matches
+
+    def choose(self, query, default=None):
+        """
+        Pick a theme for free-text input, for the console tools.
+        Returns (theme, message); message explains any substitution.
+        exact match (ignoring case) -> that theme
+        a single prefix match       -> that theme
+        otherwise                   -> the best fuzzy match, else default
+        """
+        if default is None and self.names:
+            default = self.names[0]
+        if not _normalize(query):
+            return default, f"No theme entered. Using default theme: {default}"
+
+        theme = self.resolve(query)
+        if theme is not None:
+            return theme, None
+
+        matches = self.prefix(query, limit=2)
+        if len(matches) == 1:
+            return matches[0], f"Using '{matches[0]}' for '{query}'."
+
+        suggestions = [name for name, _ in self.suggest(query)]
+        if suggestions:
+            return suggestions[0], (
+                f"Theme '{query}' was not found. Did you mean: {', '.join(suggestions)}?\n"
+                f"Using the closest match: {suggestions[0]}"
+            )
+        return default, (
+            f"Theme '{query}' was not found in the data.\n"
+            f"Using default theme instead: {default}"
+        )
+
+
+def _build_index(df):
+    theme = df["theme"]
+    if hasattr(theme, "cat"):
+        # only categories that actually occur, without scanning every row as strings
+        themes = theme.cat.categories[np.unique(theme.cat.codes[theme.cat.codes >= 0])]
+    else:
+        themes = theme.dropna().unique()
+    return ThemeSearchIndex(themes)
+
+
+def get_theme_index(df):
+    """ThemeSearchIndex for df, built once per frame."""
+    return get_derived(df, "theme_search_index", _build_index)
+
+
+def benchmark_search(index, queries, repeat=200):
+    """Mean microseconds per prefix / suggest / choose call over the queries."""
+    import time
+
+    results = {}
+    for name, fn in [("prefix", index.prefix), ("suggest", index.suggest),
+                     ("choose", index.choose)]:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for query in queries:
+                fn(query)
+        elapsed = time.perf_counter() - start
+        results[name] = round(elapsed / (repeat * len(queries)) * 1e6, 1)
+    return results
+
+
+if __name__ == "__main__":
+    import time
+
+    from .data_snapshot import load_snapshot
+
+    df = load_snapshot()
+    start = time.perf_counter()
+    index = get_theme_index(df)
+    print(f"Built index of {len(index)} themes in {(time.perf_counter() - start) * 1000:.1f} ms")
+    queries = ["star", "Star Wrs", "techn", "harry poter", "city", "ninjago", "xyz"]
+    for query in queries[:4]:
+        print(f"{query!r:>14}: prefix={index.prefix(query, limit=3)} suggest={index.suggest(query, limit=3)}")
+    print("microseconds per call:", benchmark_search(index, queries))
+
+    from .benchmarks.synthetic import generate_theme_year_stats
+
+    names = generate_theme_year_stats(n_themes=20_000, first_year=2000, last_year=2005)["theme"].unique()
+    big_index = ThemeSearchIndex(names)
+    print(f"{len(big_index)} themes, microseconds per call:",
+          benchmark_search(big_index, ["Theme 01", "Thme 12345", "theme 0999"], repeat=50))
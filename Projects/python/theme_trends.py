@@ -1,97 +1,215 @@
-import matplotlib.pyplot as plt
+# matplotlib is imported inside each function so that importing this
+# module (e.g. from the Streamlit app) does not pay for it up front.
+#
+# The *_figure functions build and return a matplotlib Figure without
+# touching pyplot's global state, so they are safe to call from Streamlit
+# (or any other server). The plot_* functions draw the same chart in a
+# pyplot window for the console tools.
+import io
+import logging
+
 import pandas as pd
 
+from .data_preparation import get_year_slice
+from .instrumentation import stage
+from .theme_cube import get_theme_cube
 
-def plot_theme_trend(df, theme):
+logger = logging.getLogger(__name__)
+
+
+def _new_figure(fig, figsize):
+    """Use the given figure, or a new one that pyplot does not track."""
+    if fig is None:
+        from matplotlib.figure import Figure
+
+        fig = Figure(figsize=figsize)
+    return fig
+
+
+def figure_to_png(fig, dpi=100):
+    """Render a figure to PNG bytes."""
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=dpi)
+    return buffer.getvalue()
+
+
+@stage
+def theme_trend_figure(df, theme, fig=None):
     """
-    Plot the number of sets released per year for a given theme.
+    Figure with the number of sets released per year for a given theme,
+    or None if the theme has no data.
     Uses columns: 'theme', 'year', 'num_sets'.
     """
-    df_temp = df.copy()
+    series = get_theme_cube(df).series(theme, "num_sets")
 
-    theme_rows = df_temp[df_temp["theme"] == theme].copy()
+    if series is None:
+        logger.warning("No data found for theme: %s", theme)
+        return None
 
-    if theme_rows.empty:
-        print(f"[plot_theme_trend] No data found for theme: {theme}")
-        return
+    years, num_sets = series
 
-    theme_rows = theme_rows.sort_values(by="year", ascending=True)
+    fig = _new_figure(fig, (10, 5))
+    ax = fig.subplots()
+    ax.plot(years, num_sets, marker="o")
+    # marker="o", add dots
 
-    plt.figure(figsize=(10, 5))
-    plt.plot(theme_rows["year"],theme_rows["num_sets"],marker="o")
-    # marker="0", add dots
+    ax.set_title(f"Number of Sets Released per Year – {theme}")
+    ax.set_xlabel("Year")
+    ax.set_ylabel("Number of Sets Released")
 
-    plt.title(f"Number of Sets Released per Year – {theme}")
-    plt.xlabel("Year")
-    plt.ylabel("Number of Sets Released")
+    ax.grid(True)
+    fig.tight_layout()
+    return fig
 
-    plt.grid(True)
-    plt.tight_layout()
-    plt.show()
 
-
-def plot_portfolio_share(df, theme):
+@stage
+def portfolio_share_figure(df, theme, fig=None):
     """
-    (%) per year for a given theme.
+    Figure with the portfolio share (%) per year for a given theme,
+    or None if the theme has no data.
     Uses columns: 'theme', 'year', 'pct_of_portfolio'.
     """
+    cube = get_theme_cube(df)
 
-    df_temp = df.copy()
+    if cube.theme_code(theme) is None:
+        logger.warning("No data found for theme: %s", theme)
+        return None
 
-    theme_rows = df_temp[df_temp["theme"] == theme].copy()
+    if "pct_of_portfolio" not in cube.values:
+        logger.warning("Column 'pct_of_portfolio' is missing.")
+        return None
 
-    if theme_rows.empty:
-        print(f"[plot_portfolio_share] No data found for theme: {theme}")
-        return
-
-    if "pct_of_portfolio" not in theme_rows.columns:
-        print("[plot_portfolio_share] Column 'pct_of_portfolio' is missing.")
-        return
+    years, shares = cube.series(theme, "pct_of_portfolio")
 
-    theme_rows = theme_rows.sort_values(by="year", ascending=True)
+    fig = _new_figure(fig, (10, 5))
+    ax = fig.subplots()
+    ax.plot(years, shares, marker="o")
 
-    plt.figure(figsize=(10, 5))
-    plt.plot(theme_rows["year"],theme_rows["pct_of_portfolio"],marker="o")
+    ax.set_title(f"Portfolio Share per Year – {theme}")
+    ax.set_xlabel("Year")
+    ax.set_ylabel("Portfolio Share (%)")
 
-    plt.title(f"Portfolio Share per Year – {theme}")
-    plt.xlabel("Year")
-    plt.ylabel("Portfolio Share (%)")
+    ax.grid(True)
+    fig.tight_layout()
+    return fig
 
-    plt.grid(True)
-    plt.tight_layout()
-    plt.show()
 
-
-def plot_sets_per_theme_for_year(df, year):
+@stage
+def theme_comparison_figure(df, themes, fig=None):
     """
-    a bar chart showing: how many sets each theme has
-    in a given year.
+    Figure comparing several themes on shared year axes: sets per year on
+    top, portfolio share (%) below, one line per theme. Returns None if
+    none of the themes has data.
+    All series come from one gather over the theme cube, so the cost
+    grows with the number of themes, not with the rows in df.
+    """
+    cube = get_theme_cube(df)
+    gathered = cube.gather(themes, "num_sets")
+
+    if gathered is None:
+        logger.warning("No data found for themes: %s", list(themes))
+        return None
+
+    found, years, num_sets = gathered
+    panels = [(num_sets, "Number of Sets Released")]
+    if "pct_of_portfolio" in cube.values:
+        panels.append((cube.gather(found, "pct_of_portfolio")[2], "Portfolio Share (%)"))
+
+    fig = _new_figure(fig, (10, 4 * len(panels)))
+    axes = fig.subplots(len(panels), 1, sharex=True, squeeze=False)[:, 0]
+    for ax, (grid, y_label) in zip(axes, panels):
+        # one plot call for all themes; NaN (a year without sets) leaves a gap
+        ax.plot(years, grid.T, marker="o", markersize=3, label=found)
+        ax.set_ylabel(y_label)
+        ax.grid(True)
+
+    axes[0].set_title(f"Theme Comparison – {len(found)} themes")
+    axes[-1].set_xlabel("Year")
+    axes[0].legend(loc="upper left", bbox_to_anchor=(1.01, 1.0), fontsize="small")
+    fig.tight_layout()
+    return fig
+
+
+@stage
+def sets_per_theme_figure(df, year, fig=None):
+    """
+    Bar chart figure showing how many sets each theme has
+    in a given year, or None if the year has no data.
     Uses columns: 'year', 'theme', 'num_sets'.
     """
-
-    df_temp = df.copy()
-    year_rows = df_temp[df_temp["year"] == year].copy()
+    year_rows = get_year_slice(df, year)
 
     if year_rows.empty:
-        print(f"[plot_sets_per_theme_for_year] No data found for year: {year}")
-        return
+        logger.warning("No data found for year: %s", year)
+        return None
 
     if "theme" not in year_rows.columns or "num_sets" not in year_rows.columns:
-        print("[plot_sets_per_theme_for_year] Required columns are missing.")
-        return
+        logger.warning("Required columns are missing.")
+        return None
 
     year_rows_unique = year_rows[["theme", "num_sets"]].drop_duplicates(subset="theme")
 
-    year_rows_sorted = year_rows_unique.sort_values(by="num_sets",ascending=False)
+    year_rows_sorted = year_rows_unique.sort_values(by="num_sets", ascending=False)
+
+    fig = _new_figure(fig, (10, 5))
+    ax = fig.subplots()
+    ax.bar(year_rows_sorted["theme"].astype(str), year_rows_sorted["num_sets"])
 
-    plt.figure(figsize=(10, 5))
-    plt.bar(year_rows_sorted["theme"],year_rows_sorted["num_sets"])
+    ax.set_title(f"Number of Sets per Theme in {year}")
+    ax.set_xlabel("Theme")
+    ax.set_ylabel("Number of Sets")
 
-    plt.title(f"Number of Sets per Theme in {year}")
-    plt.xlabel("Theme")
-    plt.ylabel("Number of Sets")
+    ax.tick_params(axis="x", labelrotation=45)
+    for label in ax.get_xticklabels():
+        label.set_horizontalalignment("right")
 
-    plt.xticks(rotation=45, ha="right")
+    fig.tight_layout()
+    return fig
 
-    plt.tight_layout()
+
+def _show(figure_fn, *args, figsize=(10, 5)):
+    import matplotlib.pyplot as plt
+
+    fig = figure_fn(*args, fig=plt.figure(figsize=figsize))
+    if fig is None:
+        plt.close()
+        return
     plt.show()
+
+
+@stage
+def plot_theme_trend(df, theme):
+    """
+    Plot the number of sets released per year for a given theme.
+    Uses columns: 'theme', 'year', 'num_sets'.
+    """
+    _show(theme_trend_figure, df, theme)
+
+
+@stage
+def plot_portfolio_share(df, theme):
+    """
+    (%) per year for a given theme.
+    Uses columns: 'theme', 'year', 'pct_of_portfolio'.
+    """
+    _show(portfolio_share_figure, df, theme)
+
+
+@stage
+def plot_theme_comparison(df, themes):
+    """
+    Plot sets per year and portfolio share (%) of several themes
+    on one chart with shared year axes.
+    Uses columns: 'theme', 'year', 'num_sets', 'pct_of_portfolio'.
+    """
+    _show(theme_comparison_figure, df, themes, figsize=(10, 8))
+
+
+@stage
+def plot_sets_per_theme_for_year(df, year):
+    """
+    a bar chart showing: how many sets each theme has
+    in a given year.
+    Uses columns: 'year', 'theme', 'num_sets'.
+    """
+    _show(sets_per_theme_figure, df, year)
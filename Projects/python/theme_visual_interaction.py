@@ -1,5 +1,7 @@
 import pandas as pd
-from .theme_trends import (plot_theme_trend,plot_portfolio_share,plot_sets_per_theme_for_year,)
+from .theme_duration import top_themes
+from .theme_search import get_theme_index
+from .theme_trends import (plot_theme_trend,plot_portfolio_share,plot_sets_per_theme_for_year,plot_theme_comparison,)
 
 
 def show_theme_trend_charts(df):
@@ -9,11 +11,8 @@ def show_theme_trend_charts(df):
     -Portfolio share per year for that theme
     """
 
-    df_temp = df.copy()
-    unique_themes_series = df_temp["theme"].unique()
-    themes_list = unique_themes_series.tolist()
-
-    themes_list_sorted = sorted(themes_list)
+    index = get_theme_index(df)
+    themes_list_sorted = index.names
 
     print("\n========================")
     print("THEME TREND VISUALISATION")
@@ -26,28 +25,61 @@ def show_theme_trend_charts(df):
     print(", ".join(examples))
 
     user_input = input(
-        "\nPlease type the exact theme name you want to see "
+        "\nPlease type the theme name you want to see, or the start of it "
         "(or press Enter to use the first theme in the list): "
     )
 
-    selected_theme = user_input.strip()
-
-    if selected_theme == "":
-        selected_theme = themes_list_sorted[0]
-        print(f"\nNo theme entered. Using default theme: {selected_theme}")
-    else:
-        if selected_theme not in themes_list_sorted:
-            print(f"\nTheme '{selected_theme}' was not found in the data.")
-            print(f"Using default theme instead: {themes_list_sorted[0]}")
-            selected_theme = themes_list_sorted[0]
+    selected_theme, message = index.choose(user_input)
+    if message:
+        print(f"\n{message}")
 
     print(f"\nYou selected theme: {selected_theme}")
 
     print("\nShowing chart: Number of sets per year...")
-    plot_theme_trend(df_temp, selected_theme)
+    plot_theme_trend(df, selected_theme)
 
     print("\nShowing chart: Portfolio share per year...")
-    plot_portfolio_share(df_temp, selected_theme)
+    plot_portfolio_share(df, selected_theme)
+
+
+def show_theme_comparison_chart(df):
+    """
+    input several themes (comma separated) and show them on one chart:
+    -Number of sets per year
+    -Portfolio share per year
+    """
+
+    index = get_theme_index(df)
+    default_themes = top_themes(df, n=5)
+
+    print("\n==========================")
+    print("THEME COMPARISON CHART")
+    print("==========================")
+
+    user_input = input(
+        "\nPlease type the themes you want to compare, separated by commas "
+        f"(or press Enter for the top 5 by sets: {', '.join(default_themes)}): "
+    )
+
+    if user_input.strip() == "":
+        selected_themes = default_themes
+    else:
+        selected_themes = []
+        for query in user_input.split(","):
+            if query.strip() == "":
+                continue
+            theme, message = index.choose(query.strip())
+            if message:
+                print(f"\n{message}")
+            if theme not in selected_themes:
+                selected_themes.append(theme)
+
+    if len(selected_themes) == 0:
+        print("[show_theme_comparison_chart] No themes to compare.")
+        return
+
+    print(f"\nComparing themes: {', '.join(selected_themes)}")
+    plot_theme_comparison(df, selected_themes)
 
 
 def show_year_bar_chart(df):
@@ -56,9 +88,8 @@ def show_year_bar_chart(df):
     A bar chart of number of sets per theme in that year.
     """
 
-    df_temp = df.copy()
 
-    years_series = df_temp["year"].dropna()
+    years_series = df["year"].dropna()
     years_as_int = years_series.astype(int)
     unique_years = years_as_int.unique()
     years_list = unique_years.tolist()
@@ -102,4 +133,4 @@ def show_year_bar_chart(df):
 
     print(f"\nYou selected year: {selected_year}")
     print("Showing bar chart: number of sets per theme...")
-    plot_sets_per_theme_for_year(df_temp, selected_year)
+    plot_sets_per_theme_for_year(df, selected_year)
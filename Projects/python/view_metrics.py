@@ -0,0 +1,199 @@
+"""
+vw_theme_year_stats rebuilt in pandas / NumPy.
+
+Takes the raw Rebrickable-style `sets` (set_num, name, year, theme_id, ...)
+and `themes` (id, name, parent_id) tables, from CSV or any database, and
+produces the same columns as the SQL view in Projects/SQL/LEGO_THEME_SET.sql:
+
+    theme_year      -> groupby(year, theme).size()
+    LAG(num_sets)   -> groupby(theme).shift()
+    year_total      -> groupby(year).transform("sum")
+    first_year      -> groupby(theme).transform("min")
+    new_theme_count -> value_counts of each theme's first year
+
+append_year() adds one new year to an existing result without touching
+the earlier years. Run this file to check parity against the shipped CSV:
+
+    python -m Projects.python.view_metrics
+"""
+import sys
+
+import numpy as np
+import pandas as pd
+
+VIEW_COLUMNS = [
+    "year",
+    "theme",
+    "num_sets",
+    "prev_num_sets",
+    "abs_change",
+    "pct_change",
+    "total_sets_year",
+    "pct_of_portfolio",
+    "is_new_theme_year",
+    "new_themes_launched",
+]
+
+
+def read_raw_csv(sets_csv, themes_csv):
+    """Load the raw sets/themes CSV exports, only the columns the view uses."""
+    sets = pd.read_csv(sets_csv, usecols=["year", "theme_id"])
+    themes = pd.read_csv(themes_csv, usecols=["id", "name"])
+    return sets, themes
+
+
+def theme_year_counts(sets, themes):
+    """
+    The view's theme_year CTE: sets per (year, theme name).
+    Inner join like the SQL, so sets with an unknown theme_id are dropped.
+    """
+    theme_names = themes[["id", "name"]].rename(columns={"id": "theme_id", "name": "theme"})
+    joined = sets[["year", "theme_id"]].merge(theme_names, on="theme_id", how="inner")
+    counts = joined.groupby(["year", "theme"], observed=True, sort=True).size()
+    return counts.rename("num_sets").reset_index()
+
+
+def _round_half_away(values, decimals=2):
+    """SQL Server ROUND(): halves round away from zero (NumPy rounds to even)."""
+    scale = 10 ** decimals
+    # the epsilon absorbs float error such as 0.125 * 100 = 12.499999...
+    return np.sign(values) * np.floor(np.abs(values) * scale + 0.5 + 1e-9) / scale
+
+
+def compute_view_metrics(theme_year):
+    """
+    All derived view columns from (year, theme, num_sets) in one pass.
+    Missing values stay missing, exactly like the view's NULLs;
+    prepare_data() fills them afterwards.
+    """
+    df = theme_year[["year", "theme", "num_sets"]].sort_values(
+        ["theme", "year"], kind="stable", ignore_index=True
+    )
+    by_theme = df.groupby("theme", observed=True, sort=False)
+    num_sets = df["num_sets"].astype("float64")
+
+    # LAG(num_sets) OVER (PARTITION BY theme ORDER BY year)
+    prev = by_theme["num_sets"].shift().astype("float64")
+    abs_change = num_sets - prev
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct_change = _round_half_away(100.0 * abs_change / prev)
+    pct_change = pct_change.where(prev.notna() & (prev != 0))
+
+    total_sets_year = df.groupby("year")["num_sets"].transform("sum")
+    pct_of_portfolio = _round_half_away(100.0 * num_sets / total_sets_year)
+
+    first_year = by_theme["year"].transform("min")
+    is_new = (df["year"] == first_year).astype("int64")
+
+    # LEFT JOIN new_theme_count: NULL in years without a launch
+    launches = first_year.groupby(by_theme.ngroup()).first().value_counts()
+    new_themes_launched = df["year"].map(launches).astype("Int64")
+
+    return pd.DataFrame({
+        "year": df["year"],
+        "theme": df["theme"],
+        "num_sets": df["num_sets"],
+        "prev_num_sets": prev.astype("Int64"),
+        "abs_change": abs_change,
+        "pct_change": pct_change,
+        "total_sets_year": total_sets_year,
+        "pct_of_portfolio": pct_of_portfolio,
+        "is_new_theme_year": is_new,
+        "new_themes_launched": new_themes_launched,
+    })
+
+
+def compute_theme_year_stats(sets, themes):
+    """Raw sets + themes -> the vw_theme_year_stats frame."""
+    return compute_view_metrics(theme_year_counts(sets, themes))
+
+
+def append_year(stats, new_theme_year):
+    """
+    Incremental mode: add the rows of one new year to an existing
+    compute_view_metrics() result without recomputing earlier years.
+    stats          : the current view frame
+    new_theme_year : (year, theme, num_sets) rows of a single year that
+                     is later than every year already in stats
+    Only each theme's latest row (for LAG) and the set of known themes
+    (for is_new_theme_year) are read from stats.
+    """
+    years = new_theme_year["year"].unique()
+    if len(years) != 1:
+        raise ValueError("append_year expects the rows of exactly one year")
+    year = years[0]
+    if len(stats) and year <= stats["year"].max():
+        raise ValueError(f"year {year} is not later than the data already in stats")
+
+    latest = (
+        stats[["theme", "year", "num_sets"]]
+        .sort_values("year", kind="stable")
+        .drop_duplicates("theme", keep="last")
+        .set_index("theme")["num_sets"]
+    )
+
+    new_rows = new_theme_year[["year", "theme", "num_sets"]].reset_index(drop=True)
+    num_sets = new_rows["num_sets"].astype("float64")
+    prev = new_rows["theme"].map(latest).astype("float64")
+    abs_change = num_sets - prev
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct_change = _round_half_away(100.0 * abs_change / prev)
+    pct_change = pct_change.where(prev.notna() & (prev != 0))
+
+    total = new_rows["num_sets"].sum()
+    is_new = (~new_rows["theme"].isin(latest.index)).astype("int64")
+    launched = int(is_new.sum())
+
+    appended = pd.DataFrame({
+        "year": new_rows["year"],
+        "theme": new_rows["theme"],
+        "num_sets": new_rows["num_sets"],
+        "prev_num_sets": prev.astype("Int64"),
+        "abs_change": abs_change,
+        "pct_change": pct_change,
+        "total_sets_year": total,
+        "pct_of_portfolio": _round_half_away(100.0 * num_sets / total),
+        "is_new_theme_year": is_new,
+        "new_themes_launched": pd.array([launched if launched else pd.NA] * len(new_rows),
+                                        dtype="Int64"),
+    })
+    return pd.concat([stats, appended], ignore_index=True)
+
+
+def check_parity(csv_path="lego_theme_year_stats_clean.csv", tolerance=1e-4):
+    """
+    Rebuild the view from the (year, theme, num_sets) columns of the
+    shipped CSV and compare every derived column, both in one pass and
+    year-by-year through append_year().
+    Returns a DataFrame with the number of mismatching rows per column.
+    """
+    from .data_preparation import prepare_data
+
+    expected = prepare_data(pd.read_csv(csv_path))
+    theme_year = expected[["year", "theme", "num_sets"]].astype({"theme": str})
+
+    one_pass = compute_view_metrics(theme_year)
+
+    years = sorted(theme_year["year"].unique())
+    incremental = compute_view_metrics(theme_year[theme_year["year"] == years[0]])
+    for year in years[1:]:
+        incremental = append_year(incremental, theme_year[theme_year["year"] == year])
+
+    key = ["year", "theme"]
+    expected = expected.astype({"theme": str}).sort_values(key, ignore_index=True)
+    rows = []
+    for mode, result in [("one_pass", one_pass), ("append_year", incremental)]:
+        actual = prepare_data(result).astype({"theme": str}).sort_values(key, ignore_index=True)
+        if len(actual) != len(expected):
+            raise AssertionError(f"{mode}: {len(actual)} rows, expected {len(expected)}")
+        for col in VIEW_COLUMNS[2:]:
+            diff = np.abs(actual[col].astype("float64") - expected[col].astype("float64"))
+            rows.append({"mode": mode, "column": col,
+                         "mismatches": int((diff > tolerance).sum())})
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    report = check_parity()
+    print(report.to_string(index=False))
+    sys.exit(1 if report["mismatches"].any() else 0)
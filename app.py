@@ -3,15 +3,11 @@ import pandas as pd
 
 
 # ========= IMPORT YOUR EXISTING LEGO MODULES =========
-from Projects.python.data_loader import load_theme_year_stats
-from Projects.python.data_preparation import prepare_data
-from Projects.python.year_explorer_cool_function import run_year_explorer
-from Projects.python.theme_visual_interaction import (
-    show_theme_trend_charts,
-    show_year_bar_chart,
-)
-from Projects.python.theme_forecasting_interaction import run_forecast_interaction
-from Projects.python.theme_duration_interaction import run_theme_duration_interaction
+# Only the light data loader is imported up front. The analysis modules
+# (and through them prophet / matplotlib) are imported inside the page
+# that uses them, so the Overview, SQL and Power BI pages start fast.
+# The SQL Server loader (sqlalchemy) is not needed by the deployed app.
+from Projects.python.data_snapshot import load_snapshot
 
 # ========= PAGE CONFIG =========
 st.set_page_config(
@@ -39,6 +35,7 @@ with st.sidebar:
 
     st.markdown("---")
     st.caption("This portfolio is built with Streamlit in Python.")
+    show_diagnostics_panel = st.checkbox("Show pipeline diagnostics", value=False)
 
     st.markdown("---")
     st.subheader("📂 Navigate")
@@ -49,10 +46,13 @@ with st.sidebar:
     )
 
 # ========= HELPER: LOAD & PREP DATA ONCE =========
-@st.cache_data(show_spinner="Loading LEGO theme-year data…")
+# cache_resource hands every session the same frame instead of unpickling
+# a fresh copy on each rerun; the analysis modules only read from it
+@st.cache_resource(show_spinner="Loading LEGO theme-year data…")
 def load_clean_lego_data():
-    # In the deployed app, just load the cleaned CSV
-    df_clean = pd.read_csv("lego_theme_year_stats_clean.csv")
+    # In the deployed app, load the cleaned CSV through its Parquet snapshot
+    # (rebuilt automatically whenever the CSV changes)
+    df_clean = load_snapshot("lego_theme_year_stats_clean.csv")
     return df_clean
 
 
@@ -182,6 +182,15 @@ def show_python_projects():
         """
     )
 
+    from Projects.python.year_explorer_cool_function import run_year_explorer
+    from Projects.python.streamlit_views import (
+        show_forecast_view,
+        show_theme_comparison_view,
+        show_theme_duration_view,
+        show_theme_trends_view,
+        show_year_bar_view,
+    )
+
     # ----- Load data once -----
     df_clean = load_clean_lego_data()
 
@@ -209,12 +218,23 @@ def show_python_projects():
             - Line chart: number of sets per year for a selected theme  
             - Line chart: portfolio share (%) per year for that theme  
             - Bar chart: sets per theme in a selected year  
+            - Comparison: several themes on one chart with shared year axes  
 
-            These views are powered by your `theme_trends.py` module.
+            These views are powered by your `theme_trends.py` module
+            (or `plotly_trends.py` for the interactive charts).
             """
         )
-        show_theme_trend_charts(df_clean)
-        show_year_bar_chart(df_clean)
+        chart_style = st.radio(
+            "Chart style:",
+            ["Static (matplotlib)", "Interactive (Plotly)"],
+            horizontal=True,
+            key="chart_style",
+        )
+        interactive = chart_style == "Interactive (Plotly)"
+        show_theme_trends_view(df_clean, interactive=interactive)
+        show_year_bar_view(df_clean, interactive=interactive)
+        st.markdown("#### Compare themes")
+        show_theme_comparison_view(df_clean, interactive=interactive)
 
     with tab_forecast:
         st.write(
@@ -224,12 +244,13 @@ def show_python_projects():
             - Choose a theme and forecast horizon (years)  
             - Prophet model: year → number of sets for that theme  
             - Output: forecast plot + last 10 predicted values  
+            - Fits run on a background queue, so the page stays responsive  
 
             Implemented in `theme_forecasting.py` +
-            `theme_forecasting_interaction.py`.
+            `streamlit_views.py`.
             """
         )
-        run_forecast_interaction(df_clean)
+        show_forecast_view(df_clean)
 
     with tab_explorer:
         st.write(
@@ -251,13 +272,14 @@ def show_python_projects():
             **Theme Duration Analysis**
 
             - Calculate first and last active year per theme  
-            - Compute how many years each theme has been active  
+            - Compute how many years each theme has been active, its longest
+              unbroken run and how often it came back after a break  
             - Rank longest-running themes in LEGO history  
 
-            Implemented in `theme_duration_interaction.py`.
+            Implemented in `theme_duration.py` + `streamlit_views.py`.
             """
         )
-        run_theme_duration_interaction(df_clean)
+        show_theme_duration_view(df_clean)
 
     st.markdown("---")
     st.caption("All Python analysis in this portfolio is based on the LEGO dataset.")
@@ -544,6 +566,37 @@ def show_powerbi_projects():
         )
 
 
+def show_diagnostics():
+    # instrumentation only imports pandas, so this stays cheap
+    from Projects.python.forecast_jobs import get_forecast_queue
+    from Projects.python.instrumentation import REGISTRY
+
+    with st.expander("🩺 Pipeline diagnostics", expanded=True):
+        st.write(
+            "Wall time and rows per pipeline stage in this server process "
+            "(load, clean, charts, forecasts). Peak memory is only recorded "
+            "when the app runs with `LEGO_TRACE_MEMORY=1`."
+        )
+        jobs = get_forecast_queue().stats()
+        st.caption("Forecast jobs: " + ", ".join(f"{status} {count}" for status, count in jobs.items()))
+        summary = REGISTRY.summary()
+        if summary.empty:
+            st.info("No stages recorded yet.")
+            return
+        st.dataframe(summary, hide_index=True)
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button(
+                label="Download metrics (.json)",
+                data=REGISTRY.to_json(),
+                file_name="pipeline_metrics.json",
+                mime="application/json",
+            )
+        with col2:
+            if st.button("Clear metrics"):
+                REGISTRY.clear()
+
+
 # ========= ROUTER =========
 if page == "🏠 Overview":
     show_overview()
@@ -554,6 +607,9 @@ elif page == "🗄 SQL Projects":
 elif page == "📊 Power BI Dashboards":
     show_powerbi_projects()
 
+if show_diagnostics_panel:
+    show_diagnostics()
+
 st.markdown("---")
 st.caption("Last updated: 2025.")
 